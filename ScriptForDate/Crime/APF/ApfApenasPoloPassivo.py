@@ -1,122 +1,174 @@
+import os
+import sys
+import numpy as np
 import pandas as pd
-import re
-import unicodedata
 
-def remover_acentos(texto):
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from comum.cnj import ano_cnj
+from comum.exportacao import exportar_excel
+from comum.fuzzy import parear_nomes_fuzzy, preparar_lado
+from comum.leitura import ler_csv_com_cache
+from comum.polos import explodir_colunas, explodir_polos, normalizar_nomes
+from comum.progresso import Progresso
+
+def ler_csv(arquivo, sep, colunas, chunksize=None):
     """
-    Remove acentos de uma string utilizando normalização Unicode.
+    Lê só as colunas necessárias; com chunksize, devolve um iterador de blocos.
+    Sem chunksize, a leitura vem do cache de comum.leitura se o arquivo não mudou.
     """
-    if isinstance(texto, str):
-        return ''.join(
-            c for c in unicodedata.normalize('NFD', texto)
-            if unicodedata.category(c) != 'Mn'
-        )
-    return texto
-
-def extrair_ano_processo(numero_processo):
-    match_ano = re.search(r'\d{7}-\d{2}\.(\d{4})\.', str(numero_processo))
-    return int(match_ano.group(1)) if match_ano else None
+    if chunksize:
+        return pd.read_csv(arquivo, sep=sep, encoding='utf-8', usecols=colunas, chunksize=chunksize)
+    df, _ = ler_csv_com_cache(arquivo, colunas=colunas, dtype=None, encoding='utf-8', delimitador=sep,
+                              padronizar=False)
+    return iter([df])
 
 def comparar_arquivos_csv_dupla(arquivo1, arquivo2, 
                                 coluna_comparacao, 
                                 coluna_processo1, coluna_processo2, 
                                 coluna_classe1, coluna_classe2, 
-                                saida):
-    # Carregar os arquivos CSV
-    df1 = pd.read_csv(arquivo1, sep=';', encoding='utf-8')
-    df2 = pd.read_csv(arquivo2, sep=',', encoding='utf-8')
-    
-    # Normalizar a coluna de comparação no arquivo1 (APF)
-    df1[coluna_comparacao] = df1[coluna_comparacao].str.strip().str.upper().apply(remover_acentos)
-    
-    # No arquivo2 (Ação Penal), normalizar as colunas "Polo Passivo" e "poloAtivo"
-    df2[coluna_comparacao] = df2[coluna_comparacao].str.strip().str.upper().apply(remover_acentos)
-    df2['poloAtivo'] = df2['poloAtivo'].str.strip().str.upper().apply(remover_acentos)
+                                saida, modo='exato', limite_similaridade=85,
+                                chunksize=None):
+    """
+    :param modo: 'exato' (nomes iguais após a normalização) ou 'fuzzy' (nomes
+                 parecidos, com blocagem; a saída ganha as colunas
+                 "Nome na Ação Penal" e "Similaridade" para revisão).
+    :param limite_similaridade: Pontuação mínima (0-100) no modo 'fuzzy'.
+    :param chunksize: Se informado, a Ação Penal é lida em blocos desse número de
+                      linhas e passa pelo índice de nomes do APF, guardando só as
+                      correspondências; o resultado é o mesmo da leitura completa.
+    """
+    if modo not in ('exato', 'fuzzy'):
+        raise ValueError("O modo deve ser 'exato' ou 'fuzzy'")
+    progresso = Progresso('ApfApenasPoloPassivo')
+    processo_apf = f"{coluna_processo1}_APF"
+    processo_acao = f"{coluna_processo2}_ACAO"
+    classe_apf = f"{coluna_classe1}_APF"
+    classe_acao = f"{coluna_classe2}_ACAO"
+
+    # Carregar o APF (só as colunas necessárias para a comparação)
+    with progresso.etapa('leitura'):
+        df1 = next(ler_csv(arquivo1, ';', [coluna_processo1, coluna_classe1, coluna_comparacao]))
     
     # Renomear colunas para diferenciar os dados de APF e Ação Penal
-    df1 = df1.rename(columns={
-        coluna_processo1: f"{coluna_processo1}_APF", 
-        coluna_classe1: f"{coluna_classe1}_APF"
-    })
-    df2 = df2.rename(columns={
-        coluna_processo2: f"{coluna_processo2}_ACAO", 
-        coluna_classe2: f"{coluna_classe2}_ACAO"
-    })
-    
-    # Selecionar apenas as colunas necessárias para a comparação
-    colunas_necessarias1 = [f"{coluna_processo1}_APF", f"{coluna_classe1}_APF", coluna_comparacao]
-    colunas_necessarias2 = [f"{coluna_processo2}_ACAO", f"{coluna_classe2}_ACAO", 
-                            coluna_comparacao, "assuntoPrincipal", "nomeTarefa", "poloAtivo"]
-    df1 = df1[colunas_necessarias1].copy()
-    df2 = df2[colunas_necessarias2].copy()
-    
-    # Extrair o ano do processo para os dois DataFrames
-    df1['Ano_APF'] = df1[f"{coluna_processo1}_APF"].apply(extrair_ano_processo)
-    df2['Ano_ACAO'] = df2[f"{coluna_processo2}_ACAO"].apply(extrair_ano_processo)
-    
-    # --- Realizar a comparação utilizando duas junções ---
-    # 1. Comparação: APF[coluna_comparacao] com Ação Penal[coluna_comparacao] (Polo Passivo)
-    merge_passivo = pd.merge(df1, df2, on=coluna_comparacao, how='left', suffixes=('', '_ACAO'))
-    merge_passivo['Tipo_Match'] = 'Polo Passivo'
-    
-    # 2. Comparação: APF[coluna_comparacao] com Ação Penal['poloAtivo']
-    merge_ativo = pd.merge(df1, df2, left_on=coluna_comparacao, right_on='poloAtivo', how='left', suffixes=('', '_ACAO'))
-    merge_ativo['Tipo_Match'] = 'poloAtivo'
-    
-    # Combinar os resultados das duas junções
-    merged = pd.concat([merge_passivo, merge_ativo], ignore_index=True)
-    
-    # Criar a coluna unificada "Nome do Polo"
-    merged['Nome do Polo'] = merged.apply(
-        lambda row: row[coluna_comparacao] if row['Tipo_Match'] == 'Polo Passivo' else row['poloAtivo'],
-        axis=1
-    )
-    
-    # --- Validação das Correspondências ---
-    # A correspondência é válida se:
-    # - O ano do processo da Ação Penal não for nulo;
-    # - O ano da Ação Penal for maior ou igual ao ano do APF;
-    # - A classe judicial da Ação Penal for diferente de "AuPrFl".
-    merged['Valido'] = (
-        merged['Ano_ACAO'].notnull() &
-        (merged['Ano_ACAO'] >= merged['Ano_APF']) &
-        (merged[f"{coluna_classe2}_ACAO"] != "AuPrFl")
-    )
-    
-    # Selecionar apenas as linhas com correspondências válidas
-    correspondencias = merged[merged['Valido']].copy()
-    
-    # Verificar se o "Nome do Polo" aparece apenas uma vez entre as correspondências
-    if not correspondencias.empty:
-        freq = correspondencias['Nome do Polo'].value_counts()
-        correspondencias['PoloPassivo_Unico'] = correspondencias['Nome do Polo'].map(lambda x: freq[x] == 1)
-    else:
-        correspondencias['PoloPassivo_Unico'] = []
-    
-    # Reorganizar as colunas para a saída
-    colunas_ordenadas = [
-        f"{coluna_processo1}_APF", "Ano_APF", "nomeTarefa", "Ano_ACAO",
-        f"{coluna_processo2}_ACAO", "Nome do Polo",
-        f"{coluna_classe1}_APF", f"{coluna_classe2}_ACAO",
-        "assuntoPrincipal", "PoloPassivo_Unico"
-    ]
-    correspondencias = correspondencias[[col for col in colunas_ordenadas if col in correspondencias.columns]]
-    
-    # Identificar os processos do APF que NÃO tiveram nenhum match válido
-    valid_por_processo = merged.groupby(f"{coluna_processo1}_APF")['Valido'].any().reset_index()
-    nao_encontrados_ids = valid_por_processo[~valid_por_processo['Valido']][f"{coluna_processo1}_APF"]
-    nao_encontrados = df1[df1[f"{coluna_processo1}_APF"].isin(nao_encontrados_ids)].copy()
-    
-    # Garantir que a coluna Ano_APF esteja presente
-    if 'Ano_APF' not in nao_encontrados.columns:
-        nao_encontrados['Ano_APF'] = nao_encontrados[f"{coluna_processo1}_APF"].apply(extrair_ano_processo)
+    df1 = df1.rename(columns={coluna_processo1: processo_apf, coluna_classe1: classe_apf})
+    df1 = df1[[processo_apf, classe_apf, coluna_comparacao]]
+
+    with progresso.etapa('normalizacao'):
+        # Normalizar a coluna de comparação no APF e extrair o ano do processo
+        df1[coluna_comparacao] = normalizar_nomes(df1[coluna_comparacao])
+        df1['Ano_APF'] = ano_cnj(df1[processo_apf])
+        anos_apf = df1['Ano_APF'].to_numpy(dtype=float, na_value=np.nan)
+
+        # Índice de nomes do APF, montado uma vez só. Cada célula de polo é
+        # separada em partes (ex.: "FULANO E OUTROS; CICLANO")
+        nomes_apf = explodir_polos(df1[coluna_comparacao], normalizado=True)
+        lado_apf = preparar_lado(nomes_apf, anos_apf, 'min') if modo == 'fuzzy' else None
+        nomes_apf = nomes_apf.rename(columns={'linha': '_ordem'})
+
+    # Linhas do APF com ao menos uma correspondência válida
+    encontrado = np.zeros(len(df1), dtype=bool)
+    blocos_correspondencias = []
+    linhas_acao = 0
+
+    colunas_acao = [coluna_processo2, coluna_classe2, coluna_comparacao,
+                    "assuntoPrincipal", "nomeTarefa", "poloAtivo"]
+    leitura_acao = ler_csv(arquivo2, ',', colunas_acao, chunksize)
+    progresso.iniciar(None, "Comparando Ação Penal")
+    while True:
+        with progresso.etapa('leitura'):
+            df2 = next(leitura_acao, None)
+        if df2 is None:
+            break
+        # Posição das linhas deste bloco no arquivo inteiro
+        deslocamento = linhas_acao
+        linhas_acao += len(df2)
+
+        df2 = df2.rename(columns={coluna_processo2: processo_acao, coluna_classe2: classe_acao})
+        with progresso.etapa('normalizacao'):
+            # Na Ação Penal, normalizar "Polo Passivo" e "poloAtivo" e extrair o ano
+            df2[coluna_comparacao] = normalizar_nomes(df2[coluna_comparacao])
+            df2['poloAtivo'] = normalizar_nomes(df2['poloAtivo'])
+            df2['Ano_ACAO'] = ano_cnj(df2[processo_acao])
+            anos_acao = df2['Ano_ACAO'].to_numpy(dtype=float, na_value=np.nan)
+
+        with progresso.etapa('comparacao'):
+            # --- Uma única junção ---
+            # A Ação Penal vira uma tabela longa (nome, papel, linha): cada linha
+            # contribui com as partes do Polo Passivo (_tipo 0) e do poloAtivo (_tipo 1).
+            # A junção usa a chave uint64 do nome e carrega só as posições das linhas;
+            # os demais campos são buscados depois, apenas para os pares válidos.
+            nomes_acao = explodir_colunas(df2, [coluna_comparacao, 'poloAtivo'], normalizado=True)
+            if modo == 'fuzzy':
+                # Nomes parecidos, pontuados só dentro dos blocos e já com a regra de ano
+                pares = parear_nomes_fuzzy(
+                    None, nomes_acao, limite=limite_similaridade,
+                    anos_b=anos_acao, lado_a=lado_apf
+                ).rename(columns={'linha_a': '_ordem', 'linha_b': '_linha', 'papel': '_tipo', 'nome_a': 'nome'})
+            else:
+                nomes_acao = nomes_acao.rename(columns={'linha': '_linha', 'papel': '_tipo'})
+                pares = nomes_apf.merge(nomes_acao[['chave', '_tipo', '_linha']], on='chave', how='inner')
+
+            # --- Validação das Correspondências ---
+            # A correspondência é válida se:
+            # - O ano do processo da Ação Penal não for nulo;
+            # - O ano da Ação Penal for maior ou igual ao ano do APF;
+            # - A classe judicial da Ação Penal for diferente de "AuPrFl".
+            ano_acao = anos_acao[pares['_linha'].to_numpy()]
+            ano_apf = anos_apf[pares['_ordem'].to_numpy()]
+            classe_valida = (df2[classe_acao] != "AuPrFl").to_numpy(dtype=bool, na_value=True)[pares['_linha'].to_numpy()]
+            valido = ~np.isnan(ano_acao) & (ano_acao >= ano_apf) & classe_valida
+            pares = pares[valido].reset_index(drop=True)
+            encontrado[pares['_ordem'].to_numpy()] = True
+
+            apf = df1.iloc[pares['_ordem'].to_numpy()].reset_index(drop=True)
+            acao = df2.iloc[pares['_linha'].to_numpy()].reset_index(drop=True)
+            bloco = pd.DataFrame({
+                processo_apf: apf[processo_apf],
+                "Ano_APF": apf['Ano_APF'],
+                "nomeTarefa": acao['nomeTarefa'],
+                "Ano_ACAO": acao['Ano_ACAO'],
+                processo_acao: acao[processo_acao],
+                # Em ambos os papéis o nome do polo é a parte do APF que casou
+                "Nome do Polo": pares['nome'],
+                classe_apf: apf[classe_apf],
+                classe_acao: acao[classe_acao],
+                "assuntoPrincipal": acao['assuntoPrincipal'],
+                "_tipo": pares['_tipo'],
+                "_ordem": pares['_ordem'],
+                "_linha": pares['_linha'] + deslocamento,
+            })
+            if modo == 'fuzzy':
+                bloco['Nome na Ação Penal'] = pares['nome_b']
+                bloco['Similaridade'] = pares['Similaridade']
+            blocos_correspondencias.append(bloco)
+        progresso.avancar(len(df2))
+    progresso.concluir()
+
+    with progresso.etapa('comparacao'):
+        # Mesma ordem das duas junções originais: primeiro Polo Passivo, depois
+        # poloAtivo; dentro de cada uma, na ordem do APF e da Ação Penal
+        correspondencias = (pd.concat(blocos_correspondencias, ignore_index=True)
+                            .sort_values(['_tipo', '_ordem', '_linha'], kind='stable')
+                            .drop(columns=['_tipo', '_ordem', '_linha'])
+                            .reset_index(drop=True))
+
+        # Verificar se o "Nome do Polo" aparece apenas uma vez entre as correspondências
+        unico = correspondencias.groupby('Nome do Polo')['Nome do Polo'].transform('size') == 1
+        correspondencias.insert(correspondencias.columns.get_loc('assuntoPrincipal') + 1,
+                                'PoloPassivo_Unico', unico)
+
+        # Identificar os processos do APF que NÃO tiveram nenhum match válido
+        processos_validos = df1.loc[encontrado, processo_apf].unique()
+        nao_encontrados = df1[df1[processo_apf].notna() &
+                              ~df1[processo_apf].isin(processos_validos)].copy()
     
     # Criar o arquivo de saída com duas sheets: Correspondências e Não Encontrados
-    with pd.ExcelWriter(saida) as writer:
-        correspondencias.to_excel(writer, index=False, sheet_name='Correspondências')
-        nao_encontrados.to_excel(writer, index=False, sheet_name='Não Encontrados')
+    with progresso.etapa('gravacao'):
+        exportar_excel({'Correspondências': correspondencias, 'Não Encontrados': nao_encontrados}, saida)
     
     print(f'Resultado salvo em {saida}')
+    progresso.finalizar(linhas_apf=len(df1), linhas_acao_penal=linhas_acao,
+                        correspondencias=len(correspondencias), nao_encontrados=len(nao_encontrados))
 
 # --- Parâmetros e Execução ---
 arquivo1 = "(CR) Processos arquivados.csv"   # Arquivo APF
@@ -127,9 +179,11 @@ coluna_processo2 = "numeroProcesso"
 coluna_classe1 = "classeJudicial"
 coluna_classe2 = "classeJudicial"
 saida = "Comparacao_Resultados.xlsx"
+modo = "exato"                                # "exato" ou "fuzzy" (nomes parecidos)
+chunksize = None                              # ex.: 500_000 para ler a Ação Penal em blocos
 
 comparar_arquivos_csv_dupla(arquivo1, arquivo2, 
                            coluna_comparacao, 
                            coluna_processo1, coluna_processo2, 
                            coluna_classe1, coluna_classe2, 
-                           saida)
+                           saida, modo=modo, chunksize=chunksize)
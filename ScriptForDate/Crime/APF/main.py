@@ -1,61 +1,118 @@
+import os
+import sys
+import numpy as np
 import pandas as pd
-import re
 
-def extrair_ano_processo(numero_processo):
-    """Extrai o ano do processo a partir do número do processo usando regex."""
-    match_ano = re.search(r'\d{7}-\d{2}\.(\d{4})\.', str(numero_processo))
-    return int(match_ano.group(1)) if match_ano else None
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', '..')))
+from comum.cnj import ano_cnj
+from comum.exportacao import exportar_excel
+from comum.fuzzy import parear_nomes_fuzzy, preparar_lado
+from comum.leitura import ler_csv_com_cache
+from comum.polos import explodir_polos, normalizar_nomes
 
-def comparar_arquivos_csv(arquivo1, arquivo2, coluna_comparacao, coluna_processo1, coluna_processo2, coluna_classe1, coluna_classe2, saida):
-    # Carregar os arquivos CSV
-    df1 = pd.read_csv(arquivo1, sep=';', encoding='utf-8')
-    df2 = pd.read_csv(arquivo2, sep=',', encoding='utf-8')
+def ler_csv(arquivo, sep, colunas, chunksize=None):
+    """
+    Lê só as colunas necessárias; com chunksize, devolve um iterador de blocos.
+    Sem chunksize, a leitura vem do cache de comum.leitura se o arquivo não mudou.
+    """
+    if chunksize:
+        return pd.read_csv(arquivo, sep=sep, encoding='utf-8', usecols=colunas, chunksize=chunksize)
+    df, _ = ler_csv_com_cache(arquivo, colunas=colunas, dtype=None, encoding='utf-8', delimitador=sep,
+                              padronizar=False)
+    return iter([df])
+
+def comparar_arquivos_csv(arquivo1, arquivo2, coluna_comparacao, coluna_processo1, coluna_processo2, coluna_classe1, coluna_classe2, saida,
+                          modo='exato', limite_similaridade=85, chunksize=None):
+    """
+    modo='exato' compara os nomes normalizados; modo='fuzzy' aceita nomes parecidos
+    (pontuação >= limite_similaridade) e acrescenta as colunas "Nome na Ação Penal"
+    e "Similaridade" para revisão.
+
+    Com chunksize, o arquivo da Ação Penal é lido em blocos desse número de linhas
+    e só as correspondências ficam em memória.
+    """
+    if modo not in ('exato', 'fuzzy'):
+        raise ValueError("O modo deve ser 'exato' ou 'fuzzy'")
+    processo_apf = f"{coluna_processo1}_APF"
+    processo_acao = f"{coluna_processo2}_AÇÂO"
+    classe_acao = f"{coluna_classe2}_AÇÂO"
+
+    # Carregar o APF, só com as colunas necessárias para a saída
+    df1 = next(ler_csv(arquivo1, ';', [coluna_processo1, coluna_classe1, coluna_comparacao]))
     
     # Normalizar os valores para garantir comparações corretas
-    df1[coluna_comparacao] = df1[coluna_comparacao].str.strip().str.upper()
-    df2[coluna_comparacao] = df2[coluna_comparacao].str.strip().str.upper()
+    df1[coluna_comparacao] = normalizar_nomes(df1[coluna_comparacao])
     
     # Renomear colunas para diferenciação
-    df1 = df1.rename(columns={coluna_processo1: f"{coluna_processo1}_APF", coluna_classe1: f"{coluna_classe1}_APF"})
-    df2 = df2.rename(columns={coluna_processo2: f"{coluna_processo2}_AÇÂO", coluna_classe2: f"{coluna_classe2}_AÇÂO"})
+    df1 = df1.rename(columns={coluna_processo1: processo_apf, coluna_classe1: f"{coluna_classe1}_APF"})
+    df1 = df1[[processo_apf, f"{coluna_classe1}_APF", coluna_comparacao]]
     
-    # Selecionar apenas as colunas necessárias para a saída
-    colunas_necessarias1 = [f"{coluna_processo1}_APF", f"{coluna_classe1}_APF", coluna_comparacao]
-    colunas_necessarias2 = [f"{coluna_processo2}_AÇÂO", f"{coluna_classe2}_AÇÂO", coluna_comparacao, "assuntoPrincipal", "nomeTarefa", "poloAtivo"]
-    df1 = df1[colunas_necessarias1]
-    df2 = df2[colunas_necessarias2]
+    # Adicionar coluna de ano extraído do processo
+    df1['Ano_APF'] = ano_cnj(df1[processo_apf])
     
-    # Adicionar coluna de ano extraído para ambos os processos
-    df1['Ano_APF'] = df1[f"{coluna_processo1}_APF"].apply(extrair_ano_processo)
-    df2['Ano_AÇÂO'] = df2[f"{coluna_processo2}_AÇÂO"].apply(extrair_ano_processo)
+    # Índice de nomes do APF, montado uma vez só: as células com várias partes
+    # (ex.: "FULANO E OUTROS; CICLANO") são separadas em um nome por linha
+    partes1 = explodir_polos(df1[coluna_comparacao], normalizado=True)
+    lado_apf = None
+    if modo == 'fuzzy':
+        lado_apf = preparar_lado(partes1, df1['Ano_APF'].to_numpy(dtype=float, na_value=float('nan')), 'min')
     
-    # Mesclar os dados com base na coluna de comparação
-    correspondencias = pd.merge(df1, df2, on=coluna_comparacao, how='inner')
+    # Linhas do APF com algum nome na Ação Penal
+    com_parte = np.zeros(len(df1), dtype=bool)
+    blocos = []
     
-    # Filtrar os casos onde o ano da AÇÃO é superior ao ano do APF
-    correspondencias = correspondencias[correspondencias['Ano_AÇÂO'] > correspondencias['Ano_APF']]
+    colunas_acao = [coluna_processo2, coluna_classe2, coluna_comparacao, "assuntoPrincipal", "nomeTarefa", "poloAtivo"]
+    for df2 in ler_csv(arquivo2, ',', colunas_acao, chunksize):
+        df2[coluna_comparacao] = normalizar_nomes(df2[coluna_comparacao])
+        df2 = df2.rename(columns={coluna_processo2: processo_acao, coluna_classe2: classe_acao})
+        df2['Ano_AÇÂO'] = ano_cnj(df2[processo_acao])
+        
+        # Mesclar pela chave de cada nome, levando apenas as posições das linhas
+        partes2 = explodir_polos(df2[coluna_comparacao], normalizado=True)
+        if modo == 'fuzzy':
+            pares = parear_nomes_fuzzy(
+                None, partes2, limite=limite_similaridade,
+                anos_b=df2['Ano_AÇÂO'].to_numpy(dtype=float, na_value=float('nan')), lado_a=lado_apf
+            ).rename(columns={'linha_a': 'linha_APF', 'linha_b': 'linha_AÇÂO', 'nome_a': 'nome'})
+        else:
+            pares = partes1.merge(partes2[['chave', 'linha']], on='chave', how='inner', suffixes=('_APF', '_AÇÂO'))
+        com_parte[pares['linha_APF'].to_numpy()] = True
+        
+        correspondencias = pd.concat([
+            df1.iloc[pares['linha_APF'].to_numpy()].drop(columns=coluna_comparacao).reset_index(drop=True),
+            df2.iloc[pares['linha_AÇÂO'].to_numpy()].drop(columns=coluna_comparacao).reset_index(drop=True),
+            pares['nome'].rename(coluna_comparacao),
+            *([pares['nome_b'].rename('Nome na Ação Penal'), pares['Similaridade']] if modo == 'fuzzy' else []),
+        ], axis=1)
+        
+        # Filtrar os casos onde o ano da AÇÃO é superior ao ano do APF
+        correspondencias = correspondencias[(correspondencias['Ano_AÇÂO'] > correspondencias['Ano_APF']).fillna(False)]
+        
+        # Remover registros onde classeJudicial_AÇÂO é 'AuPrFl'
+        blocos.append(correspondencias[correspondencias[classe_acao] != "AuPrFl"])
     
-    # Remover registros onde classeJudicial_AÇÂO é 'AuPrFl'
-    correspondencias = correspondencias[correspondencias[f"{coluna_classe2}_AÇÂO"] != "AuPrFl"]
+    correspondencias = pd.concat(blocos, ignore_index=True)
     
     # Criar uma nova coluna indicando se o Polo Passivo aparece apenas uma vez
-    ocorrencias_polo = correspondencias[coluna_comparacao].value_counts()
-    correspondencias['PoloPassivo_Unico'] = correspondencias[coluna_comparacao].map(lambda x: ocorrencias_polo[x] == 1)
+    correspondencias['PoloPassivo_Unico'] = (
+        correspondencias.groupby(coluna_comparacao)[coluna_comparacao].transform('size') == 1
+    )
     
     # Reorganizar as colunas na ordem desejada
     colunas_ordenadas = [
-        f"{coluna_processo1}_APF", "Ano_APF", "nomeTarefa", "Ano_AÇÂO", f"{coluna_processo2}_AÇÂO", 
-        coluna_comparacao, f"{coluna_classe1}_APF", f"{coluna_classe2}_AÇÂO", "assuntoPrincipal", "poloAtivo", "PoloPassivo_Unico"
+        processo_apf, "Ano_APF", "nomeTarefa", "Ano_AÇÂO", processo_acao, 
+        coluna_comparacao, f"{coluna_classe1}_APF", classe_acao, "assuntoPrincipal", "poloAtivo", "PoloPassivo_Unico"
     ]
+    if modo == 'fuzzy':
+        colunas_ordenadas += ["Nome na Ação Penal", "Similaridade"]
     correspondencias = correspondencias[colunas_ordenadas]
     
-    # Encontrar os registros que estão apenas no primeiro arquivo
-    nao_encontrados = df1[~df1[coluna_comparacao].isin(df2[coluna_comparacao])]
+    # Encontrar os registros que estão apenas no primeiro arquivo (nenhuma parte do polo na Ação Penal;
+    # no modo 'fuzzy', nenhum nome parecido em processo de ano igual ou posterior)
+    nao_encontrados = df1[~com_parte]
     
     # Criar o arquivo de saída
-    with pd.ExcelWriter(saida) as writer:
-        correspondencias.to_excel(writer, index=False, sheet_name='Correspondências')
-        nao_encontrados.to_excel(writer, index=False, sheet_name='Não Encontrados')
+    exportar_excel({'Correspondências': correspondencias, 'Não Encontrados': nao_encontrados}, saida)
     
     print(f'Resultado salvo em {saida}')
 
@@ -68,6 +125,8 @@ coluna_processo2 = "numeroProcesso"
 coluna_classe1 = "classeJudicial"
 coluna_classe2 = "classeJudicial"
 saida = "Comparacao_Resultados.xlsx"
+modo = "exato"  # "exato" ou "fuzzy" (nomes parecidos)
+chunksize = None  # ex.: 500_000 para ler a Ação Penal em blocos
 
 
-comparar_arquivos_csv(arquivo1, arquivo2, coluna_comparacao, coluna_processo1, coluna_processo2, coluna_classe1, coluna_classe2, saida)
+comparar_arquivos_csv(arquivo1, arquivo2, coluna_comparacao, coluna_processo1, coluna_processo2, coluna_classe1, coluna_classe2, saida, modo=modo, chunksize=chunksize)
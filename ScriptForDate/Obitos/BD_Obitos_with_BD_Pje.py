@@ -1,13 +1,32 @@
 "Verificação BD Obitos com todos os dados Pje"
 
+import os
+import sys
+
+import numpy as np
 import pandas as pd
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.cache_dados import carregar_com_cache, ler_tabela_com_cache, tabela_para_dataframe
+from comum.exportacao import exportar_csv
+from comum.polos import chave_nome, explodir_colunas, normalizar_nomes
+from comum.progresso import Progresso
+
+# Versão da leitura em cache; incremente se as colunas ou tipos lidos mudarem
+VERSAO_LEITURA = 1
+
+def eh_parquet(caminho):
+    """True para um arquivo .parquet ou uma pasta de dataset Parquet (ex.: a saída do mergeProcessFile.py)."""
+    return os.path.isdir(caminho) or caminho.lower().endswith('.parquet')
+
 def comparar_nomes_e_salvar_com_processos(arquivo_obitos_path, arquivo_polos_path, output_csv_path, 
                                           coluna_obitos='NOME', colunas_polos=('poloAtivo', 'poloPassivo'), 
                                           coluna_processo='numeroProcesso', 
                                           coluna_orgao_julgador='orgaoJulgador',
                                           chunksize=10**6):
 
+    progresso = Progresso('BD_Obitos_with_BD_Pje')
+
     # Defina a codificação correta com base na codificação real dos arquivos
     encoding = 'utf-8'  # ou 'latin1', dependendo da codificação do seu arquivo
 
@@ -23,61 +42,116 @@ def comparar_nomes_e_salvar_com_processos(arquivo_obitos_path, arquivo_polos_pat
         else:
             raise ValueError("O arquivo deve ser no formato .csv ou .xlsx")
 
-    # Carrega os dados de óbitos
-    obitos_info = carregar_arquivo(arquivo_obitos_path, usecols=['NOME', 'CPF', 'DT_NASCIMENTO', 'PAI', 'MAE'], dtype=dtype_obitos)
-
-    # Converte a coluna de nomes para um set para facilitar a busca
-    nomes_obitos = set(obitos_info['NOME'].dropna().tolist())
+    # Carrega os dados de óbitos (reaproveitando o cache quando o arquivo não mudou)
+    colunas_obitos = ['NOME', 'CPF', 'DT_NASCIMENTO', 'PAI', 'MAE']
+    with progresso.etapa('leitura'):
+        obitos_info = carregar_com_cache(
+            arquivo_obitos_path,
+            lambda caminho: carregar_arquivo(caminho, usecols=colunas_obitos, dtype=dtype_obitos),
+            versao=VERSAO_LEITURA,
+            parametros={'usecols': colunas_obitos, 'encoding': encoding}
+        )
+
+    # Indexa os óbitos pela chave uint64 do nome normalizado; as partes dos polos
+    # são buscadas por essa chave, sem comparar textos
+    obitos_info = obitos_info[obitos_info['NOME'].notna()].reset_index(drop=True)
+    obitos_info['_chave'] = chave_nome(normalizar_nomes(obitos_info['NOME']))
+    chaves_obitos = pd.Index(obitos_info['_chave'].unique())
 
     # Inicializa lista para armazenar os resultados
     resultados = []
 
     # Processa a segunda planilha para comparar com os nomes de óbitos
-    if arquivo_polos_path.lower().endswith('.csv'):
-        reader = pd.read_csv(arquivo_polos_path, usecols=[*colunas_polos, coluna_processo, coluna_orgao_julgador], 
-                             chunksize=chunksize, encoding=encoding ,sep=',' )
-    elif arquivo_polos_path.lower().endswith('.xlsx'):
-        reader = pd.read_excel(arquivo_polos_path, usecols=[*colunas_polos, coluna_processo, coluna_orgao_julgador], 
-                               chunksize=chunksize)
-    else:
-        raise ValueError("O arquivo deve ser no formato .csv ou .xlsx")
-
-    for chunk in reader:
-        # Adiciona as colunas "poloAtivoObito" e "poloPassivoObito" verificando se o nome está nos óbitos
-        chunk['poloAtivoObito'] = chunk[colunas_polos[0]].apply(lambda nome: nome if nome in nomes_obitos else None)
-        chunk['poloPassivoObito'] = chunk[colunas_polos[1]].apply(lambda nome: nome if nome in nomes_obitos else None)
-
-        # Filtra somente as linhas que têm correspondência com óbitos em "poloAtivoObito" ou "poloPassivoObito"
-        chunk_resultado = chunk[['numeroProcesso', 'poloAtivoObito', 'poloPassivoObito', coluna_orgao_julgador]].dropna(how='all', subset=['poloAtivoObito', 'poloPassivoObito'])
-
-        if not chunk_resultado.empty:
-            # Cria a coluna "POLO" com base em qual polo (ativo ou passivo) o nome foi encontrado
-            chunk_resultado['POLO'] = chunk_resultado.apply(lambda row: 'ATIVO' if pd.notnull(row['poloAtivoObito']) else 'PASSIVO', axis=1)
+    colunas_leitura = [*colunas_polos, coluna_processo, coluna_orgao_julgador]
 
-            # Verifica em qual coluna (polo ativo ou passivo) o nome corresponde ao óbito e faz o merge com as informações adicionais
-            chunk_resultado['NOME_Obito'] = chunk_resultado['poloAtivoObito'].combine_first(chunk_resultado['poloPassivoObito'])
-
-            # Faz o merge com as informações adicionais da tabela de óbitos
-            chunk_resultado = pd.merge(chunk_resultado, obitos_info, left_on='NOME_Obito', right_on='NOME', how='left')
-
-            # Seleciona as colunas que serão salvas (número do processo, órgão julgador, CPF, DT_NASCIMENTO, PAI, MAE e POLO)
-            chunk_resultado_final = chunk_resultado[['numeroProcesso', coluna_orgao_julgador, 'NOME_Obito', 'CPF', 'DT_NASCIMENTO', 'PAI', 'MAE', 'POLO']]
-
-            # Renomeia as colunas para manter o padrão correto
-            chunk_resultado_final.columns = ['numeroProcesso', 'orgaoJulgador', 'NOME_Obito', 'CPF', 'DT_NASCIMENTO', 'PAI', 'MAE', 'POLO']
+    def ler_polos_em_chunks(caminho):
+        if caminho.lower().endswith('.csv'):
+            return pd.read_csv(caminho, usecols=colunas_leitura, chunksize=chunksize,
+                               encoding=encoding, sep=',', dtype=str)
+        elif caminho.lower().endswith('.xlsx'):
+            return iter([pd.read_excel(caminho, usecols=colunas_leitura, dtype=str)])
+        else:
+            raise ValueError("O arquivo deve ser no formato .csv ou .xlsx")
 
-            # Adiciona os resultados do chunk processado à lista
-            resultados.append(chunk_resultado_final)
+    if eh_parquet(arquivo_polos_path):
+        # O Parquet já é colunar: só as colunas usadas são lidas, em lotes, sem passar pelo cache
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+        dataset_polos = ds.dataset(arquivo_polos_path, format='parquet', partitioning='hive')
+        total_polos = dataset_polos.count_rows()
+        reader = (tabela_para_dataframe(pa.Table.from_batches([lote]))
+                  for lote in dataset_polos.to_batches(columns=colunas_leitura, batch_size=chunksize)
+                  if lote.num_rows)
+    else:
+        # A cópia em cache é lida por memory-map, em lotes do mesmo tamanho dos chunks
+        with progresso.etapa('leitura'):
+            tabela_polos = ler_tabela_com_cache(
+                arquivo_polos_path,
+                ler_polos_em_chunks,
+                versao=VERSAO_LEITURA,
+                parametros={'usecols': colunas_leitura, 'encoding': encoding}
+            )
+        if tabela_polos is not None:
+            total_polos = tabela_polos.num_rows
+            reader = (lote.to_pandas() for lote in tabela_polos.to_batches(max_chunksize=chunksize))
+        else:
+            total_polos = None
+            reader = ler_polos_em_chunks(arquivo_polos_path)
+
+    progresso.iniciar(total_polos, "Comparando polos")
+    reader = iter(reader)
+    while True:
+        with progresso.etapa('leitura'):
+            chunk = next(reader, None)
+        if chunk is None:
+            break
+
+        with progresso.etapa('comparacao'):
+            # Separa as células de polo em partes (ex.: "FULANO E OUTROS; CICLANO") e
+            # mantém só as partes cujo nome está na base de óbitos
+            partes = explodir_colunas(chunk, colunas_polos)
+            partes = partes[chaves_obitos.get_indexer(partes['chave']) >= 0]
+
+            if not partes.empty:
+                # Cria a coluna "POLO" com base em qual polo (ativo ou passivo) o nome foi encontrado
+                partes['POLO'] = np.where(partes['papel'] == 0, 'ATIVO', 'PASSIVO')
+                partes = partes.sort_values(['linha', 'papel'], kind='stable')
+
+                # Junta cada parte encontrada com as informações da tabela de óbitos
+                chunk_resultado = partes.merge(obitos_info, left_on='chave', right_on='_chave', how='inner')
+                linhas = chunk_resultado['linha'].to_numpy()
+
+                # Seleciona as colunas que serão salvas (número do processo, órgão julgador, CPF, DT_NASCIMENTO, PAI, MAE e POLO)
+                chunk_resultado_final = pd.DataFrame({
+                    'numeroProcesso': chunk[coluna_processo].to_numpy()[linhas],
+                    'orgaoJulgador': chunk[coluna_orgao_julgador].to_numpy()[linhas],
+                    'NOME_Obito': chunk_resultado['NOME'].to_numpy(),
+                    'CPF': chunk_resultado['CPF'].to_numpy(),
+                    'DT_NASCIMENTO': chunk_resultado['DT_NASCIMENTO'].to_numpy(),
+                    'PAI': chunk_resultado['PAI'].to_numpy(),
+                    'MAE': chunk_resultado['MAE'].to_numpy(),
+                    'POLO': chunk_resultado['POLO'].to_numpy(),
+                })
+
+                # Adiciona os resultados do chunk processado à lista
+                resultados.append(chunk_resultado_final)
+
+        progresso.avancar(len(chunk))
+    progresso.concluir()
 
     # Concatena todos os chunks processados
     if resultados:
         df_resultado = pd.concat(resultados)
 
         # Salva o resultado em um novo arquivo CSV com a codificação correta
-        df_resultado.to_csv(output_csv_path, index=False, encoding='utf-8')
+        with progresso.etapa('gravacao'):
+            exportar_csv(df_resultado, output_csv_path)
         print(f"Resultado com os números de processo e dados adicionais salvo em '{output_csv_path}' com sucesso!")
     else:
         print("Nenhum resultado encontrado para salvar.")
 
+    progresso.finalizar(obitos=len(obitos_info), resultados=sum(len(r) for r in resultados))
+
 # Uso da função
-comparar_nomes_e_salvar_com_processos('./docs/Obitos_10anos_scc.csv', './docs/merged_processos.csv', 'Possiveis_Obitos_Processos.csv')
+if __name__ == "__main__":
+    comparar_nomes_e_salvar_com_processos('./docs/Obitos_10anos_scc.csv', './docs/merged_processos', 'Possiveis_Obitos_Processos.csv')
@@ -0,0 +1,288 @@
+"""
+Benchmark sintético da vinculação óbitos x partes do PJe.
+
+Gera bases de óbitos e de partes com gabarito conhecido (nomes brasileiros,
+ruído de acentuação e digitação, CPFs ausentes, genitores trocados e datas em
+formatos variados), executa os pipelines de compareDate.py e
+BD_Obitos_with_BD_Pje.py e informa, para cada configuração, linhas/s, pico de
+memória (RSS), precisão e revocação.
+
+Uso:
+    python benchmarkLinkage.py --escalas 1000x10000,10000x100000 --saida benchmark.json
+"""
+import argparse
+import contextlib
+import json
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+PASTA_SCRIPT = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, os.path.abspath(os.path.join(PASTA_SCRIPT, '..')))
+from comum.progresso import executar_em_processo, pico_memoria_mb
+
+NOMES_MASCULINOS = [
+    "JOSÉ", "JOÃO", "ANTÔNIO", "FRANCISCO", "CARLOS", "PAULO", "PEDRO", "LUCAS", "LUIZ", "MARCOS",
+    "LUÍS", "GABRIEL", "RAFAEL", "DANIEL", "MARCELO", "BRUNO", "EDUARDO", "FELIPE", "RAIMUNDO", "RODRIGO",
+    "MANOEL", "SEBASTIÃO", "VALDIR", "JOSUÉ", "CLÁUDIO", "FÁBIO", "MÁRCIO", "GILSON", "EDVALDO", "ANDRÉ",
+]
+NOMES_FEMININOS = [
+    "MARIA", "ANA", "FRANCISCA", "ANTÔNIA", "ADRIANA", "JULIANA", "MÁRCIA", "FERNANDA", "PATRÍCIA", "ALINE",
+    "SANDRA", "CAMILA", "AMANDA", "BRUNA", "JÉSSICA", "LETÍCIA", "JÚLIA", "LUCIANA", "VANESSA", "MARIANA",
+    "CONCEIÇÃO", "LÚCIA", "TEREZINHA", "JOSEFA", "RITA", "CLÁUDIA", "VERÔNICA", "GLÓRIA", "INÊS", "CÉLIA",
+]
+SOBRENOMES = [
+    "SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "RODRIGUES", "FERREIRA", "ALVES", "PEREIRA", "LIMA", "GOMES",
+    "COSTA", "RIBEIRO", "MARTINS", "CARVALHO", "ALMEIDA", "LOPES", "SOARES", "FERNANDES", "VIEIRA", "BARBOSA",
+    "ROCHA", "DIAS", "NASCIMENTO", "ANDRADE", "MOREIRA", "NUNES", "MARQUES", "MACHADO", "MENDES", "FREITAS",
+    "CONCEIÇÃO", "JESUS", "ARAÚJO", "BATISTA", "ASSUNÇÃO", "BRANDÃO", "CONCEIÇÃO", "GONÇALVES", "SIMÕES", "ROMÃO",
+]
+PARTICULAS = ["DE", "DA", "DOS", "DAS", "DO"]
+
+MAPA_SEM_ACENTO = str.maketrans("ÁÀÂÃÉÊÍÓÔÕÚÇ", "AAAAEEIOOOUC")
+
+
+def _nomes_aleatorios(rng, n, primeiros):
+    """Gera `n` nomes completos combinando prenome, partícula e um ou dois sobrenomes."""
+    prenome = rng.choice(primeiros, n)
+    sobrenome1 = rng.choice(SOBRENOMES, n)
+    sobrenome2 = rng.choice(SOBRENOMES, n)
+    particula = rng.choice(PARTICULAS, n)
+    com_particula = rng.random(n) < 0.4
+    dois_sobrenomes = rng.random(n) < 0.6
+
+    nomes = pd.Series(prenome)
+    nomes = nomes.where(~com_particula, nomes + " " + particula)
+    nomes = nomes + " " + sobrenome1
+    nomes = nomes.where(~dois_sobrenomes, nomes + " " + sobrenome2)
+    return nomes
+
+
+def _cpfs_aleatorios(rng, n):
+    return pd.Series(rng.integers(10**10, 10**11 - 1, n, dtype=np.int64)).astype(str).str.zfill(11)
+
+
+def _formatar_cpf(cpfs):
+    return cpfs.str[:3] + "." + cpfs.str[3:6] + "." + cpfs.str[6:9] + "-" + cpfs.str[9:]
+
+
+def _datas_aleatorias(rng, n):
+    inicio = np.datetime64("1930-01-01")
+    dias = rng.integers(0, 365 * 70, n)
+    return pd.Series(inicio + dias.astype("timedelta64[D]"))
+
+
+def _inserir_erro_digitacao(nome, rng):
+    """Troca, apaga ou duplica um caractere aleatório do nome."""
+    if len(nome) < 4:
+        return nome
+    pos = int(rng.integers(1, len(nome) - 1))
+    operacao = rng.integers(0, 3)
+    if operacao == 0:
+        return nome[:pos] + nome[pos + 1] + nome[pos] + nome[pos + 2:]
+    if operacao == 1:
+        return nome[:pos] + nome[pos + 1:]
+    return nome[:pos] + nome[pos] + nome[pos:]
+
+
+def gerar_dados(n_obitos, n_partes, taxa_falecidos=0.05, semente=42,
+                prob_sem_acento=0.5, prob_erro=0.1, prob_sem_cpf=0.4,
+                prob_genitores_trocados=0.05, prob_data_alternativa=0.1):
+    """
+    Gera (obitos, partes, gabarito). O gabarito é o conjunto de numeroProcesso
+    cujas partes correspondem, de fato, a um registro de óbito.
+    """
+    rng = np.random.default_rng(semente)
+
+    sexo_masculino = rng.random(n_obitos) < 0.5
+    nomes = _nomes_aleatorios(rng, n_obitos, NOMES_MASCULINOS).where(
+        sexo_masculino, _nomes_aleatorios(rng, n_obitos, NOMES_FEMININOS))
+    nascimento = _datas_aleatorias(rng, n_obitos)
+    obitos = pd.DataFrame({
+        "CPF": _formatar_cpf(_cpfs_aleatorios(rng, n_obitos)).where(rng.random(n_obitos) < 0.7),
+        "NOME": nomes,
+        "DT_NASCIMENTO": nascimento.dt.strftime("%d/%m/%Y"),
+        "PAI": _nomes_aleatorios(rng, n_obitos, NOMES_MASCULINOS),
+        "MAE": _nomes_aleatorios(rng, n_obitos, NOMES_FEMININOS),
+    })
+    obitos["NOME_Obito"] = obitos["NOME"]
+
+    # Partes falecidas: cópias com ruído de registros de óbito
+    n_falecidos = min(int(n_partes * taxa_falecidos), n_obitos)
+    origem = rng.choice(n_obitos, n_falecidos, replace=False)
+    falecidos = obitos.iloc[origem].reset_index(drop=True)
+    nome_civil = falecidos["NOME"].copy()
+    genitor = falecidos["PAI"].copy()
+    genitora = falecidos["MAE"].copy()
+
+    sem_acento = rng.random(n_falecidos) < prob_sem_acento
+    nome_civil[sem_acento] = nome_civil[sem_acento].str.translate(MAPA_SEM_ACENTO)
+    com_erro = np.flatnonzero(rng.random(n_falecidos) < prob_erro)
+    for i in com_erro:
+        nome_civil.iat[i] = _inserir_erro_digitacao(nome_civil.iat[i], rng)
+    trocados = rng.random(n_falecidos) < prob_genitores_trocados
+    genitor[trocados], genitora[trocados] = falecidos.loc[trocados, "MAE"], falecidos.loc[trocados, "PAI"]
+
+    data_nascimento = pd.to_datetime(falecidos["DT_NASCIMENTO"], format="%d/%m/%Y")
+    data_texto = data_nascimento.dt.strftime("%d/%m/%Y")
+    alternativa = rng.random(n_falecidos) < prob_data_alternativa
+    data_texto[alternativa] = data_nascimento[alternativa].dt.strftime("%Y-%m-%d")
+
+    cpf_falecidos = falecidos["CPF"].where(rng.random(n_falecidos) >= prob_sem_cpf)
+
+    # Partes vivas: pessoas novas, sem correspondência nos óbitos
+    n_vivos = n_partes - n_falecidos
+    vivos_masculinos = rng.random(n_vivos) < 0.5
+    partes_vivas = pd.DataFrame({
+        "CPF": _cpfs_aleatorios(rng, n_vivos).where(rng.random(n_vivos) < 0.6),
+        "Nome Civil": _nomes_aleatorios(rng, n_vivos, NOMES_MASCULINOS).where(
+            vivos_masculinos, _nomes_aleatorios(rng, n_vivos, NOMES_FEMININOS)),
+        "Data de Nascimento": _datas_aleatorias(rng, n_vivos).dt.strftime("%d/%m/%Y"),
+        "Genitor": _nomes_aleatorios(rng, n_vivos, NOMES_MASCULINOS),
+        "Genitora": _nomes_aleatorios(rng, n_vivos, NOMES_FEMININOS),
+    })
+    partes_falecidas = pd.DataFrame({
+        "CPF": cpf_falecidos,
+        "Nome Civil": nome_civil,
+        "Data de Nascimento": data_texto,
+        "Genitor": genitor,
+        "Genitora": genitora,
+    })
+    partes = pd.concat([partes_falecidas, partes_vivas], ignore_index=True)
+    partes = partes.sample(frac=1, random_state=semente).reset_index()
+
+    sequencial = partes.index.to_series().astype(str).str.zfill(7)
+    partes.insert(0, "numeroProcesso", sequencial + "-00.2020.8.05.0216")
+    partes.insert(1, "Polo", np.where(rng.random(n_partes) < 0.5, "ATIVO", "PASSIVO"))
+    gabarito = set(partes.loc[partes["index"] < n_falecidos, "numeroProcesso"])
+    partes = partes.drop(columns="index")
+
+    return obitos, partes, gabarito
+
+
+def _precisao_revocacao(previstos, gabarito):
+    verdadeiros = len(previstos & gabarito)
+    precisao = verdadeiros / len(previstos) if previstos else 0.0
+    revocacao = verdadeiros / len(gabarito) if gabarito else 0.0
+    return precisao, revocacao
+
+
+def _gerar_arquivos(pasta, n_obitos, n_partes, semente):
+    """Gera a base sintética nos formatos de entrada dos dois pipelines e devolve o gabarito."""
+    obitos, partes, gabarito = gerar_dados(n_obitos, n_partes, semente=semente)
+    obitos.to_csv(os.path.join(pasta, "obitos.csv"), index=False, encoding="utf-8")
+    partes.to_csv(os.path.join(pasta, "partes_compareDate.csv"), index=False, encoding="utf-8")
+    pd.DataFrame({
+        "poloAtivo": "MINISTERIO PUBLICO DO ESTADO DA BAHIA",
+        "poloPassivo": partes["Nome Civil"],
+        "numeroProcesso": partes["numeroProcesso"],
+        "orgaoJulgador": "VARA CRIMINAL",
+    }).to_csv(os.path.join(pasta, "partes_BD_Obitos.csv"), index=False, encoding="utf-8")
+    return sorted(gabarito)
+
+
+def _executar_pipeline(pipeline, pasta):
+    """
+    Executa um pipeline sobre os arquivos já gerados. Roda em um processo separado,
+    sem os dados sintéticos em memória, para medir o pico de memória isolado.
+    """
+    os.environ["PJE_CACHE_DIR"] = os.path.join(pasta, f"cache_{pipeline}")
+    sys.path.insert(0, PASTA_SCRIPT)
+    # Os resumos de execução (*_resumo.json) ficam na pasta temporária
+    os.chdir(pasta)
+
+    caminho_obitos = os.path.join(pasta, "obitos.csv")
+    caminho_partes = os.path.join(pasta, f"partes_{pipeline}.csv")
+    caminho_saida = os.path.join(pasta, f"resultado_{pipeline}.csv")
+    if pipeline == "compareDate":
+        from compareDate import comparar_dados_e_salvar
+        executar = lambda: comparar_dados_e_salvar(caminho_obitos, caminho_partes, caminho_saida)
+    else:
+        from BD_Obitos_with_BD_Pje import comparar_nomes_e_salvar_com_processos
+        executar = lambda: comparar_nomes_e_salvar_com_processos(caminho_obitos, caminho_partes, caminho_saida)
+
+    # Pico depois das importações: a parte da memória que não é do pipeline
+    pico_inicial = pico_memoria_mb()
+    inicio = time.perf_counter()
+    with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+        executar()
+    duracao = time.perf_counter() - inicio
+    return {"segundos": duracao, "pico_memoria_mb": pico_memoria_mb(), "pico_inicial_mb": pico_inicial,
+            "saida": caminho_saida}
+
+
+def executar_benchmark(escalas, pipelines, semente=42):
+    resultados = []
+    for n_obitos, n_partes in escalas:
+        with tempfile.TemporaryDirectory(prefix="benchmark_linkage_") as pasta:
+            # Gerada em outro processo, para que o processo principal (copiado por cada medição) fique leve
+            gabarito, erro = executar_em_processo(_gerar_arquivos, pasta, n_obitos, n_partes, semente)
+            if erro:
+                print(f"Falha ao gerar {n_obitos} óbitos x {n_partes} partes: {erro}")
+                continue
+            gabarito = set(gabarito)
+            for pipeline in pipelines:
+                print(f"Executando {pipeline} com {n_obitos} óbitos x {n_partes} partes...")
+                resultado = {"pipeline": pipeline, "obitos": n_obitos, "partes": n_partes}
+                medicao, erro = executar_em_processo(_executar_pipeline, pipeline, pasta)
+                if erro:
+                    print(f"  FALHOU: {erro}")
+                    resultados.append({**resultado, "erro": erro})
+                    continue
+
+                previstos = set()
+                if os.path.exists(medicao["saida"]):
+                    previstos = set(pd.read_csv(medicao["saida"], usecols=["numeroProcesso"], dtype=str)["numeroProcesso"])
+                precisao, revocacao = _precisao_revocacao(previstos, gabarito)
+                duracao = medicao["segundos"]
+                resultado.update({
+                    "segundos": round(duracao, 3),
+                    "linhas_por_segundo": round(n_partes / duracao, 1) if duracao else None,
+                    "pico_memoria_mb": round(medicao["pico_memoria_mb"], 1),
+                    "pico_inicial_mb": round(medicao["pico_inicial_mb"], 1),
+                    "precisao": round(precisao, 4),
+                    "revocacao": round(revocacao, 4),
+                    "verdadeiros": len(gabarito),
+                    "previstos": len(previstos),
+                })
+                print(
+                    f"  {resultado['linhas_por_segundo']} linhas/s | pico {resultado['pico_memoria_mb']} MB "
+                    f"(após importações: {resultado['pico_inicial_mb']} MB) | "
+                    f"precisão {resultado['precisao']:.2%} | revocação {resultado['revocacao']:.2%}"
+                )
+                resultados.append(resultado)
+    return resultados
+
+
+def _ler_escalas(texto):
+    escalas = []
+    for item in texto.split(","):
+        n_obitos, n_partes = item.lower().split("x")
+        escalas.append((int(float(n_obitos)), int(float(n_partes))))
+    return escalas
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark sintético da vinculação óbitos x PJe.")
+    parser.add_argument("--escalas", default="200x2000",
+                        help="Lista de escalas no formato OBITOSxPARTES, separadas por vírgula (ex.: 100000x1000000).")
+    parser.add_argument("--pipelines", default="compareDate,BD_Obitos",
+                        help="Pipelines a executar: compareDate, BD_Obitos.")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--saida", default="benchmark_linkage.json", help="Arquivo JSON com os resultados.")
+    args = parser.parse_args()
+
+    resultados = executar_benchmark(_ler_escalas(args.escalas), args.pipelines.split(","), args.semente)
+
+    with open(args.saida, "w", encoding="utf-8") as f:
+        json.dump(resultados, f, indent=4, ensure_ascii=False)
+    print(f"\nResultados salvos em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -4,11 +4,32 @@ from rapidfuzz import fuzz, process
 from datetime import datetime
 import unicodedata
 import re
+import os
+import sys
+from contextlib import nullcontext
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.cache_dados import carregar_com_cache
+from comum.exportacao import exportar_csv
+from comum.progresso import Progresso
+
+# Versão da normalização aplicada na leitura; incremente sempre que
+# ler_e_normalizar mudar, para invalidar os arquivos em cache
+VERSAO_NORMALIZACAO = 1
+
+# Mensagens por registro só são exibidas com PJE_LOG_DETALHADO=1; com milhões de
+# linhas a escrita no console vira o gargalo
+LOG_DETALHADO = os.environ.get('PJE_LOG_DETALHADO') == '1'
 
 def log(message):
     """Função simples para exibir mensagens de log."""
     print(f"[LOG] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}")
 
+def log_registro(message):
+    """Log de um registro individual, exibido apenas no modo detalhado."""
+    if LOG_DETALHADO:
+        log(message)
+
 def detectar_encoding(file_path, sample_size=10000):
     """Detects the encoding of a file using chardet."""
     with open(file_path, 'rb') as f:
@@ -34,117 +55,134 @@ def normalizar_texto(texto):
     texto = texto.encode('ascii', 'ignore').decode('utf-8').upper()
     return re.sub(r'\s+', ' ', texto).strip()
 
-def comparar_dados_e_salvar(obitos_path_csv, csv_path, output_csv_path, 
-                            similarity_threshold=85,
-                            columns_to_compare=[('Nome Civil', 'NOME_Obito'), 
-                                                ('Data de Nascimento', 'DT_NASCIMENTO'), 
-                                                ('Genitor', 'PAI'), 
-                                                ('Genitora', 'MAE')],
-                            coluna_processo='numeroProcesso'):
-
-    log("Iniciando o processo de comparação de dados.")
-
-    # Detect encoding
-    encoding_obitos = detectar_encoding(obitos_path_csv)
-    encoding_csv = detectar_encoding(csv_path)
-
-    log("Lendo os arquivos CSV.")
-    obitos_info = pd.read_csv(obitos_path_csv, encoding=encoding_obitos, dtype={'CPF': str})
-    dados_partes = pd.read_csv(csv_path, encoding=encoding_csv, dtype={'CPF': str})
-
-    log("Normalizando os CPFs e os dados de texto.")
-    obitos_info['CPF'] = obitos_info['CPF'].str.replace(r'\D', '', regex=True)
-    dados_partes['CPF'] = dados_partes['CPF'].str.replace(r'\D', '', regex=True)
-
-    for parte_col, obito_col in columns_to_compare:
-        if parte_col in dados_partes.columns:
-            dados_partes[parte_col] = dados_partes[parte_col].apply(normalizar_texto)
-        if obito_col in obitos_info.columns:
-            obitos_info[obito_col] = obitos_info[obito_col].apply(normalizar_texto)
-
-    log("Iniciando a comparação dos registros.")
-    resultados = []
-    descartados = []
-
-    for index, parte_row in dados_partes.iterrows():
-        log(f"Processando registro {index + 1}/{len(dados_partes)}.")
-        cpf_parte = parte_row['CPF']
-        nome_civil = parte_row.get('Nome Civil', None)
-
-        match_cpf = None
-        if validar_cpf(cpf_parte):
-            match_cpf = obitos_info[obitos_info['CPF'] == cpf_parte]
-
-        if match_cpf is not None and not match_cpf.empty:
-            log(f"CPF igual encontrado para o registro {index + 1}. Registro adicionado sem verificações adicionais.")
-            resultado = {**parte_row.to_dict(), 'Encontrador_atraves': 'CPF'}
-            for _, obito_row in match_cpf.iterrows():
-                resultado.update({
-                    'PAI_obt': obito_row.get('PAI', None),
-                    'MAE_obt': obito_row.get('MAE', None),
-                    'DT_NASCIMENTO_obt': obito_row.get('DT_NASCIMENTO', None)
-                })
-            resultados.append(resultado)
-            continue
-
-        if validar_cpf(cpf_parte):
-            cpf_diferente = obitos_info[(obitos_info['CPF'] != cpf_parte) & (~obitos_info['CPF'].isna())]
-            if not cpf_diferente.empty:
-                log(f"CPF diferente encontrado para o registro {index + 1}. Registro descartado.")
-                descartados.append({**parte_row.to_dict(), 'Motivo': 'CPF diferente'})
-                continue
-
-        match_nome = None
-        if nome_civil:
-            for _, obito_row in obitos_info.iterrows():
-                nome_obito = obito_row.get('NOME_Obito', None)
-                if nome_obito and fuzz.ratio(nome_civil, nome_obito) >= similarity_threshold:
-                    match_nome = obito_row
-                    break
-
-        if match_nome is None:
-            log(f"Nome não congruente para o registro {index + 1}. Registro descartado.")
-            descartados.append({**parte_row.to_dict(), 'Motivo': 'Nome não congruente'})
-            continue
-
-        # Comparação dos campos secundários
-        campos_congruentes = []
-        campos_divergentes = []
-        resultado = {**parte_row.to_dict(), 'Encontrador_atraves': 'Dados Secundarios'}
-
-        for parte_col, obito_col in columns_to_compare[1:]:  # Ignora 'Nome Civil'
-            val_parte = parte_row.get(parte_col, None)
-            val_obito = match_nome.get(obito_col, None)
-
-            resultado[f"{obito_col}_obt"] = val_obito
-
-            if pd.notna(val_parte) and pd.notna(val_obito):
-                if parte_col == 'Data de Nascimento':
-                    try:
-                        data_parte = datetime.strptime(val_parte, '%d/%m/%Y')
-                        data_obito = datetime.strptime(val_obito, '%d/%m/%Y')
-                        if data_parte == data_obito:
-                            campos_congruentes.append(parte_col)
-                        else:
-                            campos_divergentes.append(parte_col)
-                    except ValueError:
-                        campos_divergentes.append(parte_col)
-                else:
-                    if fuzz.ratio(val_parte, val_obito) >= similarity_threshold:
+def ler_e_normalizar(caminho, colunas_texto, progresso=None):
+    """Lê o CSV, mantém apenas os dígitos do CPF e normaliza as colunas de texto."""
+    etapa = progresso.etapa if progresso else (lambda nome: nullcontext())
+    with etapa('leitura'):
+        encoding = detectar_encoding(caminho)
+        df = pd.read_csv(caminho, encoding=encoding, dtype={'CPF': str})
+    with etapa('normalizacao'):
+        df['CPF'] = df['CPF'].str.replace(r'\D', '', regex=True)
+        for coluna in colunas_texto:
+            if coluna in df.columns:
+                df[coluna] = df[coluna].apply(normalizar_texto)
+    return df
+
+def carregar_normalizado(caminho, colunas_texto, progresso=None):
+    """Retorna o CSV normalizado, reaproveitando o cache quando o arquivo não mudou."""
+    colunas_texto = list(colunas_texto)
+    return carregar_com_cache(
+        caminho,
+        lambda c: ler_e_normalizar(c, colunas_texto, progresso),
+        versao=VERSAO_NORMALIZACAO,
+        parametros={'colunas_texto': colunas_texto}
+    )
+
+def avaliar_parte(parte_row, obitos_info, columns_to_compare, similarity_threshold, numero, obitos_nome=None,
+                  obitos_cpf=None, base_tem_cpf=None):
+    """
+    Compara uma parte com a base de óbitos e retorna (tipo, registro), onde
+    tipo é 'resultado', 'descartado' ou None (nenhum campo para comparar).
+
+    As regras de CPF usam `obitos_info` inteiro; `obitos_nome` limita a busca
+    pelo nome a um subconjunto dos óbitos (padrão: todos). Quem não tem a base
+    inteira em memória informa `obitos_cpf` (todos os óbitos da base com o CPF
+    da parte) e `base_tem_cpf` (se algum óbito da base tem CPF preenchido).
+    """
+    tipo, registro, _ = avaliar_parte_com_origem(parte_row, obitos_info, columns_to_compare, similarity_threshold,
+                                                 numero, obitos_nome, obitos_cpf, base_tem_cpf)
+    return tipo, registro
+
+def avaliar_parte_com_origem(parte_row, obitos_info, columns_to_compare, similarity_threshold, numero, obitos_nome=None,
+                             obitos_cpf=None, base_tem_cpf=None):
+    """
+    Igual a avaliar_parte, mas retorna (tipo, registro, origem), onde origem são
+    os rótulos (índice) dos óbitos que decidiram o resultado: os de CPF igual ou o
+    primeiro de nome congruente; [] se nenhum nome foi congruente e None no
+    descarte por "CPF diferente", que depende de todos os CPFs da base.
+    """
+    cpf_parte = parte_row['CPF']
+    nome_civil = parte_row.get('Nome Civil', None)
+
+    match_cpf = None
+    if validar_cpf(cpf_parte):
+        base_cpf = obitos_info if obitos_cpf is None else obitos_cpf
+        match_cpf = base_cpf[base_cpf['CPF'] == cpf_parte]
+
+    if match_cpf is not None and not match_cpf.empty:
+        log_registro(f"CPF igual encontrado para o registro {numero}. Registro adicionado sem verificações adicionais.")
+        resultado = {**parte_row.to_dict(), 'Encontrador_atraves': 'CPF'}
+        for _, obito_row in match_cpf.iterrows():
+            resultado.update({
+                'PAI_obt': obito_row.get('PAI', None),
+                'MAE_obt': obito_row.get('MAE', None),
+                'DT_NASCIMENTO_obt': obito_row.get('DT_NASCIMENTO', None)
+            })
+        return 'resultado', resultado, match_cpf.index.tolist()
+
+    if validar_cpf(cpf_parte):
+        if base_tem_cpf is None:
+            cpf_diferente = not obitos_info[(obitos_info['CPF'] != cpf_parte) & (~obitos_info['CPF'].isna())].empty
+        else:
+            # Nenhum óbito tem o CPF da parte: qualquer CPF preenchido na base é diferente
+            cpf_diferente = base_tem_cpf
+        if cpf_diferente:
+            log_registro(f"CPF diferente encontrado para o registro {numero}. Registro descartado.")
+            return 'descartado', {**parte_row.to_dict(), 'Motivo': 'CPF diferente'}, None
+
+    match_nome = None
+    if pd.notna(nome_civil) and nome_civil:
+        for _, obito_row in (obitos_info if obitos_nome is None else obitos_nome).iterrows():
+            nome_obito = obito_row.get('NOME_Obito', None)
+            if pd.notna(nome_obito) and nome_obito and fuzz.ratio(nome_civil, nome_obito) >= similarity_threshold:
+                match_nome = obito_row
+                break
+
+    if match_nome is None:
+        log_registro(f"Nome não congruente para o registro {numero}. Registro descartado.")
+        return 'descartado', {**parte_row.to_dict(), 'Motivo': 'Nome não congruente'}, []
+
+    # Comparação dos campos secundários
+    campos_congruentes = []
+    campos_divergentes = []
+    resultado = {**parte_row.to_dict(), 'Encontrador_atraves': 'Dados Secundarios'}
+
+    for parte_col, obito_col in columns_to_compare[1:]:  # Ignora 'Nome Civil'
+        val_parte = parte_row.get(parte_col, None)
+        val_obito = match_nome.get(obito_col, None)
+
+        resultado[f"{obito_col}_obt"] = val_obito
+
+        if pd.notna(val_parte) and pd.notna(val_obito):
+            if parte_col == 'Data de Nascimento':
+                try:
+                    data_parte = datetime.strptime(val_parte, '%d/%m/%Y')
+                    data_obito = datetime.strptime(val_obito, '%d/%m/%Y')
+                    if data_parte == data_obito:
                         campos_congruentes.append(parte_col)
                     else:
                         campos_divergentes.append(parte_col)
+                except ValueError:
+                    campos_divergentes.append(parte_col)
+            else:
+                if fuzz.ratio(val_parte, val_obito) >= similarity_threshold:
+                    campos_congruentes.append(parte_col)
+                else:
+                    campos_divergentes.append(parte_col)
+
+    if campos_divergentes:
+        log_registro(f"Campos divergentes encontrados no registro {numero}: {', '.join(campos_divergentes)}.")
+        return 'descartado', {**parte_row.to_dict(), 'Motivo': f"Campos divergentes: {', '.join(campos_divergentes)}"}, [match_nome.name]
 
-        if campos_divergentes:
-            log(f"Campos divergentes encontrados no registro {index + 1}: {', '.join(campos_divergentes)}.")
-            descartados.append({**parte_row.to_dict(), 'Motivo': f"Campos divergentes: {', '.join(campos_divergentes)}"})
-            continue
+    if campos_congruentes:
+        log_registro(f"Adicionando registro {numero} com campos congruentes: {', '.join(campos_congruentes)}.")
+        resultado['Campos_Congruentes'] = ', '.join(campos_congruentes)
+        return 'resultado', resultado, [match_nome.name]
 
-        if campos_congruentes:
-            log(f"Adicionando registro {index + 1} com campos congruentes: {', '.join(campos_congruentes)}.")
-            resultado['Campos_Congruentes'] = ', '.join(campos_congruentes)
-            resultados.append(resultado)
+    return None, None, [match_nome.name]
 
+def salvar_resultados(resultados, descartados, output_csv_path):
+    """Remove os campos desnecessários e grava os resultados e os descartados em CSV."""
     log("Removendo campos desnecessários do resultado final.")
     campos_a_remover = ['Classe', 'Assunto', 'Área', 'Nome da Parte']
     for resultado in resultados:
@@ -160,16 +198,52 @@ def comparar_dados_e_salvar(obitos_path_csv, csv_path, output_csv_path,
             'Encontrador_atraves', 'Campos_Congruentes'
         ]
         final_df = final_df[colunas_ordenadas]
-        final_df.to_csv(output_csv_path, index=False, encoding='utf-8')
+        exportar_csv(final_df, output_csv_path)
         log(f"Resultados salvos em {output_csv_path}.")
     if descartados:
-        pd.DataFrame(descartados).to_csv(output_csv_path.replace('.csv', '_descartados.csv'), index=False, encoding='utf-8')
+        exportar_csv(pd.DataFrame(descartados), output_csv_path.replace('.csv', '_descartados.csv'))
         log(f"Registros descartados salvos em {output_csv_path.replace('.csv', '_descartados.csv')}.")
 
+def comparar_dados_e_salvar(obitos_path_csv, csv_path, output_csv_path, 
+                            similarity_threshold=85,
+                            columns_to_compare=[('Nome Civil', 'NOME_Obito'), 
+                                                ('Data de Nascimento', 'DT_NASCIMENTO'), 
+                                                ('Genitor', 'PAI'), 
+                                                ('Genitora', 'MAE')],
+                            coluna_processo='numeroProcesso'):
+
+    log("Iniciando o processo de comparação de dados.")
+    progresso = Progresso('compareDate')
+
+    log("Lendo e normalizando os arquivos CSV (com cache).")
+    with progresso.etapa('carga_com_cache'):
+        obitos_info = carregar_normalizado(obitos_path_csv, [obito_col for _, obito_col in columns_to_compare], progresso)
+        dados_partes = carregar_normalizado(csv_path, [parte_col for parte_col, _ in columns_to_compare], progresso)
+
+    resultados = []
+    descartados = []
+
+    progresso.iniciar(len(dados_partes), "Comparando registros")
+    with progresso.etapa('comparacao'):
+        for index, parte_row in dados_partes.iterrows():
+            tipo, registro = avaliar_parte(parte_row, obitos_info, columns_to_compare, similarity_threshold, index + 1)
+            if tipo == 'resultado':
+                resultados.append(registro)
+            elif tipo == 'descartado':
+                descartados.append(registro)
+            progresso.avancar()
+    progresso.concluir()
+
+    with progresso.etapa('gravacao'):
+        salvar_resultados(resultados, descartados, output_csv_path)
+
+    progresso.finalizar(partes=len(dados_partes), obitos=len(obitos_info),
+                        resultados=len(resultados), descartados=len(descartados))
     log("Processo concluído.")
 
-comparar_dados_e_salvar(
-    'Possiveis_Obitos_Processos.csv',
-    'dados_partes.csv',
-    'resultadoCompareDatePjeAndObt.csv'
-)
+if __name__ == "__main__":
+    comparar_dados_e_salvar(
+        'Possiveis_Obitos_Processos.csv',
+        'dados_partes.csv',
+        'resultadoCompareDatePjeAndObt.csv'
+    )
@@ -0,0 +1,221 @@
+"""
+Vinculação incremental óbitos x partes do PJe.
+
+Guarda, entre execuções, o resultado de cada parte já avaliada, os óbitos
+que o decidiram (origem) e as impressões digitais dos registros de óbito já
+conhecidos. Os pares (parte, óbito) avaliados ficam representados pelas
+gerações: uma parte avaliada na geração G já foi comparada com todos os óbitos
+incluídos até G.
+
+Em cada nova execução:
+- partes novas ou alteradas são comparadas com toda a base de óbitos;
+- partes cujo resultado veio de um óbito removido (ou de "CPF diferente",
+  quando algum óbito saiu da base) são comparadas de novo com toda a base;
+- as demais, se há óbitos novos, repassam pelas regras de CPF (toda a base) e
+  pelo nome só contra os óbitos novos e o óbito de nome congruente que já as
+  decidia. Como a comparação completa fica com o primeiro nome congruente, um
+  óbito novo só substitui esse óbito se vier antes dele no arquivo (supõe-se
+  que os óbitos já conhecidos mantêm a ordem entre si).
+
+Além do resultado completo (mesmo formato do compareDate.py), é gravado um
+relatório de diferenças com as partes que entraram ou saíram do resultado.
+"""
+import json
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+from compareDate import avaliar_parte_com_origem, carregar_normalizado, log, salvar_resultados
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.exportacao import exportar_csv
+from comum.progresso import Progresso
+
+COLUNAS_PADRAO = [('Nome Civil', 'NOME_Obito'),
+                  ('Data de Nascimento', 'DT_NASCIMENTO'),
+                  ('Genitor', 'PAI'),
+                  ('Genitora', 'MAE')]
+
+
+def impressoes_digitais(df):
+    """Retorna um hash de 64 bits por linha, calculado sobre todas as colunas."""
+    return pd.util.hash_pandas_object(df.astype('string'), index=False).to_numpy()
+
+
+def _para_json(registro):
+    """Serializa o registro trocando valores nulos por None."""
+    limpo = {}
+    for chave, valor in registro.items():
+        if not isinstance(valor, (list, dict)) and pd.isna(valor):
+            valor = None
+        elif hasattr(valor, 'item'):
+            valor = valor.item()
+        limpo[chave] = valor
+    return json.dumps(limpo, ensure_ascii=False)
+
+
+def ler_origem(valor):
+    """
+    Lê a origem gravada no estado: lista de impressões digitais dos óbitos que
+    decidiram a parte, None se dependeu de todos os CPFs da base ("CPF
+    diferente") ou False se desconhecida (estado gravado por versão anterior).
+    """
+    if not isinstance(valor, str) or not valor:
+        return False
+    return json.loads(valor)
+
+
+def carregar_estado(pasta_estado):
+    """Lê o estado salvo da vinculação (ou um estado vazio na primeira execução)."""
+    caminho_meta = os.path.join(pasta_estado, 'estado.json')
+    if not os.path.exists(caminho_meta):
+        return {'geracao': 0}, pd.DataFrame(columns=['fp_parte', 'geracao', 'tipo', 'registro', 'origem']), \
+            pd.DataFrame(columns=['fp_obito', 'geracao'])
+    with open(caminho_meta, 'r', encoding='utf-8') as f:
+        meta = json.load(f)
+    partes = pd.read_parquet(os.path.join(pasta_estado, 'partes.parquet'))
+    if 'origem' not in partes.columns:
+        partes['origem'] = ''
+    obitos = pd.read_parquet(os.path.join(pasta_estado, 'obitos.parquet'))
+    return meta, partes, obitos
+
+
+def salvar_estado(pasta_estado, meta, partes, obitos):
+    os.makedirs(pasta_estado, exist_ok=True)
+    partes.to_parquet(os.path.join(pasta_estado, 'partes.parquet'), index=False)
+    obitos.to_parquet(os.path.join(pasta_estado, 'obitos.parquet'), index=False)
+    with open(os.path.join(pasta_estado, 'estado.json'), 'w', encoding='utf-8') as f:
+        json.dump(meta, f, indent=4, ensure_ascii=False)
+
+
+def comparar_incremental(obitos_path_csv, csv_path, output_csv_path,
+                         pasta_estado='estado_linkage',
+                         similarity_threshold=85,
+                         columns_to_compare=COLUNAS_PADRAO):
+
+    log("Iniciando a comparação incremental.")
+    progresso = Progresso('compareDateIncremental')
+    with progresso.etapa('carga_com_cache'):
+        obitos_info = carregar_normalizado(obitos_path_csv, [obito_col for _, obito_col in columns_to_compare], progresso)
+        dados_partes = carregar_normalizado(csv_path, [parte_col for parte_col, _ in columns_to_compare], progresso)
+
+    meta, estado_partes, estado_obitos = carregar_estado(pasta_estado)
+    geracao = meta['geracao'] + 1
+
+    fp_obitos = impressoes_digitais(obitos_info)
+    fp_partes = impressoes_digitais(dados_partes)
+
+    conhecidos = set(estado_obitos['fp_obito'].tolist())
+    atuais = set(fp_obitos.tolist())
+    posicoes_novas = [posicao for posicao, fp in enumerate(fp_obitos.tolist()) if fp not in conhecidos]
+    removidos = conhecidos - atuais
+    # Rótulo de cada óbito -> impressão digital, e impressão digital -> primeira posição no arquivo
+    fp_por_rotulo = dict(zip(obitos_info.index, fp_obitos.tolist()))
+    posicao_por_fp = {}
+    for posicao, fp in enumerate(fp_obitos.tolist()):
+        posicao_por_fp.setdefault(fp, posicao)
+
+    anteriores = estado_partes.drop_duplicates('fp_parte').set_index('fp_parte')
+    log(f"Geração {geracao}: {len(posicoes_novas)} óbitos novos, "
+        f"{len(removidos)} removidos, {len(dados_partes)} partes.")
+
+    novos_estados = []
+    resultados = []
+    descartados = []
+    avaliadas_completas = 0
+    avaliadas_parciais = 0
+
+    progresso.iniciar(len(dados_partes), "Avaliando partes")
+    for posicao, (index, parte_row) in enumerate(dados_partes.iterrows()):
+        fp = int(fp_partes[posicao])
+        anterior = anteriores.loc[fp] if fp in anteriores.index else None
+
+        origem = ler_origem(anterior['origem']) if anterior is not None else False
+        if origem is False or (removidos and (origem is None or removidos.intersection(origem))):
+            # Parte nova, alterada ou decidida por óbito removido: compara com toda a base
+            tipo, registro, rotulos = avaliar_parte_com_origem(parte_row, obitos_info, columns_to_compare,
+                                                               similarity_threshold, index + 1)
+            avaliadas_completas += 1
+        elif posicoes_novas:
+            # Regras de CPF contra toda a base; pelo nome, os óbitos novos e o que já decidia a parte,
+            # na ordem do arquivo, para que o primeiro nome congruente seja o mesmo da comparação completa
+            posicoes = sorted(set(posicoes_novas).union(posicao_por_fp[fp_obito] for fp_obito in origem or []))
+            tipo, registro, rotulos = avaliar_parte_com_origem(parte_row, obitos_info, columns_to_compare,
+                                                               similarity_threshold, index + 1,
+                                                               obitos_nome=obitos_info.iloc[posicoes])
+            avaliadas_parciais += 1
+        else:
+            tipo = anterior['tipo'] or None
+            registro = json.loads(anterior['registro']) if anterior['registro'] else None
+            rotulos = False
+
+        novos_estados.append({
+            'fp_parte': fp,
+            'geracao': geracao,
+            'tipo': tipo or '',
+            'registro': _para_json(registro) if registro is not None else '',
+            'origem': anterior['origem'] if rotulos is False else
+            json.dumps(None if rotulos is None else [fp_por_rotulo[rotulo] for rotulo in rotulos]),
+        })
+        if tipo == 'resultado':
+            resultados.append(json.loads(novos_estados[-1]['registro']))
+        elif tipo == 'descartado':
+            descartados.append(json.loads(novos_estados[-1]['registro']))
+        progresso.avancar()
+    progresso.concluir()
+
+    log(f"{avaliadas_completas} partes comparadas com toda a base e "
+        f"{avaliadas_parciais} pelo nome apenas com os óbitos novos.")
+
+    with progresso.etapa('gravacao'):
+        salvar_resultados(resultados, descartados, output_csv_path)
+        gerar_relatorio_diferencas(estado_partes, novos_estados, output_csv_path)
+
+    novo_estado_partes = pd.DataFrame(novos_estados, columns=['fp_parte', 'geracao', 'tipo', 'registro', 'origem'])
+    novo_estado_partes['fp_parte'] = novo_estado_partes['fp_parte'].astype('uint64')
+    geracao_obitos = estado_obitos.set_index('fp_obito')['geracao'].to_dict()
+    novo_estado_obitos = pd.DataFrame({
+        'fp_obito': fp_obitos,
+        'geracao': [geracao_obitos.get(int(fp), geracao) for fp in fp_obitos],
+    }).drop_duplicates('fp_obito')
+
+    meta.update({
+        'geracao': geracao,
+        'executado_em': datetime.now().isoformat(timespec='seconds'),
+        'obitos': os.path.abspath(obitos_path_csv),
+        'partes': os.path.abspath(csv_path),
+    })
+    salvar_estado(pasta_estado, meta, novo_estado_partes, novo_estado_obitos)
+    progresso.finalizar(geracao=geracao, avaliadas_completas=avaliadas_completas,
+                        avaliadas_parciais=avaliadas_parciais, resultados=len(resultados))
+    log("Processo incremental concluído.")
+
+
+def gerar_relatorio_diferencas(estado_anterior, novos_estados, output_csv_path):
+    """Grava as partes que entraram ou saíram do resultado em relação à execução anterior."""
+    def encontrados(registros):
+        return {
+            registro: json.loads(registro)
+            for tipo, registro in registros
+            if tipo == 'resultado'
+        }
+
+    antes = encontrados(zip(estado_anterior['tipo'], estado_anterior['registro']))
+    depois = encontrados((estado['tipo'], estado['registro']) for estado in novos_estados)
+
+    diferencas = [{**registro, 'Mudanca': 'Novo'} for chave, registro in depois.items() if chave not in antes]
+    diferencas += [{**registro, 'Mudanca': 'Removido'} for chave, registro in antes.items() if chave not in depois]
+
+    caminho_delta = output_csv_path.replace('.csv', '_delta.csv')
+    exportar_csv(pd.DataFrame(diferencas), caminho_delta)
+    log(f"{len(diferencas)} mudanças em relação à execução anterior salvas em {caminho_delta}.")
+
+
+if __name__ == "__main__":
+    comparar_incremental(
+        'Possiveis_Obitos_Processos.csv',
+        'dados_partes.csv',
+        'resultadoCompareDatePjeAndObt.csv'
+    )
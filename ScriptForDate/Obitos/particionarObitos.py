@@ -0,0 +1,224 @@
+"""
+Base de óbitos particionada por ano do óbito e faixa do ano de nascimento.
+
+`particionar_obitos` converte o CSV plano (ex.: Obitos_10anos_scc.csv) em um
+dataset Parquet particionado no estilo Hive:
+
+    obitos_particionado/ano_obito=2019/faixa_nascimento=1950/part-0.parquet
+
+`comparar_com_obitos_particionados` agrupa as partes pela faixa de nascimento
+e pelo ano de autuação do processo e, para cada grupo, lê apenas as partições
+candidatas: faixas compatíveis com a Data de Nascimento da parte e óbitos a
+partir do ano de autuação. Registros sem data ficam na partição -1 e são
+sempre considerados. As regras de CPF, como no compareDate.py, valem para a
+base inteira: os CPFs de todas as partes são consultados de uma vez, lendo só
+as colunas necessárias.
+
+O dataset guarda em _origem.json a impressão digital do CSV de origem e as
+opções usadas; `particionar_obitos` só gera tudo de novo quando uma delas
+muda (ex.: chegou o CSV do mês), gravando em uma pasta temporária que
+substitui a anterior por inteiro.
+"""
+import json
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+
+from compareDate import (avaliar_parte, carregar_normalizado, detectar_encoding, log,
+                         normalizar_texto, salvar_resultados, validar_cpf)
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.cache_dados import impressao_digital, tabela_para_dataframe
+from comum.cnj import ano_cnj
+from comum.exportacao import pasta_substituta
+from comum.progresso import Progresso
+
+SEM_DATA = -1
+
+# Ignorado pelo pyarrow ao abrir o dataset (arquivos com prefixo "_")
+ARQUIVO_ORIGEM = '_origem.json'
+
+COLUNAS_PADRAO = [('Nome Civil', 'NOME_Obito'),
+                  ('Data de Nascimento', 'DT_NASCIMENTO'),
+                  ('Genitor', 'PAI'),
+                  ('Genitora', 'MAE')]
+
+ESQUEMA_PARTICOES = pa.schema([('ano_obito', pa.int16()), ('faixa_nascimento', pa.int16())])
+
+
+def extrair_ano(datas):
+    """Extrai o ano (4 dígitos) de uma coluna de datas em texto; sem data vira -1."""
+    anos = pd.to_numeric(datas.astype('string').str.extract(r'(\d{4})')[0], errors='coerce')
+    return anos.fillna(SEM_DATA).astype('int16')
+
+
+def faixa_nascimento(anos, tamanho_faixa):
+    """Agrupa os anos de nascimento em faixas (ex.: 1950 para 1950-1959)."""
+    return anos.where(anos == SEM_DATA, (anos // tamanho_faixa) * tamanho_faixa).astype('int16')
+
+
+def particionar_obitos(caminho_csv, destino='obitos_particionado',
+                       coluna_obito='DT_OBITO', coluna_nascimento='DT_NASCIMENTO',
+                       colunas_texto=('NOME', 'NOME_Obito', 'PAI', 'MAE'),
+                       tamanho_faixa=10, chunksize=500_000, forcar=False):
+    """
+    Converte o CSV de óbitos em um dataset Parquet particionado, lendo em chunks.
+
+    Não faz nada se `destino` já foi gerado deste mesmo CSV (pelo hash do
+    conteúdo) com as mesmas opções, a menos que `forcar` seja True.
+
+    :return: True se o dataset foi gerado, False se já estava atualizado.
+    """
+    origem = {
+        'hash': impressao_digital(caminho_csv)['hash'],
+        'parametros': {'coluna_obito': coluna_obito, 'coluna_nascimento': coluna_nascimento,
+                       'colunas_texto': list(colunas_texto), 'tamanho_faixa': tamanho_faixa},
+    }
+    anterior = ler_origem(destino)
+    if not forcar and anterior and all(anterior.get(chave) == valor for chave, valor in origem.items()):
+        log(f"Base de óbitos particionada em {destino} já está atualizada com {caminho_csv}.")
+        return False
+
+    encoding = detectar_encoding(caminho_csv)
+
+    def lotes():
+        for chunk in pd.read_csv(caminho_csv, encoding=encoding, dtype=str, chunksize=chunksize):
+            if 'NOME' in chunk.columns and 'NOME_Obito' not in chunk.columns:
+                chunk = chunk.rename(columns={'NOME': 'NOME_Obito'})
+            if 'CPF' in chunk.columns:
+                chunk['CPF'] = chunk['CPF'].str.replace(r'\D', '', regex=True)
+            for coluna in colunas_texto:
+                if coluna in chunk.columns:
+                    chunk[coluna] = chunk[coluna].apply(normalizar_texto).astype('string')
+            if coluna_obito in chunk.columns:
+                chunk['ano_obito'] = extrair_ano(chunk[coluna_obito])
+            else:
+                chunk['ano_obito'] = pd.Series(SEM_DATA, index=chunk.index, dtype='int16')
+            chunk['faixa_nascimento'] = faixa_nascimento(extrair_ano(chunk[coluna_nascimento]), tamanho_faixa)
+            yield pa.RecordBatch.from_pandas(chunk.astype({c: 'string' for c in chunk.columns
+                                                           if c not in ('ano_obito', 'faixa_nascimento')}),
+                                             preserve_index=False)
+
+    gerador = lotes()
+    primeiro = next(gerador)
+
+    def todos():
+        yield primeiro
+        yield from gerador
+
+    with pasta_substituta(destino) as temporaria:
+        ds.write_dataset(
+            todos(), temporaria, schema=primeiro.schema, format='parquet',
+            partitioning=ds.partitioning(ESQUEMA_PARTICOES, flavor='hive')
+        )
+        with open(os.path.join(temporaria, ARQUIVO_ORIGEM), 'w', encoding='utf-8') as f:
+            json.dump({**origem, 'origem': os.path.abspath(caminho_csv),
+                       'criado_em': datetime.now().isoformat(timespec='seconds')}, f, indent=4, ensure_ascii=False)
+    log(f"Base de óbitos particionada salva em {destino}.")
+    return True
+
+
+def ler_origem(destino):
+    """Hash do CSV de origem e opções gravados com o dataset (None se não houver dataset)."""
+    try:
+        with open(os.path.join(destino, ARQUIVO_ORIGEM), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def abrir_obitos_particionados(destino):
+    return ds.dataset(destino, format='parquet', partitioning='hive')
+
+
+def filtro_candidatos(faixa=None, ano_autuacao=None):
+    """Monta o predicado das partições candidatas para um grupo de partes."""
+    filtro = None
+    if faixa is not None and faixa != SEM_DATA:
+        filtro = ds.field('faixa_nascimento').isin([faixa, SEM_DATA])
+    if ano_autuacao is not None and ano_autuacao != SEM_DATA:
+        filtro_obito = (ds.field('ano_obito') >= ano_autuacao) | (ds.field('ano_obito') == SEM_DATA)
+        filtro = filtro_obito if filtro is None else filtro & filtro_obito
+    return filtro
+
+
+def comparar_com_obitos_particionados(destino, csv_path, output_csv_path,
+                                      similarity_threshold=85,
+                                      columns_to_compare=COLUNAS_PADRAO,
+                                      coluna_processo='numeroProcesso',
+                                      tamanho_faixa=10,
+                                      excluir_obitos_anteriores=True):
+    """Mesma comparação do compareDate.py, lendo só as partições candidatas de cada grupo."""
+    log("Iniciando a comparação com a base de óbitos particionada.")
+    progresso = Progresso('compareDateParticionado')
+    dataset = abrir_obitos_particionados(destino)
+    with progresso.etapa('carga_com_cache'):
+        dados_partes = carregar_normalizado(csv_path, [parte_col for parte_col, _ in columns_to_compare], progresso)
+
+    dados_partes['_faixa'] = faixa_nascimento(extrair_ano(dados_partes['Data de Nascimento']), tamanho_faixa)
+    if excluir_obitos_anteriores:
+        dados_partes['_ano_autuacao'] = ano_cnj(dados_partes[coluna_processo]).fillna(SEM_DATA).astype('int16')
+    else:
+        dados_partes['_ano_autuacao'] = SEM_DATA
+
+    # Regras de CPF contra toda a base: uma única consulta projetada com os CPFs válidos de todas as
+    # partes (o CPF não é chave de partição) e a verificação de que a base tem algum CPF preenchido
+    with progresso.etapa('leitura_cpfs'):
+        cpfs = [cpf for cpf in dados_partes['CPF'].dropna().unique() if validar_cpf(cpf)]
+        colunas_cpf = [coluna for coluna in ('CPF', 'PAI', 'MAE', 'DT_NASCIMENTO') if coluna in dataset.schema.names]
+        if cpfs:
+            obitos_cpf = tabela_para_dataframe(dataset.to_table(filter=ds.field('CPF').isin(cpfs), columns=colunas_cpf))
+        else:
+            obitos_cpf = pd.DataFrame(columns=colunas_cpf)
+        por_cpf = dict(tuple(obitos_cpf.groupby('CPF', sort=False)))
+        base_tem_cpf = dataset.head(1, columns=['CPF'], filter=ds.field('CPF').is_valid()).num_rows > 0
+        sem_cpf = obitos_cpf.iloc[:0]
+
+    resultados = []
+    descartados = []
+    linhas_lidas = len(obitos_cpf)
+
+    progresso.iniciar(len(dados_partes), "Comparando registros")
+    for (faixa, ano_autuacao), grupo in dados_partes.groupby(['_faixa', '_ano_autuacao'], sort=True):
+        filtro = filtro_candidatos(int(faixa), int(ano_autuacao))
+        with progresso.etapa('leitura_particoes'):
+            candidatos = tabela_para_dataframe(dataset.to_table(filter=filtro))
+
+        linhas_lidas += len(candidatos)
+        log(f"Grupo faixa={faixa} autuação={ano_autuacao}: {len(grupo)} partes x {len(candidatos)} óbitos candidatos.")
+
+        with progresso.etapa('comparacao'):
+            for index, parte_row in grupo.drop(columns=['_faixa', '_ano_autuacao']).iterrows():
+                tipo, registro = avaliar_parte(parte_row, candidatos, columns_to_compare, similarity_threshold, index + 1,
+                                               obitos_cpf=por_cpf.get(parte_row['CPF'], sem_cpf),
+                                               base_tem_cpf=base_tem_cpf)
+                if tipo == 'resultado':
+                    resultados.append((index, registro))
+                elif tipo == 'descartado':
+                    descartados.append((index, registro))
+                progresso.avancar()
+    progresso.concluir()
+
+    # Devolve os registros à ordem original do arquivo de partes
+    resultados = [registro for _, registro in sorted(resultados, key=lambda item: item[0])]
+    descartados = [registro for _, registro in sorted(descartados, key=lambda item: item[0])]
+
+    log(f"{linhas_lidas} linhas de óbitos lidas no total (base completa: {dataset.count_rows()}).")
+    with progresso.etapa('gravacao'):
+        salvar_resultados(resultados, descartados, output_csv_path)
+    progresso.finalizar(obitos_lidos=linhas_lidas, obitos_total=dataset.count_rows(),
+                        resultados=len(resultados), descartados=len(descartados))
+    log("Processo concluído.")
+
+
+if __name__ == "__main__":
+    particionar_obitos('./docs/Obitos_10anos_scc.csv', 'obitos_particionado')
+    comparar_com_obitos_particionados(
+        'obitos_particionado',
+        'dados_partes.csv',
+        'resultadoCompareDatePjeAndObt.csv'
+    )
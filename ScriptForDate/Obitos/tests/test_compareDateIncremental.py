@@ -0,0 +1,72 @@
+"""A vinculação incremental deve dar o mesmo resultado da comparação completa."""
+import os
+import sys
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from compareDate import comparar_dados_e_salvar
+from compareDateIncremental import comparar_incremental
+import comum.cache_dados
+
+PARTES = pd.DataFrame([{
+    'numeroProcesso': '0000001-11.2020.8.05.0216', 'Polo': 'Passivo', 'CPF': '11111111111',
+    'Nome Civil': 'JOSE DA SILVA', 'Data de Nascimento': '01/01/1950', 'Genitor': None, 'Genitora': None,
+}])
+OBITO_OUTRO_CPF = {'CPF': '22222222222', 'NOME_Obito': 'MARIA SOUZA', 'DT_NASCIMENTO': '02/02/1940',
+                   'PAI': None, 'MAE': None}
+# Sem CPF, com o nome e a data de nascimento da parte
+OBITO_SEM_CPF = {'CPF': None, 'NOME_Obito': 'JOSE DA SILVA', 'DT_NASCIMENTO': '01/01/1950',
+                 'PAI': None, 'MAE': None}
+# Sem CPF, com o nome da parte e outra data de nascimento
+OBITO_HOMONIMO = {'CPF': None, 'NOME_Obito': 'JOSE DA SILVA', 'DT_NASCIMENTO': '05/05/1945',
+                  'PAI': None, 'MAE': None}
+
+
+def _ler(caminho):
+    return pd.read_csv(caminho, dtype=str) if os.path.exists(caminho) else pd.DataFrame()
+
+
+def _comparar_duas_execucoes(partes, obitos_antes, obitos_depois):
+    """Roda a vinculação incremental com obitos_antes e depois com obitos_depois, e a completa com obitos_depois."""
+    partes.to_csv('partes.csv', index=False)
+    pd.DataFrame(obitos_antes).to_csv('obitos.csv', index=False)
+    comparar_incremental('obitos.csv', 'partes.csv', 'inc1.csv', pasta_estado='estado')
+    pd.DataFrame(obitos_depois).to_csv('obitos.csv', index=False)
+    comparar_incremental('obitos.csv', 'partes.csv', 'inc2.csv', pasta_estado='estado')
+    comparar_dados_e_salvar('obitos.csv', 'partes.csv', 'completo.csv')
+
+
+def test_obito_novo_sem_cpf_nao_encontra_parte_com_cpf_diferente_na_base(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(comum.cache_dados, 'DIR_CACHE_PADRAO', str(tmp_path / 'cache'))
+    _comparar_duas_execucoes(PARTES, [OBITO_OUTRO_CPF], [OBITO_OUTRO_CPF, OBITO_SEM_CPF])
+
+    assert _ler('inc2.csv').empty
+    assert _ler('completo.csv').empty
+    descartados = _ler('inc2_descartados.csv')
+    assert descartados['Motivo'].tolist() == ['CPF diferente']
+    assert descartados['Motivo'].tolist() == _ler('completo_descartados.csv')['Motivo'].tolist()
+
+
+def test_obito_novo_nao_substitui_o_primeiro_nome_congruente(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(comum.cache_dados, 'DIR_CACHE_PADRAO', str(tmp_path / 'cache'))
+    _comparar_duas_execucoes(PARTES.assign(CPF=None), [OBITO_HOMONIMO], [OBITO_HOMONIMO, OBITO_SEM_CPF])
+
+    assert _ler('inc2.csv').empty
+    assert _ler('completo.csv').empty
+    descartados = _ler('inc2_descartados.csv')
+    assert descartados['Motivo'].tolist() == ['Campos divergentes: Data de Nascimento']
+    assert descartados['Motivo'].tolist() == _ler('completo_descartados.csv')['Motivo'].tolist()
+
+
+def test_remocao_do_obito_com_outro_cpf_reavalia_a_parte(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setattr(comum.cache_dados, 'DIR_CACHE_PADRAO', str(tmp_path / 'cache'))
+    _comparar_duas_execucoes(PARTES, [OBITO_OUTRO_CPF, OBITO_SEM_CPF], [OBITO_SEM_CPF])
+
+    assert _ler('inc1_descartados.csv')['Motivo'].tolist() == ['CPF diferente']
+    encontrados = _ler('inc2.csv')
+    assert encontrados['Encontrador_atraves'].tolist() == ['Dados Secundarios']
+    assert encontrados.equals(_ler('completo.csv'))
@@ -0,0 +1,313 @@
+"""
+Banco analítico local (DuckDB) com os exports do PJe e as bases auxiliares.
+
+As fontes ficam descritas em fontes.json (caminhos relativos à pasta deste
+arquivo) e são carregadas para tabelas de um arquivo DuckDB (pje.duckdb).
+Nas execuções seguintes só são recarregadas as fontes cujos arquivos mudaram
+(impressão digital de comum.cache_dados); as demais são consultadas direto do
+banco, em formato colunar e com execução em várias threads, sem reler CSVs.
+
+Tipos de fonte:
+    csv         um CSV (delimitador e encoding detectados, se não informados)
+    parquet     um arquivo ou uma pasta de dataset Parquet (ex.: merged_processos)
+    excel       uma planilha .xlsx (primeira aba)
+    filas       pasta de CSVs das filas de tarefas, com as subpastas; colunas
+                numeroProcesso, NomeTarefa, subpasta, arquivo e ordem
+    intervalos  configuracao_servidores.json do separadorDigito; colunas
+                servidor, inicio e fim
+
+Opções de cada fonte:
+    partes      colunas de polo: gera a tabela <fonte>_partes (linha, papel,
+                nome, chave) com uma linha por parte, como comum.polos.explodir_colunas
+    nomes       colunas de nome: gera a tabela <fonte>_nomes (linha, coluna,
+                nome, chave) com o nome inteiro normalizado
+    renomear    {nome no arquivo: nome na tabela}
+
+A coluna "linha" das tabelas derivadas é o rowid da linha na tabela da fonte.
+As macros ano_cnj(numero) e dv_cnj(numero) ficam disponíveis nas consultas.
+"""
+import json
+import os
+import sys
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.cache_dados import impressao_digital
+from comum.cnj import PADRAO_CNJ
+from comum.leitura import detectar_delimitador, detectar_encoding, ler_csv_com_cache
+from comum.polos import chave_nome, explodir_colunas, normalizar_nomes
+
+try:
+    import duckdb
+except ImportError:  # o restante do repositório não depende do DuckDB
+    duckdb = None
+
+PASTA_MODULO = os.path.dirname(os.path.abspath(__file__))
+ARQUIVO_FONTES = os.path.join(PASTA_MODULO, 'fontes.json')
+ARQUIVO_BANCO = os.path.join(PASTA_MODULO, 'pje.duckdb')
+
+# Versão da carga; incremente se o formato das tabelas mudar (força recarregar tudo)
+VERSAO_CARGA = 1
+
+# Linhas lidas por vez ao gerar as tabelas de partes e nomes
+TAMANHO_LOTE = 500_000
+
+# Encodings aceitos pelo leitor de CSV do DuckDB
+ENCODINGS_DUCKDB = {'utf-8': 'utf-8', 'ascii': 'utf-8', 'utf-16': 'utf-16'}
+
+MACROS = [
+    f"CREATE OR REPLACE TEMP MACRO ano_cnj(numero) AS "
+    f"TRY_CAST(regexp_extract(numero, '{PADRAO_CNJ}', 3) AS INTEGER)",
+    f"CREATE OR REPLACE TEMP MACRO dv_cnj(numero) AS "
+    f"TRY_CAST(regexp_extract(numero, '{PADRAO_CNJ}', 2) AS INTEGER)",
+]
+
+
+def log(message):
+    """Função simples para exibir mensagens de log."""
+    print(f"[SQL] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}")
+
+
+def identificador(nome):
+    """Nome de tabela ou coluna entre aspas, para o SQL."""
+    return '"' + str(nome).replace('"', '""') + '"'
+
+
+def carregar_fontes(arquivo=ARQUIVO_FONTES):
+    """Lê a descrição das fontes e resolve os caminhos relativos à pasta do arquivo."""
+    with open(arquivo, 'r', encoding='utf-8') as f:
+        fontes = json.load(f)
+    pasta = os.path.dirname(os.path.abspath(arquivo))
+    for descricao in fontes.values():
+        descricao['caminho'] = os.path.normpath(os.path.join(pasta, descricao['caminho']))
+    return fontes
+
+
+def arquivos_da_fonte(descricao):
+    """Arquivos que compõem a fonte, em ordem (pastas são percorridas com as subpastas)."""
+    caminho = descricao['caminho']
+    if not os.path.isdir(caminho):
+        return [caminho] if os.path.exists(caminho) else []
+    extensao = '.parquet' if descricao['tipo'] == 'parquet' else '.csv'
+    arquivos = []
+    for raiz, pastas, nomes in os.walk(caminho):
+        pastas.sort()
+        arquivos.extend(os.path.join(raiz, nome) for nome in sorted(nomes) if nome.endswith(extensao))
+    return arquivos
+
+
+class BancoPJe:
+    """
+    Conexão com o banco analítico e carga das fontes.
+
+    Exemplo:
+        with BancoPJe() as banco:
+            banco.atualizar()
+            df = banco.sql("SELECT count(*) FROM processos").df()
+    """
+
+    def __init__(self, arquivo_banco=ARQUIVO_BANCO, arquivo_fontes=ARQUIVO_FONTES, threads=None,
+                 somente_leitura=False):
+        if duckdb is None:
+            raise ImportError("O banco analítico requer o pacote duckdb (pip install duckdb).")
+        self.fontes = carregar_fontes(arquivo_fontes)
+        self.conexao = duckdb.connect(arquivo_banco, read_only=somente_leitura)
+        if threads:
+            self.conexao.execute(f"SET threads TO {int(threads)}")
+        for macro in MACROS:
+            self.conexao.execute(macro)
+        if not somente_leitura:
+            self.conexao.execute(
+                "CREATE TABLE IF NOT EXISTS _cargas (fonte VARCHAR PRIMARY KEY, assinatura VARCHAR, "
+                "arquivos INTEGER, linhas BIGINT, carregada_em TIMESTAMP)"
+            )
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *excecao):
+        self.fechar()
+
+    def fechar(self):
+        self.conexao.close()
+
+    def sql(self, consulta, parametros=None):
+        """Executa SQL no banco; devolve a relação do DuckDB (.df(), .fetchall(), .show())."""
+        return self.conexao.sql(consulta, params=parametros)
+
+    def tabelas(self):
+        """Tabelas do banco, com a quantidade de linhas."""
+        return self.conexao.sql(
+            "SELECT table_name AS tabela, estimated_size AS linhas FROM duckdb_tables() "
+            "WHERE NOT internal AND table_name <> '_cargas' ORDER BY 1"
+        ).df()
+
+    # --- Carga ---------------------------------------------------------------
+
+    def assinatura(self, nome):
+        """Assinatura das entradas da fonte: hash do conteúdo de cada arquivo e a descrição da fonte."""
+        descricao = self.fontes[nome]
+        arquivos = arquivos_da_fonte(descricao)
+        conteudo = {
+            'versao': VERSAO_CARGA,
+            'descricao': descricao,
+            'arquivos': [(os.path.relpath(arquivo, descricao['caminho']), impressao_digital(arquivo)['hash'])
+                         for arquivo in arquivos],
+        }
+        return json.dumps(conteudo, sort_keys=True, ensure_ascii=False), len(arquivos)
+
+    def atualizar(self, nomes=None, forcar=False):
+        """
+        Carrega as fontes novas ou alteradas.
+
+        :param nomes: Fontes a considerar (padrão: todas as de fontes.json).
+        :param forcar: Recarrega mesmo sem mudanças.
+        :return: Lista das fontes carregadas.
+        """
+        carregadas = []
+        for nome in nomes or list(self.fontes):
+            if nome not in self.fontes:
+                raise ValueError(f"Fonte desconhecida: {nome}")
+            assinatura, quantidade = self.assinatura(nome)
+            if quantidade == 0:
+                log(f"Fonte '{nome}' sem arquivos em {self.fontes[nome]['caminho']}; ignorada.")
+                continue
+            anterior = self.conexao.execute(
+                "SELECT assinatura FROM _cargas WHERE fonte = ?", [nome]
+            ).fetchone()
+            if not forcar and anterior and anterior[0] == assinatura:
+                continue
+            inicio = datetime.now()
+            linhas = self._carregar(nome)
+            self.conexao.execute(
+                "INSERT OR REPLACE INTO _cargas VALUES (?, ?, ?, ?, ?)",
+                [nome, assinatura, quantidade, linhas, datetime.now()]
+            )
+            log(f"Fonte '{nome}' carregada: {linhas} linhas de {quantidade} arquivo(s) "
+                f"em {(datetime.now() - inicio).total_seconds():.1f} s.")
+            carregadas.append(nome)
+        return carregadas
+
+    def _carregar(self, nome):
+        descricao = self.fontes[nome]
+        tabela = identificador(nome)
+        carregar = {
+            'csv': self._relacao_csv,
+            'parquet': self._relacao_parquet,
+            'excel': self._relacao_excel,
+            'filas': self._relacao_filas,
+            'intervalos': self._relacao_intervalos,
+        }[descricao['tipo']]
+
+        self.conexao.execute("BEGIN TRANSACTION")
+        try:
+            relacao = carregar(descricao)
+            renomear = descricao.get('renomear')
+            if renomear:
+                relacao = relacao.select(', '.join(
+                    f"{identificador(coluna)} AS {identificador(renomear.get(coluna, coluna))}"
+                    for coluna in relacao.columns
+                ))
+            self.conexao.execute(f"DROP TABLE IF EXISTS {tabela}")
+            relacao.create(nome)
+            for sufixo in ('partes', 'nomes'):
+                self.conexao.execute(f"DROP TABLE IF EXISTS {identificador(f'{nome}_{sufixo}')}")
+            self.conexao.execute("COMMIT")
+        except Exception:
+            self.conexao.execute("ROLLBACK")
+            raise
+        finally:
+            self.conexao.unregister('_dados')
+
+        if descricao.get('partes'):
+            self._derivar(nome, 'partes', descricao['partes'])
+        if descricao.get('nomes'):
+            self._derivar(nome, 'nomes', descricao['nomes'])
+        return self.conexao.execute(f"SELECT count(*) FROM {tabela}").fetchone()[0]
+
+    def _relacao_csv(self, descricao):
+        caminho = descricao['caminho']
+        encoding = descricao.get('encoding') or detectar_encoding(caminho)
+        delimitador = descricao.get('delimitador') or detectar_delimitador(caminho, encoding=encoding)
+        return self.conexao.read_csv(
+            caminho, delimiter=delimitador, header=True, all_varchar=True,
+            encoding=ENCODINGS_DUCKDB.get(encoding.lower(), 'latin-1')
+        )
+
+    def _relacao_parquet(self, descricao):
+        caminho = descricao['caminho']
+        if os.path.isdir(caminho):
+            caminho = os.path.join(caminho, '**', '*.parquet')
+        return self.conexao.read_parquet(caminho, hive_partitioning=True, union_by_name=True)
+
+    def _registrar(self, df):
+        self.conexao.register('_dados', df)
+        return self.conexao.table('_dados')
+
+    def _relacao_excel(self, descricao):
+        return self._registrar(pd.read_excel(descricao['caminho'], dtype=str))
+
+    def _relacao_filas(self, descricao):
+        # Mesma leitura (e o mesmo cache) dos scripts de processoDuplicadosFilas
+        quadros = []
+        ordem = 0
+        for arquivo in arquivos_da_fonte(descricao):
+            try:
+                df, _ = ler_csv_com_cache(arquivo, colunas=('numeroProcesso', 'NomeTarefa'), encoding='utf-8')
+            except Exception as e:
+                print(f"Erro ao ler o arquivo {arquivo}: {e}")
+                continue
+            subpasta = os.path.relpath(os.path.dirname(arquivo), descricao['caminho'])
+            quadros.append(pd.DataFrame({
+                'numeroProcesso': df['numeroProcesso'] if 'numeroProcesso' in df else None,
+                'NomeTarefa': df['NomeTarefa'] if 'NomeTarefa' in df else None,
+                'subpasta': '' if subpasta == '.' else subpasta,
+                'arquivo': os.path.basename(arquivo),
+                'ordem': range(ordem, ordem + len(df)),
+            }, index=df.index).astype({'numeroProcesso': 'string', 'NomeTarefa': 'string'}))
+            ordem += len(df)
+        colunas = ['numeroProcesso', 'NomeTarefa', 'subpasta', 'arquivo', 'ordem']
+        return self._registrar(pd.concat(quadros, ignore_index=True) if quadros
+                               else pd.DataFrame(columns=colunas))
+
+    def _relacao_intervalos(self, descricao):
+        with open(descricao['caminho'], 'r', encoding='utf-8') as f:
+            configuracao = json.load(f)
+        linhas = [(servidor, int(inicio), int(fim))
+                  for servidor, intervalos in configuracao['intervalos_servidores'].items()
+                  for inicio, fim in intervalos]
+        return self._registrar(pd.DataFrame(linhas, columns=['servidor', 'inicio', 'fim']))
+
+    def _derivar(self, nome, sufixo, colunas):
+        """Gera <fonte>_partes ou <fonte>_nomes lendo as colunas em lotes."""
+        destino = identificador(f'{nome}_{sufixo}')
+        if sufixo == 'partes':
+            self.conexao.execute(f"CREATE TABLE {destino} (linha BIGINT, papel TINYINT, nome VARCHAR, chave UBIGINT)")
+        else:
+            self.conexao.execute(f"CREATE TABLE {destino} (linha BIGINT, coluna VARCHAR, nome VARCHAR, chave UBIGINT)")
+
+        selecao = ', '.join(f"CAST({identificador(c)} AS VARCHAR) AS {identificador(c)}" for c in colunas)
+        leitor = self.conexao.cursor()
+        try:
+            lotes = leitor.execute(
+                f"SELECT rowid AS _linha, {selecao} FROM {identificador(nome)}"
+            ).fetch_record_batch(TAMANHO_LOTE)
+            for lote in lotes:
+                df = lote.to_pandas()
+                if sufixo == 'partes':
+                    derivado = explodir_colunas(df, colunas)
+                else:
+                    derivado = pd.concat([
+                        pd.DataFrame({'linha': range(len(df)), 'coluna': coluna, 'nome': normalizar_nomes(df[coluna])})
+                        for coluna in colunas
+                    ], ignore_index=True).dropna(subset=['nome'])
+                    derivado = derivado[derivado['nome'] != '']
+                    derivado['chave'] = chave_nome(derivado['nome'])
+                derivado['linha'] = df['_linha'].to_numpy()[derivado['linha'].to_numpy()]
+                self.conexao.register('_derivado', derivado)
+                self.conexao.execute(f"INSERT INTO {destino} SELECT * FROM _derivado")
+                self.conexao.unregister('_derivado')
+        finally:
+            leitor.close()
@@ -0,0 +1,133 @@
+"""
+Análises dos scripts de ScriptForDate escritas como consultas SQL parametrizadas.
+
+Cada consulta tem uma descrição, as fontes de que depende, o SQL (parâmetros
+nomeados no formato $nome) e os valores padrão dos parâmetros.
+
+    processos_repetidos       processoDuplicadosFilas/main.py (uma subpasta por vez)
+    resumo_filas              quantidade de processos por subpasta e tarefa
+    possiveis_obitos          Obitos/BD_Obitos_with_BD_Pje.py
+    apf_correspondencias      Crime/APF/main.py, aba "Correspondências" (modo exato)
+    apf_nao_encontrados       Crime/APF/main.py, aba "Não Encontrados"
+    distribuicao_servidores   separadorDigito/main.py
+"""
+
+TAREFAS_IGNORADAS = ["Arquivo definitivo", "Imprimir Expediente", "(CR) Processos arquivados"]
+
+CONSULTAS = {
+    'processos_repetidos': {
+        'descricao': "Processos que aparecem mais de uma vez nas filas de uma subpasta, com as tarefas "
+                     "distintas na ordem em que aparecem (processos só com uma tarefa ignorada ficam de fora).",
+        'fontes': ['filas'],
+        'parametros': {'subpasta': '', 'tarefas_ignoradas': TAREFAS_IGNORADAS},
+        'sql': """
+            WITH linhas AS (
+                SELECT numeroProcesso, NomeTarefa, ordem
+                FROM filas
+                WHERE subpasta = $subpasta AND numeroProcesso IS NOT NULL
+            ),
+            repetidos AS (
+                SELECT numeroProcesso FROM linhas GROUP BY numeroProcesso HAVING count(*) > 1
+            ),
+            tarefas AS (
+                SELECT numeroProcesso, NomeTarefa, min(ordem) AS primeira
+                FROM linhas SEMI JOIN repetidos USING (numeroProcesso)
+                GROUP BY numeroProcesso, NomeTarefa
+            )
+            SELECT numeroProcesso AS processoID,
+                   coalesce(string_agg(NomeTarefa, ', ' ORDER BY primeira), '') AS tarefasAssociadas
+            FROM tarefas
+            GROUP BY numeroProcesso
+            HAVING NOT (count(NomeTarefa) = 1
+                        AND list_contains($tarefas_ignoradas, max(NomeTarefa)))
+            ORDER BY processoID
+        """,
+    },
+    'resumo_filas': {
+        'descricao': "Quantidade de linhas e de processos distintos por subpasta e tarefa.",
+        'fontes': ['filas'],
+        'parametros': {},
+        'sql': """
+            SELECT subpasta, NomeTarefa, count(*) AS linhas, count(DISTINCT numeroProcesso) AS processos
+            FROM filas
+            GROUP BY ALL
+            ORDER BY subpasta, processos DESC
+        """,
+    },
+    'possiveis_obitos': {
+        'descricao': "Partes dos polos dos processos cujo nome normalizado está na base de óbitos.",
+        'fontes': ['processos', 'obitos'],
+        'parametros': {},
+        'sql': """
+            SELECT p.numeroProcesso, p.orgaoJulgador, o.NOME AS NOME_Obito, o.CPF, o.DT_NASCIMENTO,
+                   o.PAI, o.MAE, CASE pp.papel WHEN 0 THEN 'ATIVO' ELSE 'PASSIVO' END AS POLO
+            FROM processos_partes pp
+            JOIN obitos_nomes n ON n.chave = pp.chave
+            JOIN processos p ON p.rowid = pp.linha
+            JOIN obitos o ON o.rowid = n.linha
+            ORDER BY pp.linha, pp.papel, n.linha
+        """,
+    },
+    'apf_correspondencias': {
+        'descricao': "Partes do polo passivo do APF que aparecem em Ação Penal de ano posterior.",
+        'fontes': ['apf', 'acao_penal'],
+        'parametros': {'classe_excluida': 'AuPrFl'},
+        'sql': """
+            SELECT a.numeroProcesso AS numeroProcesso_APF,
+                   ano_cnj(a.numeroProcesso) AS Ano_APF,
+                   c.nomeTarefa,
+                   ano_cnj(c.numeroProcesso) AS "Ano_AÇÂO",
+                   c.numeroProcesso AS "numeroProcesso_AÇÂO",
+                   pa.nome AS "Polo Passivo",
+                   a.classeJudicial AS classeJudicial_APF,
+                   c.classeJudicial AS "classeJudicial_AÇÂO",
+                   c.assuntoPrincipal,
+                   c.poloAtivo,
+                   count(*) OVER (PARTITION BY pa.nome) = 1 AS PoloPassivo_Unico
+            FROM apf_partes pa
+            JOIN acao_penal_partes pc ON pc.chave = pa.chave
+            JOIN apf a ON a.rowid = pa.linha
+            JOIN acao_penal c ON c.rowid = pc.linha
+            WHERE ano_cnj(c.numeroProcesso) > ano_cnj(a.numeroProcesso)
+              AND c.classeJudicial IS DISTINCT FROM $classe_excluida
+            ORDER BY pa.linha, pc.linha
+        """,
+    },
+    'apf_nao_encontrados': {
+        'descricao': "Processos do APF sem nenhuma parte do polo passivo na Ação Penal.",
+        'fontes': ['apf', 'acao_penal'],
+        'parametros': {},
+        'sql': """
+            SELECT a.numeroProcesso AS numeroProcesso_APF, a.classeJudicial AS classeJudicial_APF,
+                   a."Polo Passivo", ano_cnj(a.numeroProcesso) AS Ano_APF
+            FROM apf a
+            WHERE NOT EXISTS (
+                SELECT 1 FROM apf_partes pa JOIN acao_penal_partes pc ON pc.chave = pa.chave
+                WHERE pa.linha = a.rowid
+            )
+            ORDER BY a.rowid
+        """,
+    },
+    'distribuicao_servidores': {
+        'descricao': "Servidor responsável por cada processo da planilha, pelo dígito verificador do número.",
+        'fontes': ['distribuicao', 'intervalos_servidores'],
+        'parametros': {},
+        'sql': """
+            SELECT d.*, dv_cnj(d.numeroProcesso) AS "Dígito", coalesce(i.servidor, 'Desconhecido') AS Servidor
+            FROM distribuicao d
+            LEFT JOIN intervalos_servidores i ON dv_cnj(d.numeroProcesso) BETWEEN i.inicio AND i.fim
+            ORDER BY d.rowid
+        """,
+    },
+}
+
+
+def parametros_consulta(nome, informados=None):
+    """Parâmetros da consulta: os padrões, sobrescritos pelos informados (só os que o SQL usa)."""
+    consulta = CONSULTAS[nome]
+    parametros = dict(consulta['parametros'])
+    desconhecidos = set(informados or {}) - set(parametros)
+    if desconhecidos:
+        raise ValueError(f"Parâmetros desconhecidos para '{nome}': {', '.join(sorted(desconhecidos))}")
+    parametros.update(informados or {})
+    return parametros
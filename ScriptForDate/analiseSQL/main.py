@@ -0,0 +1,138 @@
+"""
+Linha de comando do banco analítico (DuckDB) dos exports do PJe.
+
+Uso:
+    python main.py atualizar [--fonte filas --fonte processos] [--forcar]
+    python main.py tabelas
+    python main.py consultas
+    python main.py executar processos_repetidos --param subpasta="Crime Direção" --saida repetidos.xlsx
+    python main.py sql "SELECT orgaoJulgador, count(*) FROM processos GROUP BY ALL" --saida orgaos.csv
+    python main.py shell
+
+Antes de executar uma consulta, as fontes de que ela depende são atualizadas
+se os arquivos mudaram (--sem-atualizar usa o que já está no banco). O
+formato da saída vem da extensão (.xlsx, .csv, .parquet, .ndjson).
+"""
+import argparse
+import json
+import os
+import sys
+import time
+
+from banco import ARQUIVO_BANCO, ARQUIVO_FONTES, BancoPJe, duckdb
+from consultas import CONSULTAS, parametros_consulta
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.exportacao import exportar
+
+LINHAS_EXIBIDAS = 40
+
+
+def ler_parametro(texto):
+    """'nome=valor' -> (nome, valor); o valor é lido como JSON quando possível (listas, números)."""
+    nome, separador, valor = texto.partition('=')
+    if not separador:
+        raise argparse.ArgumentTypeError(f"parâmetro sem '=': {texto}")
+    try:
+        return nome, json.loads(valor)
+    except ValueError:
+        return nome, valor
+
+
+def mostrar_ou_salvar(relacao, saida=None):
+    inicio = time.perf_counter()
+    if saida:
+        df = relacao.df()
+        exportar(df, saida)
+        print(f"{len(df)} linhas salvas em {saida} ({time.perf_counter() - inicio:.2f} s).")
+    else:
+        relacao.show(max_rows=LINHAS_EXIBIDAS)
+
+
+def executar_shell(banco):
+    """Consultas ad-hoc: comandos terminados em ';'. .tabelas, .consultas e .sair também funcionam."""
+    print("Digite SQL terminado em ';' (.tabelas, .consultas, .sair).")
+    comando = []
+    while True:
+        try:
+            linha = input('pje> ' if not comando else '...> ')
+        except EOFError:
+            break
+        if not comando and linha.strip() in ('.sair', '.exit', '.quit'):
+            break
+        if not comando and linha.strip() == '.tabelas':
+            print(banco.tabelas().to_string(index=False))
+            continue
+        if not comando and linha.strip() == '.consultas':
+            for nome, consulta in CONSULTAS.items():
+                print(f"{nome}: {consulta['descricao']}")
+            continue
+        comando.append(linha)
+        if linha.rstrip().endswith(';'):
+            try:
+                relacao = banco.sql('\n'.join(comando))
+                if relacao is not None:
+                    mostrar_ou_salvar(relacao)
+            except duckdb.Error as e:
+                print(f"Erro: {e}")
+            comando = []
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--banco', default=ARQUIVO_BANCO, help="Arquivo do banco DuckDB.")
+    parser.add_argument('--fontes', default=ARQUIVO_FONTES, help="Descrição das fontes (JSON).")
+    parser.add_argument('--threads', type=int, default=None, help="Threads do DuckDB (padrão: todos os núcleos).")
+    comandos = parser.add_subparsers(dest='comando', required=True)
+
+    atualizar = comandos.add_parser('atualizar', help="Carrega as fontes novas ou alteradas.")
+    atualizar.add_argument('--fonte', action='append', help="Fonte a atualizar (pode repetir).")
+    atualizar.add_argument('--forcar', action='store_true', help="Recarrega mesmo sem mudanças.")
+
+    comandos.add_parser('tabelas', help="Lista as tabelas do banco.")
+    comandos.add_parser('consultas', help="Lista as consultas prontas e seus parâmetros.")
+
+    executar = comandos.add_parser('executar', help="Executa uma consulta pronta.")
+    executar.add_argument('nome', choices=sorted(CONSULTAS))
+    executar.add_argument('--param', action='append', type=ler_parametro, default=[],
+                          help="Parâmetro nome=valor (valor em JSON para listas).")
+    executar.add_argument('--saida', default=None)
+    executar.add_argument('--sem-atualizar', action='store_true')
+
+    sql = comandos.add_parser('sql', help="Executa uma consulta SQL ad-hoc.")
+    sql.add_argument('consulta')
+    sql.add_argument('--saida', default=None)
+
+    comandos.add_parser('shell', help="Modo interativo.")
+    args = parser.parse_args()
+
+    if args.comando == 'consultas':
+        for nome, consulta in CONSULTAS.items():
+            print(f"{nome}\n    {consulta['descricao']}\n    fontes: {', '.join(consulta['fontes'])}")
+            for parametro, valor in consulta['parametros'].items():
+                print(f"    --param {parametro}={json.dumps(valor, ensure_ascii=False)}")
+        return
+
+    with BancoPJe(args.banco, args.fontes, threads=args.threads) as banco:
+        try:
+            if args.comando == 'atualizar':
+                carregadas = banco.atualizar(args.fonte, forcar=args.forcar)
+                print(f"Fontes carregadas: {', '.join(carregadas)}" if carregadas else "Nenhuma fonte mudou.")
+            elif args.comando == 'tabelas':
+                print(banco.tabelas().to_string(index=False))
+            elif args.comando == 'executar':
+                consulta = CONSULTAS[args.nome]
+                if not args.sem_atualizar:
+                    banco.atualizar(consulta['fontes'])
+                parametros = parametros_consulta(args.nome, dict(args.param))
+                mostrar_ou_salvar(banco.sql(consulta['sql'], parametros), args.saida)
+            elif args.comando == 'sql':
+                mostrar_ou_salvar(banco.sql(args.consulta), args.saida)
+            elif args.comando == 'shell':
+                executar_shell(banco)
+        except (duckdb.Error, ValueError) as e:
+            sys.exit(f"Erro: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,7 @@
+"""
+Módulos compartilhados pelos scripts de ScriptForDate.
+
+Os scripts continuam sendo executados a partir das suas próprias pastas; para
+usar estes módulos, cada script acrescenta a pasta ScriptForDate ao sys.path
+antes de importar `comum`.
+"""
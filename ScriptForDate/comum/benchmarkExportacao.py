@@ -0,0 +1,139 @@
+"""
+Benchmark da exportação de tabelas: comum.exportacao x pandas.
+
+Gera uma tabela sintética no formato das saídas dos scripts (números de
+processo, nomes, classes, datas, anos e similaridades) e mede o tempo e o
+pico de memória (RSS) de cada forma de gravação. Cada medição roda em um
+processo separado, para que o pico de memória de uma não contamine a outra.
+
+Uso:
+    python benchmarkExportacao.py --linhas 500000 --repeticoes 3 --saida benchmark_exportacao.json
+"""
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+PASTA_SCRIPT = os.path.dirname(os.path.abspath(__file__))
+
+sys.path.insert(0, os.path.abspath(os.path.join(PASTA_SCRIPT, '..')))
+from comum.exportacao import exportar, exportar_excel
+from comum.progresso import pico_memoria_mb
+
+NOMES = ["JOSE", "MARIA", "ANTONIO", "ANA", "FRANCISCO", "FRANCISCA", "CARLOS", "ADRIANA", "PAULO", "JULIANA"]
+SOBRENOMES = ["SILVA", "SANTOS", "OLIVEIRA", "SOUZA", "RODRIGUES", "FERREIRA", "ALVES", "PEREIRA", "LIMA", "GOMES"]
+CLASSES = ["AÇÃO PENAL - PROCEDIMENTO ORDINÁRIO", "AUTO DE PRISÃO EM FLAGRANTE", "INQUÉRITO POLICIAL",
+           "EXECUÇÃO DA PENA", "MEDIDAS PROTETIVAS DE URGÊNCIA"]
+
+
+def gerar_tabela(linhas, semente=0):
+    """Tabela sintética com texto, inteiros, números com nulos, datas e booleanos."""
+    rng = np.random.default_rng(semente)
+    sequencial = rng.integers(0, 10**7, linhas)
+    anos = rng.integers(2005, 2025, linhas)
+    numero = pd.Series([f"{s:07d}-{d:02d}.{a}.8.05.0216" for s, d, a in
+                        zip(sequencial, rng.integers(0, 100, linhas), anos)], dtype='string')
+    nomes = (pd.Series(rng.choice(NOMES, linhas)) + ' ' + pd.Series(rng.choice(SOBRENOMES, linhas))
+             + ' ' + pd.Series(rng.choice(SOBRENOMES, linhas))).astype('string')
+    similaridade = np.round(rng.uniform(85, 100, linhas), 1)
+    similaridade[rng.random(linhas) < 0.2] = np.nan
+    return pd.DataFrame({
+        'numeroProcesso': numero,
+        'Ano': anos,
+        'classeJudicial': pd.Series(rng.choice(CLASSES, linhas), dtype='string'),
+        'Polo Passivo': nomes,
+        'Similaridade': similaridade,
+        'Distribuição': pd.Timestamp('2020-01-01') + pd.to_timedelta(rng.integers(0, 1800, linhas), unit='D'),
+        'PoloPassivo_Unico': rng.random(linhas) < 0.5,
+    })
+
+
+def _pandas_excel(df, destino):
+    with pd.ExcelWriter(destino) as writer:
+        df.to_excel(writer, index=False, sheet_name='Dados')
+
+
+# método: (extensão, função de gravação, só colunas de texto?)
+# Os CSVs dos scripts são gravados a partir de tabelas lidas com dtype=str, daí a versão só com texto
+METODOS = {
+    'xlsx_pandas': ('.xlsx', _pandas_excel, False),
+    'xlsx_exportacao': ('.xlsx', lambda df, destino: exportar_excel(df, destino), False),
+    'xlsx_xlsxwriter': ('.xlsx', lambda df, destino: exportar_excel(df, destino, motor='xlsxwriter'), False),
+    'csv_pandas': ('.csv', lambda df, destino: df.to_csv(destino, index=False), True),
+    'csv_exportacao': ('.csv', lambda df, destino: exportar(df, destino), True),
+    'parquet_exportacao': ('.parquet', lambda df, destino: exportar(df, destino), False),
+    'ndjson_exportacao': ('.ndjson', lambda df, destino: exportar(df, destino), False),
+}
+
+
+def _medir(metodo, linhas, fila):
+    extensao, gravar, somente_texto = METODOS[metodo]
+    df = gerar_tabela(linhas)
+    if somente_texto:
+        df = df.astype('string')
+    memoria_inicial = pico_memoria_mb()
+    with tempfile.TemporaryDirectory() as pasta:
+        destino = os.path.join(pasta, f"saida{extensao}")
+        inicio = time.perf_counter()
+        gravar(df, destino)
+        segundos = time.perf_counter() - inicio
+        tamanho = os.path.getsize(destino)
+    fila.put({'segundos': segundos, 'tamanho_mb': tamanho / 2**20,
+              'pico_mb': pico_memoria_mb(), 'pico_inicial_mb': memoria_inicial})
+
+
+def medir(metodo, linhas):
+    """Executa uma gravação em um processo novo e devolve tempo, tamanho e pico de memória."""
+    fila = multiprocessing.Queue()
+    processo = multiprocessing.Process(target=_medir, args=(metodo, linhas, fila))
+    processo.start()
+    resultado = fila.get()
+    processo.join()
+    return resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--linhas', type=int, default=500_000)
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--metodos', default=','.join(METODOS),
+                        help="Métodos separados por vírgula (padrão: todos).")
+    parser.add_argument('--saida', default=None, help="Arquivo JSON com os resultados.")
+    args = parser.parse_args()
+
+    resultados = {}
+    for metodo in args.metodos.split(','):
+        medicoes = [medir(metodo, args.linhas) for _ in range(args.repeticoes)]
+        segundos = sorted(m['segundos'] for m in medicoes)
+        resultados[metodo] = {
+            'linhas': args.linhas,
+            'segundos_mediana': segundos[len(segundos) // 2],
+            'segundos_min': segundos[0],
+            'linhas_por_segundo': args.linhas / segundos[len(segundos) // 2],
+            'tamanho_mb': medicoes[0]['tamanho_mb'],
+            'pico_mb': max(m['pico_mb'] for m in medicoes),
+            'pico_inicial_mb': max(m['pico_inicial_mb'] for m in medicoes),
+        }
+        r = resultados[metodo]
+        print(f"{metodo:<20} {r['segundos_mediana']:8.2f} s  {r['linhas_por_segundo']:>10,.0f} linhas/s  "
+              f"{r['tamanho_mb']:7.1f} MB  pico {r['pico_mb']:7.0f} MB")
+
+    for formato in ('xlsx', 'csv'):
+        base, novo = resultados.get(f'{formato}_pandas'), resultados.get(f'{formato}_exportacao')
+        if base and novo:
+            print(f"{formato}: {base['segundos_mediana'] / novo['segundos_mediana']:.1f}x mais rápido que o pandas")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"Resultados salvos em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
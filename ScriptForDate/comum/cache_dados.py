@@ -0,0 +1,194 @@
+"""
+Cache de pré-processamento dos arquivos de entrada.
+
+O DataFrame já normalizado é gravado em Feather (Arrow IPC, sem compressão),
+identificado pela impressão digital do arquivo de origem (tamanho, mtime e
+hash do conteúdo) e pela versão da normalização. Nas execuções seguintes a
+cópia em cache é aberta por memory-map, sem chardet, read_csv ou normalização.
+"""
+import hashlib
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # sem pyarrow o cache fica desativado
+    pa = None
+    feather = None
+
+# Pasta do cache (pode ser alterada pela variável de ambiente PJE_CACHE_DIR)
+DIR_CACHE_PADRAO = os.environ.get(
+    "PJE_CACHE_DIR",
+    os.path.join(os.path.expanduser("~"), ".cache", "central-automacao-pje")
+)
+
+# Colunas de texto com proporção de valores distintos abaixo deste limite
+# são gravadas como categóricas (dicionário Arrow)
+LIMITE_CATEGORICA = 0.5
+
+
+def log(message):
+    """Função simples para exibir mensagens de log."""
+    print(f"[CACHE] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}")
+
+
+def _ler_indice(dir_cache):
+    caminho_indice = os.path.join(dir_cache, "indice.json")
+    if os.path.exists(caminho_indice):
+        try:
+            with open(caminho_indice, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+    return {}
+
+
+def _gravar_indice(dir_cache, indice):
+    caminho_indice = os.path.join(dir_cache, "indice.json")
+    # Um temporário por processo: os scripts com pool de processos gravam o índice ao mesmo tempo
+    temporario = f"{caminho_indice}.{os.getpid()}.tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(indice, f, indent=2, ensure_ascii=False)
+    os.replace(temporario, caminho_indice)
+
+
+def impressao_digital(caminho, dir_cache=None, tamanho_bloco=1 << 20):
+    """
+    Retorna a impressão digital do arquivo: tamanho, mtime e hash do conteúdo.
+    O hash só é recalculado quando o tamanho ou o mtime mudam.
+    """
+    dir_cache = dir_cache or DIR_CACHE_PADRAO
+    os.makedirs(dir_cache, exist_ok=True)
+
+    caminho_abs = os.path.abspath(caminho)
+    info = os.stat(caminho_abs)
+    indice = _ler_indice(dir_cache)
+    arquivos = indice.setdefault("arquivos", {})
+
+    anterior = arquivos.get(caminho_abs)
+    if anterior and anterior["tamanho"] == info.st_size and anterior["mtime"] == info.st_mtime_ns:
+        return anterior
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho_abs, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+
+    digital = {"tamanho": info.st_size, "mtime": info.st_mtime_ns, "hash": h.hexdigest()}
+    arquivos[caminho_abs] = digital
+    _gravar_indice(dir_cache, indice)
+    return digital
+
+
+def chave_cache(digital, versao, parametros=None):
+    """Monta a chave do cache a partir do hash do conteúdo, da versão e dos parâmetros."""
+    base = json.dumps(
+        {"hash": digital["hash"], "versao": versao, "parametros": parametros or {}},
+        sort_keys=True, default=str
+    )
+    return hashlib.blake2b(base.encode("utf-8"), digest_size=16).hexdigest()
+
+
+def _para_tabela_arrow(df, categorizar=True):
+    """Converte o DataFrame para Arrow, gravando colunas repetitivas como dicionário."""
+    df = df.copy()
+    if categorizar and len(df):
+        for coluna in df.columns:
+            if df[coluna].dtype == object or isinstance(df[coluna].dtype, pd.StringDtype):
+                distintos = df[coluna].nunique(dropna=True)
+                if distintos / len(df) < LIMITE_CATEGORICA:
+                    df[coluna] = df[coluna].astype("category")
+    return pa.Table.from_pandas(df, preserve_index=False)
+
+
+def _esquema_sem_nulos(esquema):
+    """
+    Troca por texto as colunas de tipo null (só valores nulos no primeiro chunk),
+    para que os chunks seguintes com valores possam ser convertidos ao esquema.
+    """
+    campos = [campo.with_type(pa.string()) if pa.types.is_null(campo.type) else campo for campo in esquema]
+    return pa.schema(campos, metadata=esquema.metadata)
+
+
+def _gravar_feather(resultado, destino):
+    """Grava um DataFrame ou um iterador de DataFrames (chunks) em Feather sem compressão."""
+    temporario = destino + ".tmp"
+    if isinstance(resultado, pd.DataFrame):
+        feather.write_feather(_para_tabela_arrow(resultado), temporario, compression="uncompressed")
+    else:
+        escritor = None
+        esquema = None
+        try:
+            for chunk in resultado:
+                tabela = pa.Table.from_pandas(chunk, preserve_index=False)
+                if escritor is None:
+                    esquema = _esquema_sem_nulos(tabela.schema)
+                    escritor = pa.ipc.new_file(temporario, esquema)
+                escritor.write_table(tabela.cast(esquema))
+        finally:
+            if escritor is not None:
+                escritor.close()
+        if escritor is None:
+            raise ValueError("Nenhum dado retornado para gravar no cache.")
+    os.replace(temporario, destino)
+
+
+def ler_tabela_com_cache(caminho, preparar, versao, parametros=None, dir_cache=None):
+    """
+    Retorna a tabela Arrow (memory-mapped) com o resultado de `preparar(caminho)`.
+
+    `preparar` pode devolver um DataFrame ou um iterador de DataFrames; no
+    segundo caso os chunks são gravados um a um, sem montar o arquivo inteiro
+    em memória. Retorna None quando o pyarrow não está instalado.
+    """
+    if pa is None:
+        return None
+
+    dir_cache = dir_cache or DIR_CACHE_PADRAO
+    digital = impressao_digital(caminho, dir_cache)
+    chave = chave_cache(digital, versao, parametros)
+    destino = os.path.join(dir_cache, f"{chave}.feather")
+
+    if os.path.exists(destino):
+        log(f"Usando cache de '{caminho}' ({os.path.basename(destino)}).")
+    else:
+        log(f"Cache inexistente para '{caminho}'. Processando o arquivo original.")
+        _gravar_feather(preparar(caminho), destino)
+        with open(os.path.join(dir_cache, f"{chave}.json"), "w", encoding="utf-8") as f:
+            json.dump({
+                "origem": os.path.abspath(caminho),
+                "digital": digital,
+                "versao": versao,
+                "parametros": parametros or {},
+                "criado_em": datetime.now().isoformat(timespec="seconds"),
+            }, f, indent=2, ensure_ascii=False, default=str)
+        log(f"Cache gravado em {destino}.")
+
+    return feather.read_table(destino, memory_map=True)
+
+
+def tabela_para_dataframe(tabela):
+    """
+    Converte a tabela Arrow para pandas mantendo as strings em memória Arrow
+    (dtype string[pyarrow]) e os dicionários como categóricos.
+    """
+    tipos_string = {pa.string(): pd.StringDtype("pyarrow"), pa.large_string(): pd.StringDtype("pyarrow")}
+    return tabela.to_pandas(types_mapper=tipos_string.get)
+
+
+def carregar_com_cache(caminho, preparar, versao, parametros=None, dir_cache=None):
+    """
+    Retorna o DataFrame produzido por `preparar(caminho)`, lendo do cache
+    quando o arquivo de origem e a versão da normalização não mudaram.
+    """
+    tabela = ler_tabela_com_cache(caminho, preparar, versao, parametros, dir_cache)
+    if tabela is None:
+        resultado = preparar(caminho)
+        if not isinstance(resultado, pd.DataFrame):
+            resultado = pd.concat(list(resultado), ignore_index=True)
+        return resultado
+    return tabela_para_dataframe(tabela)
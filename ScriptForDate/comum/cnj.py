@@ -0,0 +1,151 @@
+"""
+Números de processo no padrão CNJ (Resolução CNJ 65/2008).
+
+    NNNNNNN-DD.AAAA.J.TR.OOOO
+    sequencial - dígito verificador . ano . segmento (J) . tribunal (TR) . origem
+
+As funções de coluna (extrair_cnj, validar_cnj, normalizar_cnj, ano_cnj)
+trabalham sobre uma Series do pandas ou um array do Arrow de uma vez só; as
+funções escalares (parse_numero, normalizar_numero, numero_valido,
+buscar_numero) têm cache e servem para os scrapers e para nomes de arquivo.
+
+Os números são aceitos formatados ou só com os 20 dígitos.
+
+Exemplo:
+    partes = extrair_cnj(df['numeroProcesso'])    # sequencial, dv, ano, segmento, tribunal, origem
+    df['valido'] = validar_cnj(df['numeroProcesso'])
+    normalizar_numero('00011767920138050216')     # '0001176-79.2013.8.05.0216'
+"""
+import re
+from collections import namedtuple
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+# Usado nas colunas; sem lookbehind, para funcionar também no motor de regex do Arrow
+PADRAO_CNJ = r'(?:^|\D)(\d{7})-?(\d{2})\.?(\d{4})\.?(\d)\.?(\d{2})\.?(\d{4})(?:\D|$)'
+
+RE_CNJ = re.compile(r'(?<!\d)(\d{7})-?(\d{2})\.?(\d{4})\.?(\d)\.?(\d{2})\.?(\d{4})(?!\d)')
+
+# Campos do número e tipo (inteiro com nulos) usado em cada um
+CAMPOS = {
+    'sequencial': 'Int32',
+    'dv': 'Int8',
+    'ano': 'Int16',
+    'segmento': 'Int8',
+    'tribunal': 'Int8',
+    'origem': 'Int16',
+}
+
+LARGURAS = {'sequencial': 7, 'dv': 2, 'ano': 4, 'segmento': 1, 'tribunal': 2, 'origem': 4}
+
+NumeroCNJ = namedtuple('NumeroCNJ', list(CAMPOS))
+
+
+def calcular_dv(sequencial, ano, segmento, tribunal, origem):
+    """
+    Dígito verificador (módulo 97, ISO 7064) de arrays de campos.
+
+    O número NNNNNNN AAAA J TR OOOO 00 é reduzido em três etapas para caber em
+    64 bits: R1 = N % 97; R2 = (R1 AAAAJTR) % 97; R3 = (R2 OOOO00) % 97; DV = 98 - R3.
+    """
+    r1 = np.asarray(sequencial, dtype=np.int64) % 97
+    ano_justica_tribunal = (np.asarray(ano, dtype=np.int64) * 1000
+                            + np.asarray(segmento, dtype=np.int64) * 100
+                            + np.asarray(tribunal, dtype=np.int64))
+    r2 = (r1 * 10**7 + ano_justica_tribunal) % 97
+    r3 = (r2 * 10**6 + np.asarray(origem, dtype=np.int64) * 100) % 97
+    return 98 - r3
+
+
+def _como_series(numeros):
+    if hasattr(numeros, 'to_pandas'):  # pa.Array / pa.ChunkedArray
+        numeros = numeros.to_pandas()
+    return pd.Series(numeros) if not isinstance(numeros, pd.Series) else numeros
+
+
+def extrair_cnj(numeros):
+    """
+    Separa uma coluna de números de processo nos campos do padrão CNJ.
+
+    :return: DataFrame com as colunas sequencial, dv, ano, segmento, tribunal e
+             origem (inteiros com nulos); valores fora do padrão ficam nulos.
+    """
+    numeros = _como_series(numeros)
+    grupos = numeros.astype('string').str.extract(PADRAO_CNJ)
+    grupos.columns = list(CAMPOS)
+    return pd.DataFrame({
+        campo: pd.to_numeric(grupos[campo]).astype(tipo) for campo, tipo in CAMPOS.items()
+    }, index=numeros.index)
+
+
+def validar_cnj(numeros):
+    """True onde o número está no padrão CNJ e o dígito verificador confere."""
+    partes = extrair_cnj(numeros)
+    encontrado = partes['sequencial'].notna().to_numpy()
+    preenchidas = partes.fillna(0)
+    esperado = calcular_dv(*(preenchidas[campo].to_numpy() for campo in
+                             ('sequencial', 'ano', 'segmento', 'tribunal', 'origem')))
+    return pd.Series(encontrado & (preenchidas['dv'].to_numpy() == esperado), index=partes.index)
+
+
+def formatar_cnj(partes):
+    """Monta NNNNNNN-DD.AAAA.J.TR.OOOO a partir do DataFrame de extrair_cnj (nulos ficam nulos)."""
+    texto = {campo: partes[campo].astype('string').str.zfill(largura) for campo, largura in LARGURAS.items()}
+    return (texto['sequencial'] + '-' + texto['dv'] + '.' + texto['ano'] + '.'
+            + texto['segmento'] + '.' + texto['tribunal'] + '.' + texto['origem'])
+
+
+def normalizar_cnj(numeros):
+    """Reescreve a coluna no formato NNNNNNN-DD.AAAA.J.TR.OOOO; fora do padrão vira nulo."""
+    return formatar_cnj(extrair_cnj(numeros))
+
+
+def ano_cnj(numeros):
+    """Ano de ajuizamento de cada número (inteiro com nulos)."""
+    return extrair_cnj(numeros)['ano']
+
+
+@lru_cache(maxsize=65536)
+def parse_numero(texto):
+    """Primeiro número CNJ encontrado em `texto`, como NumeroCNJ, ou None."""
+    match = RE_CNJ.search(str(texto))
+    return NumeroCNJ(*map(int, match.groups())) if match else None
+
+
+def formatar_numero(numero):
+    """Formata um NumeroCNJ como NNNNNNN-DD.AAAA.J.TR.OOOO."""
+    return (f"{numero.sequencial:07d}-{numero.dv:02d}.{numero.ano:04d}."
+            f"{numero.segmento}.{numero.tribunal:02d}.{numero.origem:04d}")
+
+
+@lru_cache(maxsize=65536)
+def normalizar_numero(texto):
+    """Número formatado a partir de um texto (formatado ou só dígitos), ou None."""
+    numero = parse_numero(texto)
+    return formatar_numero(numero) if numero else None
+
+
+def numero_valido(texto):
+    """True se `texto` contém um número CNJ com dígito verificador correto."""
+    numero = parse_numero(texto)
+    if numero is None:
+        return False
+    return numero.dv == int(calcular_dv(numero.sequencial, numero.ano, numero.segmento,
+                                        numero.tribunal, numero.origem))
+
+
+@lru_cache(maxsize=65536)
+def buscar_numero(texto, sufixo=None):
+    """
+    Primeiro número CNJ de `texto` (ex.: nome de arquivo), já formatado.
+
+    :param sufixo: Se informado (ex.: '8.05.0216'), só aceita números que
+                   terminam com esse segmento/tribunal/origem.
+    """
+    for match in RE_CNJ.finditer(str(texto)):
+        numero = formatar_numero(NumeroCNJ(*map(int, match.groups())))
+        if sufixo is None or numero.endswith(sufixo):
+            return numero
+    return None
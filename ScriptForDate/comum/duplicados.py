@@ -0,0 +1,96 @@
+"""
+Análise de processos repetidos nas filas de tarefas, por operações sobre arrays.
+
+Regra (a mesma dos scripts de processoDuplicadosFilas): um processo é
+repetido quando aparece em mais de uma linha; as tarefas distintas dele são
+listadas na ordem da primeira ocorrência, separadas por ", ", e o processo é
+descartado quando tem uma única tarefa e ela está entre as ignoradas.
+Processos repetidos cujas tarefas são todas nulas ficam com a lista vazia ('').
+
+Em vez de uma função Python por grupo, NomeTarefa é codificado como
+categórico e cada processo como um código inteiro (ordenado pelo número do
+processo). Os pares distintos (processo, tarefa) saem de um np.unique sobre
+os códigos combinados, a regra das ignoradas é uma máscara sobre as
+categorias e o texto só é montado no final, uma posição da lista por vez.
+
+Exemplo:
+    resultado = processos_repetidos(df['numeroProcesso'], df['NomeTarefa'], ["Arquivo definitivo"])
+"""
+import numpy as np
+import pandas as pd
+
+SEPARADOR_TAREFAS = ', '
+
+
+def codificar_tarefas(tarefas):
+    """NomeTarefa como categórico (códigos int e uma cópia de cada nome); nulos ficam com código -1."""
+    if isinstance(tarefas, pd.Categorical):
+        return tarefas
+    if isinstance(getattr(tarefas, 'dtype', None), pd.CategoricalDtype):
+        return pd.Categorical(tarefas)
+    return pd.Categorical(np.asarray(tarefas, dtype=object))
+
+
+def _juntar_tarefas(processo, tarefa, nomes, quantidade_processos):
+    """
+    Monta o texto das tarefas de cada processo a partir dos pares já ordenados.
+
+    Cada passada acrescenta a k-ésima tarefa de todos os processos de uma vez;
+    o número de passadas é o maior número de tarefas distintas de um processo.
+    """
+    texto = np.full(quantidade_processos, '', dtype=object)
+    if len(processo) == 0:
+        return texto
+    inicio_grupo = np.flatnonzero(np.r_[True, processo[1:] != processo[:-1]])
+    tamanho_grupo = np.diff(np.r_[inicio_grupo, len(processo)])
+    posicao_no_grupo = np.arange(len(processo)) - np.repeat(inicio_grupo, tamanho_grupo)
+    for k in range(tamanho_grupo.max()):
+        selecionados = posicao_no_grupo == k
+        alvo = processo[selecionados]
+        nome = nomes[tarefa[selecionados]]
+        texto[alvo] = nome if k == 0 else texto[alvo] + SEPARADOR_TAREFAS + nome
+    return texto
+
+
+def processos_repetidos(numeros, tarefas, tarefas_ignoradas=(), linhas=None):
+    """
+    Processos repetidos e as tarefas associadas.
+
+    :param numeros: numeroProcesso de cada linha, na ordem dos arquivos (nulos são descartados).
+    :param tarefas: NomeTarefa de cada linha (texto ou categórico).
+    :param tarefas_ignoradas: Tarefas que, sozinhas, não tornam o processo relevante.
+    :param linhas: Quantas linhas originais cada linha representa (padrão: 1), para
+                   entradas já agregadas por (processo, tarefa), como o índice incremental.
+    :return: DataFrame com "numeroProcesso" e "tarefas", ordenado pelo número do processo.
+    """
+    numeros = pd.Series(numeros).reset_index(drop=True)
+    categorico = codificar_tarefas(tarefas)
+    validos = numeros.notna().to_numpy()
+
+    codigo_processo, processos = pd.factorize(numeros[validos], sort=True)
+    codigo_tarefa = categorico.codes[validos]
+    pesos = None if linhas is None else np.asarray(linhas, dtype=np.int64)[validos]
+    total_linhas = np.bincount(codigo_processo, weights=pesos, minlength=len(processos))
+    repetido = total_linhas > 1
+
+    # Pares distintos (processo, tarefa) dos processos repetidos, na ordem da primeira ocorrência
+    posicao = np.flatnonzero(repetido[codigo_processo] & (codigo_tarefa >= 0))
+    chave = codigo_processo[posicao].astype(np.int64) * len(categorico.categories) + codigo_tarefa[posicao]
+    _, primeira = np.unique(chave, return_index=True)
+    posicao = np.sort(posicao[primeira])
+    ordem = np.argsort(codigo_processo[posicao], kind='stable')
+    par_processo = codigo_processo[posicao][ordem]
+    par_tarefa = codigo_tarefa[posicao][ordem].astype(np.int64)
+
+    # Regra das ignoradas: uma única tarefa distinta, e ela é ignorada
+    quantidade = np.bincount(par_processo, minlength=len(processos))
+    primeira_tarefa = np.full(len(processos), -1, dtype=np.int64)
+    primeira_tarefa[par_processo[::-1]] = par_tarefa[::-1]
+    # A posição extra no fim (índice -1) é a dos processos sem nenhuma tarefa
+    ignorada = np.append(categorico.categories.isin(list(tarefas_ignoradas)), False)
+    descartado = (quantidade == 1) & ignorada[primeira_tarefa]
+
+    nomes = np.asarray(categorico.categories, dtype=object)
+    texto = _juntar_tarefas(par_processo, par_tarefa, nomes, len(processos))
+    manter = repetido & ~descartado
+    return pd.DataFrame({'numeroProcesso': np.asarray(processos)[manter], 'tarefas': texto[manter]})
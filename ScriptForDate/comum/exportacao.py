@@ -0,0 +1,511 @@
+"""
+Exportação de tabelas (XLSX, CSV, Parquet e NDJSON) usada por todos os scripts.
+
+O XLSX é gravado em streaming, com memória constante: o XML de cada aba é
+gerado por coluna, em blocos de linhas (operações de texto do pandas sobre o
+bloco inteiro, e não célula a célula), e escrito direto no zip do pacote.
+Abas com mais linhas do que o limite do Excel (1.048.576 linhas, contando o
+cabeçalho) continuam em abas extras ("Correspondências (2)", ...). A largura
+das colunas é estimada a partir de uma amostra das primeiras linhas, e não da
+coluna inteira. O xlsxwriter (modo constant_memory) continua disponível com
+motor='xlsxwriter'.
+
+O CSV é gravado pelo pyarrow quando todas as colunas são texto, inteiros ou
+categorias, e a gravação é bem mais rápida. O arquivo não é idêntico byte a
+byte ao do pandas: o pyarrow põe entre aspas o cabeçalho e todo valor de texto,
+e o pandas só os que têm separador, aspas ou quebra de linha. Lido de volta
+(pandas, Excel), o conteúdo é o mesmo. Nos demais casos o CSV é gravado pelo
+pandas, para manter a formatação dos números com casas decimais, datas e
+booleanos.
+
+Exemplo:
+    exportar_excel({'Correspondências': df1, 'Não Encontrados': df2}, 'saida.xlsx')
+    exportar(df, 'saida.parquet')                 # formato pela extensão
+    dados = excel_em_bytes(df, 'Resultado')       # para downloads (Streamlit)
+"""
+import codecs
+import contextlib
+import io
+import os
+import shutil
+import zipfile
+from datetime import datetime
+from xml.sax.saxutils import escape
+
+import numpy as np
+import pandas as pd
+
+try:
+    import xlsxwriter
+except ImportError:  # sem xlsxwriter só o motor 'xml' fica disponível
+    xlsxwriter = None
+
+try:
+    import pyarrow as pa
+    import pyarrow.csv as pa_csv
+    import pyarrow.parquet as pq
+except ImportError:  # sem pyarrow o CSV é gravado pelo pandas e não há Parquet
+    pa = None
+
+# Limite de linhas de uma aba do Excel (inclui o cabeçalho)
+LIMITE_LINHAS_EXCEL = 1_048_576
+LIMITE_NOME_ABA = 31
+LIMITE_TEXTO_CELULA = 32_767
+CARACTERES_INVALIDOS_ABA = str.maketrans({c: '_' for c in '[]:*?/\\'})
+CARACTERES_CONTROLE = r'[\x00-\x08\x0b\x0c\x0e-\x1f]'
+
+# Linhas convertidas de cada vez
+TAMANHO_BLOCO = 50_000
+
+# Linhas usadas para estimar a largura das colunas
+AMOSTRA_LARGURA = 1_000
+LARGURA_MAXIMA = 60
+
+# Compressão do zip: o nível 1 já reduz bem o XML repetitivo e é bem mais rápido que o padrão (6)
+NIVEL_COMPRESSAO = 1
+
+FORMATO_DATA_HORA = 'yyyy-mm-dd hh:mm:ss'
+EPOCA_EXCEL = pd.Timestamp('1899-12-30')
+
+ASPAS_XML = {'"': '&quot;'}
+XML_DECLARACAO = '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+NS_PLANILHA = 'http://schemas.openxmlformats.org/spreadsheetml/2006/main'
+NS_RELACOES = 'http://schemas.openxmlformats.org/package/2006/relationships'
+TIPO_RELACAO = 'http://schemas.openxmlformats.org/officeDocument/2006/relationships'
+
+# Estilos: 0 = padrão, 1 = cabeçalho em negrito, 2 = data e hora
+ESTILO_NEGRITO = 1
+ESTILO_DATA = 2
+ESTILOS_XML = (
+    f'<styleSheet xmlns="{NS_PLANILHA}">'
+    f'<numFmts count="1"><numFmt numFmtId="164" formatCode="{FORMATO_DATA_HORA}"/></numFmts>'
+    '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+    '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+    '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+    '<fill><patternFill patternType="gray125"/></fill></fills>'
+    '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+    '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+    '<cellXfs count="3"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+    '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/>'
+    '<xf numFmtId="164" fontId="0" fillId="0" borderId="0" xfId="0" applyNumberFormat="1"/></cellXfs>'
+    '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+    '</styleSheet>'
+)
+
+EXTENSOES = {
+    '.xlsx': 'xlsx',
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.ndjson': 'ndjson',
+    '.jsonl': 'ndjson',
+}
+
+
+def _como_abas(dados, nome_aba):
+    """Aceita um DataFrame ou um dicionário {nome da aba: DataFrame}."""
+    if isinstance(dados, pd.DataFrame):
+        return {nome_aba: dados}
+    return dict(dados)
+
+
+def nomes_abas(nome, quantidade):
+    """Nomes das abas de uma tabela dividida em `quantidade` partes, dentro do limite de 31 caracteres."""
+    nome = str(nome).translate(CARACTERES_INVALIDOS_ABA)[:LIMITE_NOME_ABA] or 'Planilha'
+    nomes = [nome]
+    for numero in range(2, quantidade + 1):
+        sufixo = f' ({numero})'
+        nomes.append(nome[:LIMITE_NOME_ABA - len(sufixo)] + sufixo)
+    return nomes
+
+
+def nome_unico(nome, usados):
+    """
+    Nome da aba sem repetir os de `usados` (em minúsculas: o Excel não diferencia
+    maiúsculas). As repetições ganham " (2)", " (3)"... dentro do limite de 31
+    caracteres; o nome escolhido é acrescentado a `usados`.
+    """
+    candidato = nome
+    numero = 1
+    while candidato.lower() in usados:
+        numero += 1
+        sufixo = f' ({numero})'
+        candidato = nome[:LIMITE_NOME_ABA - len(sufixo)] + sufixo
+    usados.add(candidato.lower())
+    return candidato
+
+
+def dividir_abas(df, nome, linhas_por_aba=LIMITE_LINHAS_EXCEL - 1, usados=None):
+    """
+    Divide a tabela em fatias de até `linhas_por_aba` linhas: lista de (nome da aba, início, fim).
+
+    :param usados: Nomes de aba já usados no arquivo (ver nome_unico); se informado, os
+                   nomes das fatias não repetem nenhum deles e são acrescentados a ele.
+    """
+    quantidade = max(1, -(-len(df) // linhas_por_aba))
+    nomes = nomes_abas(nome, quantidade)
+    if usados is not None:
+        nomes = [nome_unico(aba, usados) for aba in nomes]
+    return [(aba, i * linhas_por_aba, min(len(df), (i + 1) * linhas_por_aba))
+            for i, aba in enumerate(nomes)]
+
+
+def larguras_colunas(df, amostra=AMOSTRA_LARGURA, largura_maxima=LARGURA_MAXIMA):
+    """Largura de cada coluna estimada pelo cabeçalho e pelas primeiras `amostra` linhas."""
+    inicio = df.head(amostra)
+    larguras = []
+    for posicao, coluna in enumerate(df.columns):
+        valores = inicio.iloc[:, posicao]
+        maior = valores.dropna().astype(str).str.len().max() if len(valores) else 0
+        maior = 0 if pd.isna(maior) else int(maior)
+        larguras.append(min(max(len(str(coluna)), maior) + 2, largura_maxima))
+    return larguras
+
+
+def _sem_fuso(serie):
+    return serie.dt.tz_localize(None) if isinstance(serie.dtype, pd.DatetimeTZDtype) else serie
+
+
+def _eh_data(tipo):
+    return tipo.kind == 'M' or isinstance(tipo, pd.DatetimeTZDtype)
+
+
+def _texto_xml(texto):
+    """Escapa uma coluna de texto para o XML da planilha (sem caracteres de controle, até 32.767 caracteres)."""
+    return (texto.str.slice(0, LIMITE_TEXTO_CELULA)
+            .str.replace(CARACTERES_CONTROLE, '', regex=True)
+            .str.replace('&', '&amp;', regex=False)
+            .str.replace('<', '&lt;', regex=False)
+            .str.replace('>', '&gt;', regex=False))
+
+
+def _celula_objeto(referencia, valor):
+    """XML de uma célula de coluna com tipos misturados (valor a valor)."""
+    if valor is None or valor is pd.NA or valor is pd.NaT:
+        return ''
+    if isinstance(valor, (bool, np.bool_)):
+        return f'<c r="{referencia}" t="b"><v>{int(valor)}</v></c>'
+    if isinstance(valor, (int, float, np.integer, np.floating)):
+        return f'<c r="{referencia}"><v>{valor!r}</v></c>' if np.isfinite(valor) else ''
+    if isinstance(valor, datetime):
+        serial = (pd.Timestamp(valor).tz_localize(None) - EPOCA_EXCEL) / pd.Timedelta(days=1)
+        return f'<c r="{referencia}" s="{ESTILO_DATA}"><v>{serial!r}</v></c>'
+    texto = _texto_xml(pd.Series([str(valor)], dtype='string'))[0]
+    return f'<c r="{referencia}" t="inlineStr"><is><t xml:space="preserve">{texto}</t></is></c>'
+
+
+def _celulas_xml(serie, referencias):
+    """
+    XML das células de uma coluna, calculado para o bloco inteiro de uma vez.
+
+    :param referencias: Referências das células (ex.: "B2", "B3"...), alinhadas com `serie`.
+    :return: Series de texto; células nulas ficam vazias (não são gravadas).
+    """
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        serie = serie.astype(serie.cat.categories.dtype)
+    tipo = serie.dtype
+    if tipo.kind == 'b':
+        valores = serie.astype('Int8').astype('string')
+        xml = '<c r="' + referencias + '" t="b"><v>' + valores + '</v></c>'
+    elif tipo.kind in 'iuf':
+        valores = serie.astype('string')
+        if tipo.kind == 'f':
+            valores = valores.where(np.isfinite(serie.to_numpy(dtype=float, na_value=np.nan)))
+        xml = '<c r="' + referencias + '"><v>' + valores + '</v></c>'
+    elif _eh_data(tipo):
+        valores = ((_sem_fuso(serie) - EPOCA_EXCEL) / pd.Timedelta(days=1)).astype('string')
+        xml = '<c r="' + referencias + f'" s="{ESTILO_DATA}"><v>' + valores + '</v></c>'
+    elif isinstance(tipo, pd.StringDtype) or pd.api.types.infer_dtype(serie, skipna=True) in ('string', 'empty'):
+        valores = _texto_xml(serie.astype('string'))
+        xml = '<c r="' + referencias + '" t="inlineStr"><is><t xml:space="preserve">' + valores + '</t></is></c>'
+    else:
+        return pd.Series([_celula_objeto(r, v) for r, v in
+                          zip(referencias.tolist(), serie.astype(object).tolist())], dtype='string')
+    return xml.fillna('')
+
+
+def _letra_coluna(posicao):
+    """Letra da coluna do Excel (0 -> A, 26 -> AA)."""
+    letras = ''
+    posicao += 1
+    while posicao:
+        posicao, resto = divmod(posicao - 1, 26)
+        letras = chr(ord('A') + resto) + letras
+    return letras
+
+
+def _linhas_xml(df, inicio, fim, tamanho_bloco=TAMANHO_BLOCO):
+    """Gera o XML das linhas de df[inicio:fim], bloco a bloco, a partir da linha 2 da aba."""
+    letras = [_letra_coluna(posicao) for posicao in range(df.shape[1])]
+    for posicao in range(inicio, fim, tamanho_bloco):
+        bloco = df.iloc[posicao:min(fim, posicao + tamanho_bloco)].reset_index(drop=True)
+        numeros = pd.Series(np.arange(posicao - inicio + 2, posicao - inicio + 2 + len(bloco)), dtype='int64').astype('string')
+        linhas = '<row r="' + numeros + '">'
+        for coluna, letra in enumerate(letras):
+            linhas = linhas + _celulas_xml(bloco.iloc[:, coluna], letra + numeros)
+        yield ''.join((linhas + '</row>').tolist())
+
+
+def _aba_xml(arquivo, df, inicio, fim, larguras):
+    """Grava a aba (cabeçalho, larguras e linhas) em `arquivo`, em streaming."""
+    escrever = lambda texto: arquivo.write(texto.encode('utf-8'))
+    escrever(XML_DECLARACAO + f'<worksheet xmlns="{NS_PLANILHA}">')
+    if larguras:
+        escrever('<cols>' + ''.join(
+            f'<col min="{i}" max="{i}" width="{largura}" customWidth="1"/>' for i, largura in enumerate(larguras, start=1)
+        ) + '</cols>')
+    escrever('<sheetData>')
+    cabecalho = _texto_xml(pd.Series([str(c) for c in df.columns], dtype='string')).tolist()
+    escrever('<row r="1">' + ''.join(
+        f'<c r="{_letra_coluna(i)}1" t="inlineStr" s="{ESTILO_NEGRITO}"><is><t xml:space="preserve">{titulo}</t></is></c>'
+        for i, titulo in enumerate(cabecalho)
+    ) + '</row>')
+    for bloco in _linhas_xml(df, inicio, fim):
+        escrever(bloco)
+    escrever('</sheetData></worksheet>')
+
+
+def _excel_xml(abas, destino, linhas_por_aba, amostra):
+    """Monta o pacote XLSX diretamente (zip com o XML de cada aba), sem biblioteca de planilhas."""
+    nomes = []
+    usados = set()
+    with zipfile.ZipFile(destino, 'w', zipfile.ZIP_DEFLATED, compresslevel=NIVEL_COMPRESSAO) as pacote:
+        for nome, df in abas.items():
+            larguras = larguras_colunas(df, amostra)
+            for aba, inicio, fim in dividir_abas(df, nome, linhas_por_aba, usados):
+                nomes.append(aba)
+                with pacote.open(f'xl/worksheets/sheet{len(nomes)}.xml', 'w', force_zip64=True) as arquivo:
+                    _aba_xml(arquivo, df, inicio, fim, larguras)
+        pacote.writestr('[Content_Types].xml', XML_DECLARACAO + (
+            '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+            '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+            '<Default Extension="xml" ContentType="application/xml"/>'
+            '<Override PartName="/xl/workbook.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+            '<Override PartName="/xl/styles.xml" '
+            'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+            + ''.join(f'<Override PartName="/xl/worksheets/sheet{i}.xml" '
+                      'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+                      for i in range(1, len(nomes) + 1))
+            + '</Types>'))
+        pacote.writestr('_rels/.rels', XML_DECLARACAO + (
+            f'<Relationships xmlns="{NS_RELACOES}">'
+            f'<Relationship Id="rId1" Type="{TIPO_RELACAO}/officeDocument" Target="xl/workbook.xml"/>'
+            '</Relationships>'))
+        pacote.writestr('xl/workbook.xml', XML_DECLARACAO + (
+            f'<workbook xmlns="{NS_PLANILHA}" xmlns:r="{TIPO_RELACAO}"><sheets>'
+            + ''.join(f'<sheet name="{escape(aba, ASPAS_XML)}" sheetId="{i}" r:id="rId{i}"/>'
+                      for i, aba in enumerate(nomes, start=1))
+            + '</sheets></workbook>'))
+        pacote.writestr('xl/_rels/workbook.xml.rels', XML_DECLARACAO + (
+            f'<Relationships xmlns="{NS_RELACOES}">'
+            + ''.join(f'<Relationship Id="rId{i}" Type="{TIPO_RELACAO}/worksheet" Target="worksheets/sheet{i}.xml"/>'
+                      for i in range(1, len(nomes) + 1))
+            + f'<Relationship Id="rId{len(nomes) + 1}" Type="{TIPO_RELACAO}/styles" Target="styles.xml"/>'
+            '</Relationships>'))
+        pacote.writestr('xl/styles.xml', XML_DECLARACAO + ESTILOS_XML)
+
+
+def _escritores_xlsxwriter(planilha, formato_data, df):
+    """Método de escrita de cada coluna, escolhido uma vez pelo tipo da coluna."""
+    escritores = []
+    for posicao in range(df.shape[1]):
+        tipo = df.iloc[:, posicao].dtype
+        if tipo.kind == 'b':
+            escritores.append(planilha.write_boolean)
+        elif tipo.kind in 'iuf':
+            escritores.append(planilha.write_number)
+        elif _eh_data(tipo):
+            escritores.append(lambda linha, coluna, valor: planilha.write_datetime(linha, coluna, valor, formato_data))
+        elif isinstance(tipo, pd.StringDtype):
+            escritores.append(planilha.write_string)
+        else:
+            escritores.append(planilha.write)
+    return escritores
+
+
+def _coluna_python(serie):
+    """Valores da coluna como objetos Python, com None no lugar dos nulos."""
+    serie = _sem_fuso(serie)
+    nulos = serie.isna().to_numpy()
+    if serie.dtype.kind in 'iub' and not nulos.any():
+        return serie.tolist()
+    valores = serie.to_numpy(dtype=object)
+    if nulos.any():
+        valores = valores.copy()
+        valores[nulos] = None
+    return valores.tolist()
+
+
+def _excel_xlsxwriter(abas, destino, linhas_por_aba, amostra):
+    """Grava pelo xlsxwriter em modo constant_memory (célula a célula, mais lento que o XML direto)."""
+    livro = xlsxwriter.Workbook(destino, {
+        'constant_memory': True,
+        'strings_to_urls': False,
+        'strings_to_numbers': False,
+        'strings_to_formulas': False,
+        'nan_inf_to_errors': True,
+        'default_date_format': FORMATO_DATA_HORA,
+    })
+    negrito = livro.add_format({'bold': True})
+    formato_data = livro.add_format({'num_format': FORMATO_DATA_HORA})
+    usados = set()
+    try:
+        for nome, df in abas.items():
+            larguras = larguras_colunas(df, amostra)
+            for aba, inicio, fim in dividir_abas(df, nome, linhas_por_aba, usados):
+                planilha = livro.add_worksheet(aba)
+                for coluna, largura in enumerate(larguras):
+                    planilha.set_column(coluna, coluna, largura)
+                planilha.write_row(0, 0, [str(c) for c in df.columns], negrito)
+                escritores = list(enumerate(_escritores_xlsxwriter(planilha, formato_data, df)))
+                for posicao in range(inicio, fim, TAMANHO_BLOCO):
+                    bloco = df.iloc[posicao:min(fim, posicao + TAMANHO_BLOCO)]
+                    colunas = [_coluna_python(bloco.iloc[:, i]) for i in range(bloco.shape[1])]
+                    for linha, valores in enumerate(zip(*colunas), start=posicao - inicio + 1):
+                        for coluna, escrever in escritores:
+                            valor = valores[coluna]
+                            if valor is not None:
+                                escrever(linha, coluna, valor)
+    finally:
+        livro.close()
+
+
+def exportar_excel(dados, destino, nome_aba='Dados', linhas_por_aba=LIMITE_LINHAS_EXCEL - 1,
+                   amostra_largura=AMOSTRA_LARGURA, motor='xml'):
+    """
+    Grava uma ou mais abas em XLSX, em modo de memória constante.
+
+    :param dados: DataFrame ou dicionário {nome da aba: DataFrame}, na ordem das abas.
+    :param destino: Caminho do arquivo ou objeto binário (ex.: io.BytesIO).
+    :param nome_aba: Nome da aba quando `dados` é um único DataFrame.
+    :param linhas_por_aba: Linhas de dados por aba; o excedente vai para abas extras.
+    :param amostra_largura: Linhas usadas para estimar a largura das colunas.
+    :param motor: 'xml' (XML gerado por coluna, padrão) ou 'xlsxwriter'.
+    """
+    abas = _como_abas(dados, nome_aba)
+    if not abas:
+        raise ValueError("Nenhuma aba para gravar.")
+    if motor == 'xlsxwriter':
+        if xlsxwriter is None:
+            raise ImportError("O motor 'xlsxwriter' requer o pacote xlsxwriter.")
+        _excel_xlsxwriter(abas, destino, linhas_por_aba, amostra_largura)
+    else:
+        _excel_xml(abas, destino, linhas_por_aba, amostra_largura)
+
+
+def excel_em_bytes(dados, nome_aba='Dados'):
+    """Conteúdo do XLSX em memória, para downloads."""
+    buffer = io.BytesIO()
+    exportar_excel(dados, buffer, nome_aba)
+    return buffer.getvalue()
+
+
+def _csv_pelo_arrow(df):
+    """
+    True se todas as colunas são texto, inteiros ou categorias de texto, tipos cujos valores o
+    pyarrow escreve como o pandas (só as aspas diferem).
+    """
+    for posicao in range(df.shape[1]):
+        serie = df.iloc[:, posicao]
+        tipo = serie.dtype
+        if isinstance(tipo, pd.CategoricalDtype):
+            serie = pd.Series(tipo.categories)
+            tipo = serie.dtype
+        if isinstance(tipo, pd.StringDtype):
+            continue
+        if tipo.kind in 'iu':
+            continue
+        if tipo == object and pd.api.types.infer_dtype(serie, skipna=True) in ('string', 'empty'):
+            continue
+        return False
+    return True
+
+
+def exportar_csv(df, destino, sep=',', encoding='utf-8'):
+    """
+    Grava a tabela em CSV (sem índice). Só com texto, inteiros e categorias a gravação é feita pelo
+    pyarrow, que põe entre aspas o cabeçalho e todo texto. Os valores lidos de volta são os mesmos do
+    pandas, mas o arquivo não é idêntico byte a byte.
+    """
+    if pa is not None and encoding.lower().replace('_', '-') in ('utf-8', 'utf8', 'utf-8-sig') \
+            and len(df.columns) and df.columns.is_unique and _csv_pelo_arrow(df):
+        tabela = pa.Table.from_pandas(df.astype({c: 'string' for c in df.columns
+                                                 if isinstance(df[c].dtype, pd.CategoricalDtype)}),
+                                      preserve_index=False)
+        opcoes = pa_csv.WriteOptions(delimiter=sep, quoting_style='needed')
+        abrir = open(destino, 'wb') if isinstance(destino, (str, os.PathLike)) else contextlib.nullcontext(destino)
+        with abrir as saida:
+            if encoding.lower().replace('_', '-') == 'utf-8-sig':
+                saida.write(codecs.BOM_UTF8)
+            pa_csv.write_csv(tabela, saida, opcoes)
+        return
+    df.to_csv(destino, index=False, sep=sep, encoding=encoding)
+
+
+@contextlib.contextmanager
+def pasta_substituta(destino):
+    """
+    Pasta temporária ao lado de `destino` que toma o lugar dele, por inteiro, quando o bloco
+    termina sem erro. Partições de gravações anteriores não sobram, e uma gravação
+    interrompida não estraga a pasta anterior.
+
+    Exemplo:
+        with pasta_substituta('base_particionada') as temporaria:
+            ds.write_dataset(lotes, temporaria, ...)
+    """
+    destino = os.path.abspath(destino)
+    temporaria = f"{destino}.tmp-{os.getpid()}"
+    shutil.rmtree(temporaria, ignore_errors=True)
+    try:
+        yield temporaria
+    except BaseException:
+        shutil.rmtree(temporaria, ignore_errors=True)
+        raise
+    # Uma pasta não pode ser renomeada por cima de outra com conteúdo: a antiga sai antes
+    antiga = f"{destino}.antiga-{os.getpid()}"
+    if os.path.exists(destino):
+        os.replace(destino, antiga)
+    os.replace(temporaria, destino)
+    shutil.rmtree(antiga, ignore_errors=True)
+
+
+def exportar_parquet(df, destino, compressao='zstd', particoes=None):
+    """
+    Grava a tabela em Parquet (sem índice).
+
+    :param particoes: Colunas de partição; se informadas, `destino` é uma pasta
+                      no estilo Hive (coluna=valor/...), substituída por inteiro.
+    """
+    if pa is None:
+        raise ImportError("Exportar em Parquet requer o pyarrow.")
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    if particoes:
+        with pasta_substituta(destino) as temporaria:
+            pq.write_to_dataset(tabela, temporaria, partition_cols=list(particoes), compression=compressao)
+    else:
+        pq.write_table(tabela, destino, compression=compressao)
+
+
+def exportar_ndjson(df, destino):
+    """Grava a tabela em NDJSON: um objeto JSON por linha, datas em ISO 8601."""
+    df.to_json(destino, orient='records', lines=True, force_ascii=False, date_format='iso')
+
+
+def exportar(dados, destino, formato=None, nome_aba='Dados', **opcoes):
+    """
+    Grava a tabela no formato indicado ou, se `formato` for None, pela extensão de `destino`.
+
+    Apenas o XLSX aceita várias abas (dicionário {nome: DataFrame}).
+    """
+    formato = formato or EXTENSOES.get(os.path.splitext(str(destino))[1].lower())
+    if formato == 'xlsx':
+        return exportar_excel(dados, destino, nome_aba, **opcoes)
+    if not isinstance(dados, pd.DataFrame):
+        raise ValueError(f"O formato '{formato}' grava uma única tabela; várias abas só em XLSX.")
+    if formato == 'csv':
+        return exportar_csv(dados, destino, **opcoes)
+    if formato == 'parquet':
+        return exportar_parquet(dados, destino, **opcoes)
+    if formato == 'ndjson':
+        return exportar_ndjson(dados, destino, **opcoes)
+    raise ValueError(f"Formato de exportação desconhecido para '{destino}'.")
@@ -0,0 +1,199 @@
+"""
+Vinculação aproximada (fuzzy) de nomes de partes com blocagem.
+
+Comparar todos os nomes de um lado com todos do outro é quadrático. Aqui os
+nomes distintos são agrupados em blocos por chaves fonéticas de pares de
+tokens (primeiro+último, primeiro+segundo e segundo+último nome), de modo que
+um erro de digitação ou a falta de um nome do meio ainda deixam ao menos um
+bloco em comum. Só os pares que dividem um bloco, e que podem satisfazer a
+regra de ano (ano do lado B >= ano do lado A), são pontuados com o rapidfuzz,
+em lotes.
+
+A pontuação é a média de token_sort_ratio e token_set_ratio, calculada sem
+as partículas (DE, DA, DOS...): a primeira penaliza nomes faltando, a segunda
+ignora a ordem e tokens extras.
+
+As entradas são tabelas de partes geradas por comum.polos.explodir_polos.
+"""
+import re
+
+import numpy as np
+import pandas as pd
+from rapidfuzz import fuzz, process
+
+# Partículas que não ajudam a distinguir nomes
+PARTICULAS = {'DE', 'DA', 'DO', 'DAS', 'DOS', 'E', 'DI', 'DU'}
+RE_PARTICULAS = re.compile(r'\b(?:' + '|'.join(sorted(PARTICULAS)) + r')\b')
+
+# Regras de uma chave fonética simplificada para nomes em português,
+# aplicadas em ordem sobre cada token (maiúsculo e sem acentos)
+REGRAS_FONETICAS = [
+    (re.compile(r'^H'), ''),
+    (re.compile(r'PH'), 'F'),
+    (re.compile(r'TH'), 'T'),
+    (re.compile(r'[CS]H'), 'X'),
+    (re.compile(r'LH'), 'L'),
+    (re.compile(r'NH'), 'N'),
+    (re.compile(r'QU(?=[EI])'), 'K'),
+    (re.compile(r'GU(?=[EI])'), 'G'),
+    (re.compile(r'G(?=[EI])'), 'J'),
+    (re.compile(r'C(?=[EI])'), 'S'),
+    (re.compile(r'[KQ]'), 'C'),
+    (re.compile(r'Z'), 'S'),
+    (re.compile(r'Y'), 'I'),
+    (re.compile(r'W'), 'V'),
+    (re.compile(r'M$'), 'N'),
+    (re.compile(r'(?<=.)[AEIOU]'), ''),
+    (re.compile(r'(.)\1+'), r'\1'),
+]
+
+
+def chave_fonetica(token):
+    """Chave fonética de um token: grafias parecidas (SOUZA/SOUSA, TIAGO/THIAGO) geram a mesma chave."""
+    for regra, substituto in REGRAS_FONETICAS:
+        token = regra.sub(substituto, token)
+    return token
+
+
+def chaves_bloco(nomes):
+    """
+    Gera as chaves de bloco de cada nome.
+
+    :param nomes: Series de nomes normalizados (índice = identificador do nome).
+    :return: DataFrame com as colunas "id" e "bloco" (várias linhas por nome).
+    """
+    tokens = nomes.astype(object).str.split(' ').explode()
+    tokens = tokens[tokens.notna() & (tokens.str.len() > 1) & ~tokens.isin(PARTICULAS)]
+    # A chave fonética é calculada uma vez por token distinto
+    unicos = pd.unique(tokens.to_numpy())
+    foneticas = dict(zip(unicos, (chave_fonetica(t) for t in unicos)))
+    tokens = tokens.map(foneticas).astype(object)
+
+    por_nome = tokens.groupby(level=0)
+    primeiro = por_nome.nth(0)
+    segundo = por_nome.nth(1)
+    ultimo = por_nome.last()
+    quantidade = por_nome.size()
+
+    blocos = [
+        (primeiro.index.to_series(), primeiro + '|' + ultimo.reindex(primeiro.index)),
+        (segundo.index.to_series(), primeiro.reindex(segundo.index) + '|' + segundo),
+        (segundo.index.to_series(), segundo + '|' + ultimo.reindex(segundo.index)),
+    ]
+    chaves = pd.concat([
+        pd.DataFrame({'id': ids.to_numpy(), 'bloco': bloco.to_numpy()}) for ids, bloco in blocos
+    ], ignore_index=True)
+    # Nomes com um único token formam o bloco só com ele
+    unicos_token = quantidade.index[quantidade == 1]
+    chaves.loc[chaves['id'].isin(unicos_token), 'bloco'] = primeiro.reindex(
+        chaves.loc[chaves['id'].isin(unicos_token), 'id']).to_numpy()
+    return chaves.drop_duplicates(ignore_index=True)
+
+
+def sem_particulas(nomes):
+    """Remove as partículas dos nomes, para a pontuação."""
+    return (nomes.astype(object).str.replace(RE_PARTICULAS, '', regex=True)
+            .str.replace(r'\s+', ' ', regex=True).str.strip())
+
+
+def _nomes_distintos(partes, anos, agregacao):
+    """Nomes distintos de uma tabela de partes, com o ano agregado por nome (ou None)."""
+    distintos = partes.drop_duplicates('chave')[['chave', 'nome']].reset_index(drop=True)
+    distintos['comparavel'] = sem_particulas(distintos['nome'])
+    if anos is None:
+        return distintos, None
+    anos_partes = pd.Series(np.asarray(anos, dtype=float)[partes['linha'].to_numpy()])
+    ano_por_chave = anos_partes.groupby(partes['chave'].to_numpy()).agg(agregacao)
+    return distintos, ano_por_chave.reindex(distintos['chave']).to_numpy()
+
+
+def pontuar_pares(nomes_a, nomes_b, tamanho_lote=1_000_000):
+    """Pontua (0-100) cada par alinhado nomes_a[i] x nomes_b[i], em lotes."""
+    pontuacoes = np.empty(len(nomes_a), dtype=np.float32)
+    for inicio in range(0, len(nomes_a), tamanho_lote):
+        fim = inicio + tamanho_lote
+        lote_a, lote_b = nomes_a[inicio:fim], nomes_b[inicio:fim]
+        ordenado = process.cpdist(lote_a, lote_b, scorer=fuzz.token_sort_ratio, workers=-1)
+        conjunto = process.cpdist(lote_a, lote_b, scorer=fuzz.token_set_ratio, workers=-1)
+        pontuacoes[inicio:fim] = (ordenado + conjunto) / 2
+    return pontuacoes
+
+
+def _pares_vazios(colunas):
+    tipos = {'linha_a': 'int64', 'linha_b': 'int64', 'papel': 'int8', 'nome_a': 'string',
+             'nome_b': 'string', 'Similaridade': 'float64'}
+    return pd.DataFrame({coluna: pd.Series(dtype=tipos[coluna]) for coluna in colunas})
+
+
+def preparar_lado(partes, anos=None, agregacao='min'):
+    """
+    Nomes distintos, ano agregado e chaves de bloco de um lado do pareamento.
+
+    Permite reaproveitar o lado A quando o lado B é processado em blocos.
+    """
+    distintos, ano = _nomes_distintos(partes, anos, agregacao)
+    return {'partes': partes, 'distintos': distintos, 'ano': ano,
+            'blocos': chaves_bloco(distintos['nome']) if not partes.empty else None}
+
+
+def parear_nomes_fuzzy(partes_a, partes_b, limite=85, anos_a=None, anos_b=None,
+                       tamanho_lote=1_000_000, lado_a=None):
+    """
+    Encontra os pares de partes com nomes parecidos.
+
+    :param partes_a: Partes do lado A (colunas "linha", "nome", "chave").
+    :param partes_b: Partes do lado B (mesmas colunas e, opcionalmente, "papel").
+    :param limite: Pontuação mínima (0-100) para aceitar o par.
+    :param anos_a: Ano de cada linha de origem do lado A (indexado por "linha"), ou None.
+    :param anos_b: Ano de cada linha de origem do lado B; com os dois anos, só são
+                   pontuados pares de nomes em que algum ano de B é >= algum ano de A.
+    :param tamanho_lote: Quantidade de pares pontuados por chamada ao rapidfuzz.
+    :param lado_a: Resultado de preparar_lado(partes_a, anos_a, 'min'), para não
+                   recalcular o lado A a cada chamada (partes_a e anos_a são ignorados).
+    :return: DataFrame com "linha_a", "linha_b", "nome_a", "nome_b", "Similaridade"
+             (e "papel", se existir em partes_b).
+    """
+    colunas_saida = ['linha_a', 'linha_b', 'nome_a', 'nome_b', 'Similaridade']
+    if 'papel' in partes_b.columns:
+        colunas_saida.insert(2, 'papel')
+    if lado_a is None:
+        lado_a = preparar_lado(partes_a, anos_a, 'min')
+    partes_a = lado_a['partes']
+    if partes_a.empty or partes_b.empty:
+        return _pares_vazios(colunas_saida)
+    usar_anos = lado_a['ano'] is not None and anos_b is not None
+    distintos_a, ano_min_a = lado_a['distintos'], lado_a['ano']
+    distintos_b, ano_max_b = _nomes_distintos(partes_b, anos_b if usar_anos else None, 'max')
+
+    # Blocagem: pares de nomes distintos que dividem ao menos uma chave de bloco
+    candidatos = lado_a['blocos'].merge(
+        chaves_bloco(distintos_b['nome']), on='bloco', suffixes=('_a', '_b')
+    )[['id_a', 'id_b']].drop_duplicates()
+    id_a = candidatos['id_a'].to_numpy()
+    id_b = candidatos['id_b'].to_numpy()
+    if usar_anos:
+        # Regra de ano já na blocagem; anos nulos nunca satisfazem a regra
+        possivel = ano_max_b[id_b] >= ano_min_a[id_a]
+        id_a, id_b = id_a[possivel], id_b[possivel]
+    if len(id_a) == 0:
+        return _pares_vazios(colunas_saida)
+
+    nomes_a = distintos_a['comparavel'].to_numpy(dtype=object)[id_a]
+    nomes_b = distintos_b['comparavel'].to_numpy(dtype=object)[id_b]
+    pontuacoes = pontuar_pares(nomes_a, nomes_b, tamanho_lote)
+    aceitos = pontuacoes >= limite
+
+    pares_nomes = pd.DataFrame({
+        'chave_a': distintos_a['chave'].to_numpy()[id_a[aceitos]],
+        'chave_b': distintos_b['chave'].to_numpy()[id_b[aceitos]],
+        'Similaridade': np.round(pontuacoes[aceitos].astype(np.float64), 1),
+    })
+
+    # Volta dos pares de nomes para os pares de linhas de origem
+    pares = (pares_nomes
+             .merge(partes_a[['chave', 'linha', 'nome']].rename(columns={'chave': 'chave_a', 'linha': 'linha_a', 'nome': 'nome_a'}),
+                    on='chave_a')
+             .merge(partes_b.drop(columns='nome').rename(columns={'chave': 'chave_b', 'linha': 'linha_b'}),
+                    on='chave_b'))
+    pares['nome_b'] = distintos_b.set_index('chave')['nome'].reindex(pares['chave_b']).to_numpy()
+    return pares[colunas_saida]
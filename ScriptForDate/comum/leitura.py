@@ -0,0 +1,248 @@
+"""
+Leitura de CSVs de entrada com cache do resultado já interpretado.
+
+Os mesmos exports do PJe são lidos a cada execução de processoDuplicadosFilas
+e dos scripts do APF. `ler_csv_com_cache` guarda, para cada arquivo, o
+delimitador e o encoding detectados, o mapeamento dos nomes de colunas de
+`padronizar_nome_coluna` e a tabela lida (Feather, sem compressão). A entrada
+é identificada pela impressão digital do arquivo (caminho, tamanho, mtime e
+hash do conteúdo, ver comum.cache_dados) e pelos parâmetros da leitura; se o
+arquivo não mudou, a tabela é aberta por memory-map, sem Sniffer nem read_csv.
+
+As entradas ficam em <cache>/leituras. Quando o total passa de
+`limite_mb` (variável de ambiente PJE_CACHE_LEITURAS_MB, padrão 2048), as
+entradas usadas há mais tempo são apagadas primeiro (LRU pelo tamanho em disco).
+
+Exemplo:
+    df, info = ler_csv_com_cache('analisar/fila.csv', colunas=('numeroProcesso', 'NomeTarefa'))
+    info['delimitador'], info['encoding'], info['mapeamento']
+"""
+import codecs
+import csv
+import json
+import os
+import time
+from datetime import datetime
+
+import pandas as pd
+
+from comum.cache_dados import DIR_CACHE_PADRAO, chave_cache, impressao_digital
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # sem pyarrow os arquivos são sempre lidos do original
+    pa = None
+    feather = None
+
+try:
+    import chardet
+except ImportError:  # sem chardet, o que não é UTF-8 é lido como latin-1
+    chardet = None
+
+# Versão da leitura; incremente se a detecção, a padronização ou os tipos lidos mudarem
+VERSAO_LEITURA = 1
+
+LIMITE_CACHE_MB = float(os.environ.get("PJE_CACHE_LEITURAS_MB", 2048))
+
+POSSIVEIS_NOMES_NUMERO_PROCESSO = ["numeroProcesso", "numero_processo"]
+POSSIVEIS_NOMES_TAREFA = ["NomeTarefa", "nomeTarefa"]
+
+
+def log(message):
+    """Função simples para exibir mensagens de log."""
+    print(f"[LEITURA] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}")
+
+
+def detectar_delimitador(caminho_arquivo, amostra_maxima=2048, encoding='utf-8'):
+    """
+    Detecta o delimitador do arquivo CSV lendo um bloco de dados (amostra) e
+    usando o csv.Sniffer. Se não for possível, retorna ';'.
+    """
+    with open(caminho_arquivo, 'r', encoding=encoding, errors='ignore') as f:
+        amostra = f.read(amostra_maxima)
+    try:
+        return csv.Sniffer().sniff(amostra).delimiter
+    except csv.Error:
+        return ';'
+
+
+def detectar_encoding(caminho_arquivo, amostra_maxima=1 << 16):
+    """
+    Retorna 'utf-8' se a amostra do início do arquivo é UTF-8 válido; senão, o
+    encoding indicado pelo chardet (ou 'latin-1', sem chardet).
+    """
+    with open(caminho_arquivo, 'rb') as f:
+        amostra = f.read(amostra_maxima)
+    try:
+        # final=False: um caractere cortado no fim da amostra não conta como erro
+        codecs.getincrementaldecoder('utf-8')().decode(amostra, final=False)
+        return 'utf-8'
+    except UnicodeDecodeError:
+        pass
+    if chardet is not None:
+        return chardet.detect(amostra)['encoding'] or 'latin-1'
+    return 'latin-1'
+
+
+def padronizar_nome_coluna(colunas):
+    """
+    Faz a padronização dos nomes de colunas, para que colunas como
+    'numeroProcesso', 'numero_processo' etc. sejam tratadas como 'numeroProcesso',
+    e 'NomeTarefa'/'nomeTarefa' sejam tratadas como 'NomeTarefa'.
+    """
+    nomes_numero_processo = {nome.lower() for nome in POSSIVEIS_NOMES_NUMERO_PROCESSO}
+    nomes_tarefa = {nome.lower() for nome in POSSIVEIS_NOMES_TAREFA}
+
+    mapeamento = {}
+    for col in colunas:
+        col_limpo = col.strip()
+        col_lower = col_limpo.lower()
+
+        if col_lower in nomes_numero_processo:
+            mapeamento[col] = "numeroProcesso"
+        elif col_lower in nomes_tarefa:
+            mapeamento[col] = "NomeTarefa"
+        else:
+            mapeamento[col] = col_limpo
+    return mapeamento
+
+
+def _ler_original(caminho, colunas, dtype, encoding, delimitador, engine, padronizar):
+    """Lê o CSV de origem e devolve (DataFrame com as colunas já renomeadas, informações da leitura)."""
+    encoding = encoding or detectar_encoding(caminho)
+    delimitador = delimitador or detectar_delimitador(caminho, encoding=encoding)
+    cabecalho = pd.read_csv(caminho, delimiter=delimitador, encoding=encoding, nrows=0).columns
+    mapeamento = padronizar_nome_coluna(cabecalho) if padronizar else {c: c for c in cabecalho}
+    info = {'delimitador': delimitador, 'encoding': encoding, 'mapeamento': mapeamento,
+            'colunas': [mapeamento[c] for c in cabecalho]}
+
+    if colunas is None:
+        df = pd.read_csv(caminho, delimiter=delimitador, encoding=encoding, engine=engine, dtype=dtype)
+    else:
+        usecols = [c for c in cabecalho if mapeamento[c] in set(colunas)]
+        if not usecols:
+            # Nenhuma das colunas pedidas: só o cabeçalho interessa
+            return pd.DataFrame(columns=info['colunas']), info
+        df = pd.read_csv(caminho, delimiter=delimitador, encoding=encoding, engine=engine,
+                         usecols=usecols, dtype=dtype)
+    return df.rename(columns=mapeamento), info
+
+
+def _entradas(pasta):
+    """Entradas do cache de leituras: {chave: (bytes em disco, último acesso)}."""
+    entradas = {}
+    for nome in os.listdir(pasta):
+        chave, extensao = os.path.splitext(nome)
+        if extensao not in ('.feather', '.json'):
+            continue
+        caminho = os.path.join(pasta, nome)
+        try:
+            info = os.stat(caminho)
+        except FileNotFoundError:
+            continue
+        tamanho, acesso = entradas.get(chave, (0, 0))
+        if extensao == '.json':
+            try:
+                with open(caminho, 'r', encoding='utf-8') as f:
+                    acesso = json.load(f).get('acessado_em', info.st_mtime)
+            except (OSError, ValueError):
+                acesso = info.st_mtime
+        entradas[chave] = (tamanho + info.st_size, acesso)
+    return entradas
+
+
+def limitar_cache(limite_mb=None, dir_cache=None):
+    """
+    Apaga as entradas usadas há mais tempo até o cache de leituras caber em `limite_mb`.
+
+    :return: Quantidade de entradas apagadas.
+    """
+    limite = (LIMITE_CACHE_MB if limite_mb is None else limite_mb) * 2**20
+    pasta = os.path.join(dir_cache or DIR_CACHE_PADRAO, 'leituras')
+    if not os.path.isdir(pasta):
+        return 0
+    entradas = _entradas(pasta)
+    total = sum(tamanho for tamanho, _ in entradas.values())
+    apagadas = 0
+    for chave, (tamanho, _) in sorted(entradas.items(), key=lambda item: item[1][1]):
+        if total <= limite:
+            break
+        for extensao in ('.feather', '.json'):
+            try:
+                os.remove(os.path.join(pasta, chave + extensao))
+            except FileNotFoundError:
+                pass
+        total -= tamanho
+        apagadas += 1
+    if apagadas:
+        log(f"{apagadas} leitura(s) antiga(s) removida(s) do cache ({total / 2**20:.0f} MB em uso).")
+    return apagadas
+
+
+def _gravar_json(caminho, dados):
+    temporario = f"{caminho}.{os.getpid()}.tmp"
+    with open(temporario, 'w', encoding='utf-8') as f:
+        json.dump(dados, f, indent=2, ensure_ascii=False, default=str)
+    os.replace(temporario, caminho)
+
+
+def ler_csv_com_cache(caminho, colunas=None, dtype=str, encoding=None, delimitador=None, engine='c',
+                      padronizar=True, usar_cache=True, dir_cache=None, limite_mb=None):
+    """
+    Lê um CSV de entrada, reaproveitando a leitura anterior se o arquivo não mudou.
+
+    :param colunas: Colunas a manter (nomes já padronizados); as que não existirem
+                    no arquivo são ignoradas. None mantém todas.
+    :param dtype: dtype do read_csv (padrão: tudo como texto; None deixa o pandas inferir).
+    :param encoding: Encoding do arquivo; None detecta (UTF-8 ou, senão, pelo chardet).
+    :param delimitador: Delimitador; None detecta pelo csv.Sniffer.
+    :param padronizar: Aplica padronizar_nome_coluna aos nomes das colunas.
+    :param limite_mb: Tamanho máximo do cache de leituras (padrão: LIMITE_CACHE_MB).
+    :return: (DataFrame, dicionário com "delimitador", "encoding", "mapeamento" e
+             "colunas" (todas as colunas do cabeçalho, já padronizadas)).
+    """
+    argumentos = (colunas, dtype, encoding, delimitador, engine, padronizar)
+    if not usar_cache or pa is None:
+        return _ler_original(caminho, *argumentos)
+
+    dir_cache = dir_cache or DIR_CACHE_PADRAO
+    pasta = os.path.join(dir_cache, 'leituras')
+    os.makedirs(pasta, exist_ok=True)
+    digital = impressao_digital(caminho, dir_cache)
+    chave = chave_cache(digital, VERSAO_LEITURA, {
+        'colunas': sorted(colunas) if colunas is not None else None,
+        'dtype': getattr(dtype, '__name__', dtype), 'encoding': encoding,
+        'delimitador': delimitador, 'padronizar': padronizar,
+    })
+    destino = os.path.join(pasta, f"{chave}.feather")
+    caminho_json = os.path.join(pasta, f"{chave}.json")
+
+    try:
+        with open(caminho_json, 'r', encoding='utf-8') as f:
+            metadados = json.load(f)
+        tabela = feather.read_table(destino, memory_map=True)
+    except (OSError, ValueError, pa.ArrowException):
+        metadados = None
+
+    if metadados is None:
+        df, info = _ler_original(caminho, *argumentos)
+        try:
+            tabela = pa.Table.from_pandas(df, preserve_index=False)
+        except (pa.ArrowException, TypeError, ValueError) as e:
+            # Colunas com tipos misturados (engine='python' sem dtype) não cabem no Arrow
+            log(f"Leitura de '{caminho}' não guardada em cache: {e}")
+            return df, info
+        temporario = f"{destino}.{os.getpid()}.tmp"
+        feather.write_feather(tabela, temporario, compression='uncompressed')
+        os.replace(temporario, destino)
+        metadados = {'origem': os.path.abspath(caminho), 'digital': digital, 'versao': VERSAO_LEITURA,
+                     'info': info, 'criado_em': datetime.now().isoformat(timespec='seconds')}
+        metadados['acessado_em'] = time.time()
+        _gravar_json(caminho_json, metadados)
+        limitar_cache(limite_mb, dir_cache)
+        return df, info
+
+    metadados['acessado_em'] = time.time()
+    _gravar_json(caminho_json, metadados)
+    return tabela.to_pandas(), metadados['info']
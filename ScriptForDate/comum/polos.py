@@ -0,0 +1,79 @@
+"""
+Separação dos campos de polo (poloAtivo, poloPassivo, "Polo Passivo") em partes.
+
+As exportações do PJe trazem várias pessoas na mesma célula, por exemplo
+"FULANO e outros (3)" ou nomes separados por ";", "|" ou "/". Comparar a
+célula inteira como um único texto perde correspondências; aqui cada célula
+vira uma linha por parte, com o nome normalizado, a posição da linha de
+origem e uma chave de 64 bits do nome, usada nas junções no lugar do texto.
+
+Exemplo:
+    partes = explodir_polos(df['poloPassivo'])
+    # partes: linha (posição em df), nome, chave (uint64)
+"""
+import numpy as np
+import pandas as pd
+
+# Marcas combinantes (categoria Unicode "Mn") que aparecem após a decomposição NFD
+# de textos em alfabeto latino
+MARCAS_COMBINANTES = '[\u0300-\u036f\u1ab0-\u1aff\u1dc0-\u1dff\u20d0-\u20ff\ufe20-\ufe2f]'
+
+# Trechos que não fazem parte do nome: "E OUTROS", "E OUTRA(S)" e contadores como "(3)"
+SUFIXOS = r'\s+E\s+OUTR[OA]\(?S?\)?(?=\W|$)|\(\s*\d+\s*\)'
+
+# Separadores entre as partes de um mesmo polo
+SEPARADORES = r'\s*[;|/\n]\s*'
+
+
+def normalizar_nomes(serie):
+    """Maiúsculas, sem acentos e com espaços simples, aplicado à coluna inteira."""
+    return (serie.astype('string').str.upper()
+            .str.normalize('NFD')
+            .str.replace(MARCAS_COMBINANTES, '', regex=True)
+            .str.replace(r'\s+', ' ', regex=True)
+            .str.strip())
+
+
+def chave_nome(nomes):
+    """Chave uint64 de cada nome (hash de 64 bits do texto já normalizado)."""
+    return pd.util.hash_array(np.asarray(nomes, dtype=object))
+
+
+def explodir_polos(serie, normalizado=False):
+    """
+    Separa cada célula de polo em uma linha por parte.
+
+    :param serie: Coluna de polo (uma célula pode conter várias partes).
+    :param normalizado: Se True, a coluna já passou por normalizar_nomes.
+    :return: DataFrame com as colunas "linha" (posição da célula em `serie`),
+             "nome" (nome normalizado da parte) e "chave" (uint64 do nome).
+             Células vazias não geram linhas e nomes repetidos na mesma célula
+             aparecem uma vez só.
+    """
+    nomes = serie.reset_index(drop=True)
+    if not normalizado:
+        nomes = normalizar_nomes(nomes)
+    nomes = (nomes.str.replace(SUFIXOS, ' ', regex=True)
+             .astype(object).str.split(SEPARADORES, regex=True)
+             .explode().str.strip())
+    nomes = nomes[nomes.notna() & (nomes != '')]
+    partes = pd.DataFrame({
+        'linha': nomes.index.to_numpy(dtype=np.int64),
+        'nome': nomes.astype('string').to_numpy(),
+        'chave': chave_nome(nomes),
+    })
+    return partes.drop_duplicates(['linha', 'chave'], ignore_index=True)
+
+
+def explodir_colunas(df, colunas, normalizado=False):
+    """
+    Aplica explodir_polos a várias colunas de polo de `df` e empilha o resultado.
+
+    A coluna "papel" indica de qual coluna veio a parte (posição em `colunas`).
+    """
+    partes = []
+    for papel, coluna in enumerate(colunas):
+        explodido = explodir_polos(df[coluna], normalizado)
+        explodido.insert(1, 'papel', np.int8(papel))
+        partes.append(explodido)
+    return pd.concat(partes, ignore_index=True)
@@ -0,0 +1,189 @@
+"""
+Progresso e métricas de execução dos scripts de processamento de dados.
+
+Substitui o log de uma linha por registro por relatórios limitados no tempo
+(no máximo um a cada `intervalo` segundos) com linhas/s e tempo restante
+estimado, mede o tempo de cada etapa (leitura, normalização, comparação,
+gravação) e o pico de memória, e grava ao final um resumo em JSON.
+
+Exemplo:
+    progresso = Progresso("compareDate")
+    with progresso.etapa("leitura"):
+        df = pd.read_csv(...)
+    progresso.iniciar(len(df), "Comparando registros")
+    for ... in ...:
+        progresso.avancar()
+    progresso.finalizar()
+"""
+import json
+import multiprocessing
+import queue
+import sys
+import time
+from contextlib import contextmanager
+from datetime import datetime
+
+
+def pico_memoria_mb():
+    """Pico de memória residente (RSS) do processo atual, em MB, ou None se indisponível."""
+    try:
+        import resource
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        # Linux informa em KB e macOS em bytes
+        return pico / (1024 * 1024) if sys.platform == "darwin" else pico / 1024
+    except ImportError:
+        pass
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        return getattr(info, "peak_wset", info.rss) / (1024 * 1024)
+    except ImportError:
+        return None
+
+
+def _executar_e_enviar(funcao, args, fila):
+    try:
+        fila.put({"resultado": funcao(*args)})
+    except BaseException as e:
+        fila.put({"erro": f"{type(e).__name__}: {e}"})
+        raise
+
+
+def executar_em_processo(funcao, *args, intervalo=1.0):
+    """
+    Executa `funcao(*args)` em um processo novo (ex.: para medir o pico de memória
+    isolado) e devolve (resultado, erro). Se a função levantar uma exceção ou o
+    processo terminar sem responder (ex.: morto por falta de memória), resultado
+    é None e erro descreve a falha, em vez de esperar para sempre.
+    """
+    fila = multiprocessing.Queue()
+    processo = multiprocessing.Process(target=_executar_e_enviar, args=(funcao, args, fila))
+    processo.start()
+    resposta = None
+    while resposta is None:
+        try:
+            resposta = fila.get(timeout=intervalo)
+        except queue.Empty:
+            if processo.is_alive():
+                continue
+            try:  # a resposta pode ter chegado junto com o fim do processo
+                resposta = fila.get(timeout=intervalo)
+            except queue.Empty:
+                resposta = {"erro": f"processo terminou sem resultado (código de saída {processo.exitcode})"}
+    processo.join()
+    return resposta.get("resultado"), resposta.get("erro")
+
+
+def _formatar_duracao(segundos):
+    segundos = int(segundos)
+    horas, resto = divmod(segundos, 3600)
+    minutos, segundos = divmod(resto, 60)
+    return f"{horas:02d}:{minutos:02d}:{segundos:02d}"
+
+
+class Progresso:
+    def __init__(self, nome_execucao, intervalo=5.0, arquivo_resumo=None):
+        """
+        :param nome_execucao: Nome do script/execução, usado no log e no resumo.
+        :param intervalo: Intervalo mínimo, em segundos, entre dois relatórios de progresso.
+        :param arquivo_resumo: Caminho do resumo JSON (padrão: "<nome_execucao>_resumo.json").
+        """
+        self.nome_execucao = nome_execucao
+        self.intervalo = intervalo
+        self.arquivo_resumo = arquivo_resumo or f"{nome_execucao}_resumo.json"
+        self.inicio = time.perf_counter()
+        self.inicio_data = datetime.now()
+        self.etapas = {}
+        self.contadores = {}
+        self._atual = None
+
+    def log(self, message):
+        print(f"[{self.nome_execucao}] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}")
+
+    @contextmanager
+    def etapa(self, nome):
+        """Mede o tempo de parede de uma etapa; chamadas repetidas com o mesmo nome são somadas."""
+        inicio = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.etapas[nome] = self.etapas.get(nome, 0.0) + (time.perf_counter() - inicio)
+
+    def iniciar(self, total, descricao):
+        """Inicia a contagem de um laço com `total` itens (None se desconhecido)."""
+        self._atual = {
+            "descricao": descricao,
+            "total": total,
+            "processados": 0,
+            "inicio": time.perf_counter(),
+            "ultimo_relatorio": time.perf_counter(),
+        }
+        self.contadores[descricao] = self._atual
+        self.log(f"{descricao}: iniciando" + (f" ({total} itens)." if total is not None else "."))
+
+    def avancar(self, quantidade=1):
+        """Soma `quantidade` itens processados e relata o progresso se o intervalo já passou."""
+        atual = self._atual
+        atual["processados"] += quantidade
+        agora = time.perf_counter()
+        if agora - atual["ultimo_relatorio"] >= self.intervalo:
+            atual["ultimo_relatorio"] = agora
+            self._relatar(atual, agora)
+
+    def concluir(self):
+        """Encerra o laço atual com um relatório final."""
+        if self._atual is not None:
+            agora = time.perf_counter()
+            self._atual["fim"] = agora
+            self._relatar(self._atual, agora)
+            self._atual = None
+
+    def _relatar(self, atual, agora):
+        decorrido = agora - atual["inicio"]
+        taxa = atual["processados"] / decorrido if decorrido > 0 else 0.0
+        mensagem = f"{atual['descricao']}: {atual['processados']}"
+        if atual["total"]:
+            percentual = atual["processados"] / atual["total"]
+            mensagem += f"/{atual['total']} ({percentual:.1%})"
+            if taxa > 0:
+                restante = (atual["total"] - atual["processados"]) / taxa
+                mensagem += f" | ETA {_formatar_duracao(restante)}"
+        mensagem += f" | {taxa:,.0f} linhas/s"
+        self.log(mensagem)
+
+    def resumo(self, **extras):
+        """Monta o resumo da execução (tempos por etapa, vazão dos laços e pico de memória)."""
+        contadores = {}
+        for descricao, contador in self.contadores.items():
+            fim = contador.get("fim", time.perf_counter())
+            duracao = fim - contador["inicio"]
+            contadores[descricao] = {
+                "total": contador["total"],
+                "processados": contador["processados"],
+                "segundos": round(duracao, 3),
+                "linhas_por_segundo": round(contador["processados"] / duracao, 1) if duracao > 0 else None,
+            }
+        pico = pico_memoria_mb()
+        return {
+            "execucao": self.nome_execucao,
+            "inicio": self.inicio_data.isoformat(timespec="seconds"),
+            "fim": datetime.now().isoformat(timespec="seconds"),
+            "duracao_segundos": round(time.perf_counter() - self.inicio, 3),
+            "etapas_segundos": {nome: round(segundos, 3) for nome, segundos in self.etapas.items()},
+            "lacos": contadores,
+            "pico_memoria_mb": round(pico, 1) if pico is not None else None,
+            **extras,
+        }
+
+    def finalizar(self, **extras):
+        """Encerra a execução, exibe o tempo por etapa e grava o resumo JSON."""
+        self.concluir()
+        resumo = self.resumo(**extras)
+        for nome, segundos in resumo["etapas_segundos"].items():
+            self.log(f"Etapa '{nome}': {segundos:.2f} s")
+        if resumo["pico_memoria_mb"] is not None:
+            self.log(f"Pico de memória: {resumo['pico_memoria_mb']:.1f} MB")
+        with open(self.arquivo_resumo, "w", encoding="utf-8") as f:
+            json.dump(resumo, f, indent=4, ensure_ascii=False)
+        self.log(f"Resumo da execução salvo em {self.arquivo_resumo}.")
+        return resumo
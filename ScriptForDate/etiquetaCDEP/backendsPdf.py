@@ -0,0 +1,215 @@
+"""
+Motores de PDF do pipeline CDEP: extração do texto das páginas e cópia de páginas.
+
+O PyPDF2 (Python puro) continua sendo o padrão. PyMuPDF e pypdfium2, que usam
+bibliotecas nativas e extraem o texto bem mais rápido, são usados quando
+instalados e escolhidos pelo nome (ou pela variável de ambiente
+PJE_BACKEND_PDF). O texto extraído muda de um motor para outro, por isso a
+identificação do motor (nome e versão) faz parte da chave do cacheTexto.
+
+Exemplo:
+    backend = obter_backend("pymupdf")
+    with backend.abrir("oficio.pdf") as documento:
+        textos = [documento.texto(i) for i in range(len(documento))]
+    backend.gravar_paginas("oficio.pdf", [0, 3, 4], "filtrado.pdf")
+
+Para acrescentar um motor: subclasse de BackendPdf com `abrir` e
+`gravar_paginas`, registrada em BACKENDS.
+"""
+import os
+
+BACKEND_PADRAO = os.environ.get("PJE_BACKEND_PDF", "pypdf2")
+
+
+class DocumentoPdf:
+    """PDF aberto por um motor: len() dá a quantidade de páginas e texto(i) o texto da página i."""
+
+    def __len__(self):
+        raise NotImplementedError
+
+    def texto(self, indice):
+        raise NotImplementedError
+
+    def fechar(self):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+class BackendPdf:
+    nome = None
+
+    @property
+    def identificacao(self):
+        """Nome e versão da biblioteca (chave do cache de texto)."""
+        raise NotImplementedError
+
+    def abrir(self, caminho):
+        raise NotImplementedError
+
+    def gravar_paginas(self, caminho, indices, destino):
+        """Grava em `destino` um PDF com as páginas `indices` (a partir de 0) de `caminho`, nessa ordem."""
+        raise NotImplementedError
+
+
+# ------------------------------- PyPDF2 -------------------------------
+class _DocumentoPyPDF2(DocumentoPdf):
+    def __init__(self, reader):
+        self.reader = reader
+
+    def __len__(self):
+        return len(self.reader.pages)
+
+    def texto(self, indice):
+        return self.reader.pages[indice].extract_text() or ""
+
+
+class BackendPyPDF2(BackendPdf):
+    nome = "pypdf2"
+
+    def __init__(self):
+        import PyPDF2
+        self.PyPDF2 = PyPDF2
+
+    @property
+    def identificacao(self):
+        return f"PyPDF2-{self.PyPDF2.__version__}"
+
+    def abrir(self, caminho):
+        return _DocumentoPyPDF2(self.PyPDF2.PdfReader(caminho))
+
+    def gravar_paginas(self, caminho, indices, destino):
+        reader = self.PyPDF2.PdfReader(caminho)
+        writer = self.PyPDF2.PdfWriter()
+        for indice in indices:
+            writer.add_page(reader.pages[indice])
+        with open(destino, "wb") as arquivo:
+            writer.write(arquivo)
+
+
+# ------------------------------- PyMuPDF ------------------------------
+class _DocumentoPyMuPDF(DocumentoPdf):
+    def __init__(self, documento):
+        self.documento = documento
+
+    def __len__(self):
+        return self.documento.page_count
+
+    def texto(self, indice):
+        return self.documento[indice].get_text()
+
+    def fechar(self):
+        self.documento.close()
+
+
+class BackendPyMuPDF(BackendPdf):
+    nome = "pymupdf"
+
+    def __init__(self):
+        try:
+            import pymupdf as fitz
+        except ImportError:  # versões antigas só têm o nome fitz
+            import fitz
+        self.fitz = fitz
+
+    @property
+    def identificacao(self):
+        return f"PyMuPDF-{self.fitz.VersionBind}"
+
+    def abrir(self, caminho):
+        return _DocumentoPyMuPDF(self.fitz.open(caminho))
+
+    def gravar_paginas(self, caminho, indices, destino):
+        with self.fitz.open(caminho) as origem, self.fitz.open() as novo:
+            for indice in indices:
+                novo.insert_pdf(origem, from_page=indice, to_page=indice)
+            novo.save(destino)
+
+
+# ------------------------------ pypdfium2 -----------------------------
+class _DocumentoPdfium(DocumentoPdf):
+    def __init__(self, documento):
+        self.documento = documento
+
+    def __len__(self):
+        return len(self.documento)
+
+    def texto(self, indice):
+        pagina = self.documento[indice]
+        texto_pagina = pagina.get_textpage()
+        try:
+            return texto_pagina.get_text_range()
+        finally:
+            texto_pagina.close()
+            pagina.close()
+
+    def fechar(self):
+        self.documento.close()
+
+
+class BackendPdfium(BackendPdf):
+    nome = "pdfium"
+
+    def __init__(self):
+        import pypdfium2
+        self.pdfium = pypdfium2
+
+    @property
+    def identificacao(self):
+        from importlib.metadata import version
+        return f"pypdfium2-{version('pypdfium2')}"
+
+    def abrir(self, caminho):
+        return _DocumentoPdfium(self.pdfium.PdfDocument(caminho))
+
+    def gravar_paginas(self, caminho, indices, destino):
+        origem = self.pdfium.PdfDocument(caminho)
+        novo = self.pdfium.PdfDocument.new()
+        try:
+            novo.import_pages(origem, list(indices))
+            novo.save(destino)
+        finally:
+            novo.close()
+            origem.close()
+
+
+BACKENDS = {
+    "pypdf2": BackendPyPDF2,
+    "pymupdf": BackendPyMuPDF,
+    "pdfium": BackendPdfium,
+}
+
+_instancias = {}
+
+
+def obter_backend(nome=None):
+    """
+    Motor pelo nome (padrão: BACKEND_PADRAO); aceita também uma instância de BackendPdf.
+
+    :raises ValueError: Nome desconhecido.
+    :raises ImportError: Biblioteca do motor não instalada.
+    """
+    if isinstance(nome, BackendPdf):
+        return nome
+    nome = (nome or BACKEND_PADRAO).lower()
+    if nome not in BACKENDS:
+        raise ValueError(f"Motor de PDF desconhecido: {nome} (disponíveis: {', '.join(BACKENDS)})")
+    if nome not in _instancias:
+        _instancias[nome] = BACKENDS[nome]()
+    return _instancias[nome]
+
+
+def backends_disponiveis():
+    """Nomes dos motores cuja biblioteca está instalada."""
+    disponiveis = []
+    for nome in BACKENDS:
+        try:
+            obter_backend(nome)
+        except ImportError:
+            continue
+        disponiveis.append(nome)
+    return disponiveis
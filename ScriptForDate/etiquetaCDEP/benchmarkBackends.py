@@ -0,0 +1,141 @@
+"""
+Benchmark dos motores de PDF (backendsPdf.py) sobre os mesmos Ofícios.
+
+Para cada motor instalado, extrai o texto de todas as páginas dos PDFs da
+pasta (sem o cache de texto), classifica as páginas como o filtro do
+main.py e grava o PDF filtrado de cada Ofício. Informa páginas/s da
+extração, tempo de gravação, pico de memória (RSS) e se as páginas
+selecionadas são as mesmas do PyPDF2, que é o motor de referência. Cada
+motor roda em um processo separado, para que o pico de memória de um não
+contamine o outro; um motor que falha (ex.: PDF corrompido) ou cujo
+processo morre é informado como falho e o benchmark segue com os demais.
+
+Uso:
+    python benchmarkBackends.py --pdfs ./documento_Oficio
+    python benchmarkBackends.py --pdfs ./documento_Oficio --backends pypdf2,pymupdf --saida benchmark_backends.json
+"""
+import argparse
+import json
+import os
+import sys
+import tempfile
+import time
+
+from backendsPdf import BACKENDS, backends_disponiveis, obter_backend
+from classificadorPaginas import classificar_pagina
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.progresso import executar_em_processo, pico_memoria_mb
+
+REFERENCIA = "pypdf2"
+
+
+def listar_pdfs(pasta):
+    return [os.path.join(pasta, nome) for nome in sorted(os.listdir(pasta)) if nome.lower().endswith(".pdf")]
+
+
+def _medir(nome, pdfs):
+    backend = obter_backend(nome)
+    memoria_inicial = pico_memoria_mb()
+    paginas = 0
+    selecoes = {}
+    extracao = gravacao = 0.0
+    with tempfile.TemporaryDirectory() as pasta:
+        for pdf in pdfs:
+            inicio = time.perf_counter()
+            with backend.abrir(pdf) as documento:
+                textos = [documento.texto(i) for i in range(len(documento))]
+            extracao += time.perf_counter() - inicio
+            paginas += len(textos)
+            # Mesma regra do filtro: a primeira página entra sempre e não é analisada
+            selecionadas = [i for i, texto in enumerate(textos[1:], start=1) if classificar_pagina(texto)["tipo"]]
+            selecoes[os.path.basename(pdf)] = [i + 1 for i in selecionadas]
+
+            inicio = time.perf_counter()
+            backend.gravar_paginas(pdf, [0, *selecionadas], os.path.join(pasta, os.path.basename(pdf)))
+            gravacao += time.perf_counter() - inicio
+    return {'identificacao': backend.identificacao, 'paginas': paginas, 'segundos_extracao': extracao,
+            'segundos_gravacao': gravacao, 'pico_mb': pico_memoria_mb(), 'pico_inicial_mb': memoria_inicial,
+            'selecoes': selecoes}
+
+
+def medir(nome, pdfs):
+    """
+    Executa um motor em um processo novo: (tempos, pico de memória e páginas selecionadas, erro).
+    Se o motor falhar ou o processo morrer, a medição é None e erro descreve a falha.
+    """
+    return executar_em_processo(_medir, nome, pdfs)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pdfs', default="./documento_Oficio", help="Pasta com os PDFs de Ofício.")
+    parser.add_argument('--backends', default=None,
+                        help=f"Motores separados por vírgula (padrão: os instalados entre {', '.join(BACKENDS)}).")
+    parser.add_argument('--repeticoes', type=int, default=3)
+    parser.add_argument('--saida', default=None, help="Arquivo JSON com os resultados.")
+    args = parser.parse_args()
+
+    pdfs = listar_pdfs(args.pdfs)
+    if not pdfs:
+        sys.exit(f"Nenhum PDF encontrado em {args.pdfs}")
+    nomes = args.backends.split(',') if args.backends else backends_disponiveis()
+    for nome in nomes:
+        obter_backend(nome)  # nome inválido ou biblioteca ausente para antes de medir
+
+    resultados = {}
+    referencia = None
+    for nome in sorted(nomes, key=lambda n: n != REFERENCIA):
+        medicoes = []
+        erro = None
+        for _ in range(args.repeticoes):
+            medicao, erro = medir(nome, pdfs)
+            if erro:
+                break
+            medicoes.append(medicao)
+        if erro:
+            resultados[nome] = {'identificacao': obter_backend(nome).identificacao, 'erro': erro}
+            print(f"{resultados[nome]['identificacao']:<20} FALHOU: {erro}")
+            continue
+        extracao = sorted(m['segundos_extracao'] for m in medicoes)
+        gravacao = sorted(m['segundos_gravacao'] for m in medicoes)
+        paginas = medicoes[0]['paginas']
+        selecoes = medicoes[0]['selecoes']
+        if nome == REFERENCIA:
+            referencia = selecoes
+        resultados[nome] = {
+            'identificacao': medicoes[0]['identificacao'],
+            'pdfs': len(pdfs),
+            'paginas': paginas,
+            'segundos_extracao_mediana': extracao[len(extracao) // 2],
+            'paginas_por_segundo': paginas / extracao[len(extracao) // 2],
+            'segundos_gravacao_mediana': gravacao[len(gravacao) // 2],
+            'pico_mb': max(m['pico_mb'] for m in medicoes),
+            'pico_inicial_mb': max(m['pico_inicial_mb'] for m in medicoes),
+            'paginas_selecionadas': sum(len(s) for s in selecoes.values()),
+            'selecao_igual_pypdf2': None if referencia is None else selecoes == referencia,
+            'pdfs_com_selecao_diferente': [] if referencia is None else
+            [pdf for pdf in selecoes if selecoes[pdf] != referencia.get(pdf)],
+        }
+        r = resultados[nome]
+        igual = "-" if r['selecao_igual_pypdf2'] is None else "sim" if r['selecao_igual_pypdf2'] else "NÃO"
+        print(f"{r['identificacao']:<20} {r['segundos_extracao_mediana']:8.2f} s  {r['paginas_por_segundo']:>8,.0f} "
+              f"páginas/s  gravação {r['segundos_gravacao_mediana']:6.2f} s  pico {r['pico_mb']:6.0f} MB  "
+              f"{r['paginas_selecionadas']:>5} selecionadas  igual ao PyPDF2: {igual}")
+        if r['pdfs_com_selecao_diferente']:
+            print(f"{'':<20} seleção diferente em: {', '.join(r['pdfs_com_selecao_diferente'])}")
+
+    base = resultados.get(REFERENCIA)
+    for nome, r in resultados.items():
+        if base and 'erro' not in base and 'erro' not in r and nome != REFERENCIA:
+            print(f"{nome}: extração {base['segundos_extracao_mediana'] / r['segundos_extracao_mediana']:.1f}x "
+                  f"mais rápida que o PyPDF2")
+
+    if args.saida:
+        with open(args.saida, 'w', encoding='utf-8') as f:
+            json.dump(resultados, f, indent=2, ensure_ascii=False)
+        print(f"Resultados salvos em {args.saida}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,143 @@
+"""
+Micro-benchmark da classificação de páginas dos Ofícios.
+
+Compara a busca original (re.search de cada padrão, prioritários e depois
+secundários, com as expressões em texto e o cache de módulo do re) com o
+classificadorPaginas, sobre o mesmo conjunto de páginas: textos sintéticos
+(ofícios com e sem os padrões, além de quase-acertos como "Nome" sem dois
+pontos) ou o texto extraído dos PDFs de uma pasta. Informa páginas/s de cada
+método e se as páginas selecionadas são as mesmas.
+
+Uso:
+    python benchmarkClassificador.py --paginas 20000 --repeticoes 5
+    python benchmarkClassificador.py --pdfs ./documento_Oficio --saida benchmark_classificador.json
+"""
+import argparse
+import json
+import os
+import random
+import re
+import time
+
+from classificadorPaginas import PADROES, PRIORITARIO, classificar_pagina
+
+PALAVRAS = [
+    "processo", "delegacia", "polícia", "civil", "estado", "bahia", "comarca", "juízo", "vara", "criminal",
+    "ofício", "senhor", "excelentíssimo", "encaminhamos", "referente", "autos", "procedimento", "ocorrência",
+    "testemunha", "depoimento", "investigado", "endereço", "rua", "bairro", "município", "data", "assinatura",
+    "escrivão", "delegado", "atenciosamente", "cópia", "anexo", "laudo", "perícia", "auto", "prisão",
+]
+
+# Trechos que fazem a página ser selecionada (e os que quase fazem, para não favorecer o filtro literal)
+TRECHOS_PRIORITARIOS = [
+    "Assunto: Comunicação de Indiciamento e Solicitação de Antecedentes Criminais",
+    "A fim de instruir Inquérito Policial instaurado nesta Delegacia Circunscricional de Polícia, solicito de "
+    "Vossa Senhoria, a prestimosa colaboração no sentido de informar o que consta nesse órgão em desfavor "
+    "do(a) indiciado(a) abaixo qualificado(a):",
+    "por infração a legislação abaixo indicada, ao tempo em que solicitamos os bons préstimos de V. Exa. no "
+    "sentido de que nos seja informado o que consta nos arquivos dessa Coordenação a respeito da sua vida pregressa",
+]
+TRECHOS_SECUNDARIOS = [
+    "Nome: JOSÉ DA SILVA", "Inquérito Policial: 123/2023", "Data do fato: 01/02/2023",
+    "Data da Instauração: 15/03/2023", "Infração Penal: Artigo 155 do CPB",
+]
+QUASE_ACERTOS = [
+    "Nome do escrivão", "Inquérito Policial nº 123", "Data do fato ignorada", "Assunto encaminhado",
+    "a fim de instruir o procedimento", "vida pregressa do investigado",
+]
+
+
+def paginas_sinteticas(quantidade, semente=42, proporcao_uteis=0.1):
+    """Páginas de ~2.500 caracteres; `proporcao_uteis` delas com algum padrão."""
+    aleatorio = random.Random(semente)
+    paginas = []
+    for _ in range(quantidade):
+        linhas = [" ".join(aleatorio.choices(PALAVRAS, k=12)) for _ in range(25)]
+        if aleatorio.random() < 0.3:
+            linhas[aleatorio.randrange(len(linhas))] += " " + aleatorio.choice(QUASE_ACERTOS)
+        if aleatorio.random() < proporcao_uteis:
+            trechos = TRECHOS_PRIORITARIOS if aleatorio.random() < 0.4 else TRECHOS_SECUNDARIOS
+            linhas[aleatorio.randrange(len(linhas))] += " " + aleatorio.choice(trechos)
+        paginas.append("\n".join(linhas))
+    return paginas
+
+
+def paginas_dos_pdfs(pasta):
+    """Texto de todas as páginas (menos a primeira, que os scripts não analisam) dos PDFs da pasta."""
+    from PyPDF2 import PdfReader
+    paginas = []
+    for nome in sorted(os.listdir(pasta)):
+        if nome.lower().endswith(".pdf"):
+            reader = PdfReader(os.path.join(pasta, nome))
+            paginas.extend(pagina.extract_text() for pagina in reader.pages[1:])
+    return paginas
+
+
+# Lógica original de main.py/analisarOficio.py, com os padrões em texto
+PRIORITY_PATTERNS = [padrao.regex.pattern for padrao in PADROES if padrao.tipo == PRIORITARIO]
+SECONDARY_PATTERNS = [padrao.regex.pattern for padrao in PADROES if padrao.tipo != PRIORITARIO]
+
+
+def pagina_util_original(texto_pagina):
+    if texto_pagina:
+        if any(re.search(pattern, texto_pagina, re.IGNORECASE) for pattern in PRIORITY_PATTERNS):
+            return True
+        if any(re.search(pattern, texto_pagina, re.IGNORECASE) for pattern in SECONDARY_PATTERNS):
+            return True
+    return False
+
+
+def pagina_util_classificador(texto_pagina):
+    return classificar_pagina(texto_pagina)["tipo"] is not None
+
+
+METODOS = {
+    "original": pagina_util_original,
+    "classificador": pagina_util_classificador,
+}
+
+
+def medir(funcao, paginas, repeticoes):
+    """Melhor tempo entre as repetições (menos sujeito a ruído) e as seleções da última."""
+    melhor = float("inf")
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        selecionadas = [funcao(texto) for texto in paginas]
+        melhor = min(melhor, time.perf_counter() - inicio)
+    return melhor, selecionadas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--paginas", type=int, default=10_000, help="Páginas sintéticas.")
+    parser.add_argument("--pdfs", default=None, help="Pasta com PDFs de Ofício (em vez das páginas sintéticas).")
+    parser.add_argument("--repeticoes", type=int, default=3)
+    parser.add_argument("--saida", default=None, help="Resultados em JSON.")
+    args = parser.parse_args()
+
+    paginas = paginas_dos_pdfs(args.pdfs) if args.pdfs else paginas_sinteticas(args.paginas)
+    caracteres = sum(len(texto or "") for texto in paginas)
+    print(f"{len(paginas)} páginas, {caracteres / max(len(paginas), 1):,.0f} caracteres por página em média")
+
+    resultados = {}
+    referencia = None
+    for nome, funcao in METODOS.items():
+        tempo, selecionadas = medir(funcao, paginas, args.repeticoes)
+        referencia = referencia if referencia is not None else selecionadas
+        resultados[nome] = {
+            "segundos": round(tempo, 4),
+            "paginas_por_segundo": round(len(paginas) / tempo) if tempo else None,
+            "selecionadas": sum(selecionadas),
+            "igual_ao_original": selecionadas == referencia,
+        }
+        print(f"{nome:>14}: {tempo:.3f} s | {resultados[nome]['paginas_por_segundo']:,} páginas/s | "
+              f"{sum(selecionadas)} selecionadas | igual ao original: {selecionadas == referencia}")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump({"paginas": len(paginas), "metodos": resultados}, f, indent=4, ensure_ascii=False)
+        print(f"Resultados salvos em {args.saida}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,164 @@
+"""
+Cache persistente do texto extraído das páginas dos PDFs (SQLite + zlib).
+
+O texto de cada página fica guardado pela impressão digital do PDF (hash do
+conteúdo), pelo número da página e pelo motor de extração usado (biblioteca e
+versão, ver backendsPdf.py).
+Rodar main.py e analisarOficio.py na mesma pasta, ou repetir o filtro, só
+extrai de novo as páginas de PDFs novos ou alterados. O hash de cada arquivo
+só é recalculado quando o tamanho ou o mtime mudam.
+
+O banco usa journal WAL: os processos do filtro paralelo leem e gravam ao
+mesmo tempo, e as gravações esperam a vez (busy timeout) em vez de falhar.
+
+Exemplo:
+    textos = textos_paginas("oficio.pdf")             # todas as páginas
+    textos = textos_paginas("oficio.pdf", inicio=1)   # a partir da segunda
+    textos = textos_paginas("oficio.pdf", backend="pymupdf")
+"""
+import hashlib
+import os
+import sqlite3
+import sys
+import zlib
+
+from backendsPdf import obter_backend
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.cache_dados import DIR_CACHE_PADRAO
+
+ARQUIVO_CACHE = os.path.join(DIR_CACHE_PADRAO, "texto_paginas.sqlite3")
+
+NIVEL_COMPRESSAO = 6
+ESPERA_BLOQUEIO = 60  # segundos esperando outro processo terminar de gravar
+
+ESQUEMA = """
+CREATE TABLE IF NOT EXISTS arquivos (
+    caminho TEXT PRIMARY KEY,
+    tamanho INTEGER NOT NULL,
+    mtime INTEGER NOT NULL,
+    hash TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS pdfs (
+    hash TEXT PRIMARY KEY,
+    paginas INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS paginas (
+    hash TEXT NOT NULL,
+    extrator TEXT NOT NULL,
+    pagina INTEGER NOT NULL,
+    texto BLOB NOT NULL,
+    PRIMARY KEY (hash, extrator, pagina)
+) WITHOUT ROWID;
+"""
+
+
+def hash_arquivo(caminho, tamanho_bloco=1 << 20):
+    h = hashlib.blake2b(digest_size=16)
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(tamanho_bloco), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+class CacheTexto:
+    def __init__(self, arquivo=None, backend=None):
+        """
+        :param arquivo: Banco SQLite (padrão: texto_paginas.sqlite3 na pasta de cache do projeto).
+        :param backend: Motor de PDF (nome ou instância, ver backendsPdf.py); o texto muda de
+                        um motor ou versão para outro, então a identificação dele faz parte da chave.
+        """
+        self.arquivo = arquivo or ARQUIVO_CACHE
+        self.backend = obter_backend(backend)
+        self.extrator = self.backend.identificacao
+        if self.arquivo != ":memory:":
+            os.makedirs(os.path.dirname(os.path.abspath(self.arquivo)), exist_ok=True)
+        self.conexao = sqlite3.connect(self.arquivo, timeout=ESPERA_BLOQUEIO)
+        self.conexao.execute("PRAGMA journal_mode=WAL")
+        self.conexao.execute("PRAGMA synchronous=NORMAL")
+        self.conexao.executescript(ESQUEMA)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+    def fechar(self):
+        self.conexao.close()
+
+    def hash_pdf(self, caminho):
+        """Hash do conteúdo do PDF, recalculado só quando o tamanho ou o mtime mudam."""
+        caminho_abs = os.path.abspath(caminho)
+        info = os.stat(caminho_abs)
+        linha = self.conexao.execute(
+            "SELECT hash FROM arquivos WHERE caminho = ? AND tamanho = ? AND mtime = ?",
+            (caminho_abs, info.st_size, info.st_mtime_ns)
+        ).fetchone()
+        if linha:
+            return linha[0]
+        digital = hash_arquivo(caminho_abs)
+        with self.conexao:
+            self.conexao.execute("INSERT OR REPLACE INTO arquivos VALUES (?, ?, ?, ?)",
+                                 (caminho_abs, info.st_size, info.st_mtime_ns, digital))
+        return digital
+
+    def total_paginas(self, caminho, documento=None):
+        """Quantidade de páginas do PDF (o PDF só é aberto na primeira vez)."""
+        digital = self.hash_pdf(caminho)
+        linha = self.conexao.execute("SELECT paginas FROM pdfs WHERE hash = ?", (digital,)).fetchone()
+        if linha:
+            return linha[0]
+        if documento is None:
+            with self.backend.abrir(caminho) as documento:
+                total = len(documento)
+        else:
+            total = len(documento)
+        with self.conexao:
+            self.conexao.execute("INSERT OR REPLACE INTO pdfs VALUES (?, ?)", (digital, total))
+        return total
+
+    def textos_paginas(self, caminho, inicio=0, fim=None):
+        """
+        Texto das páginas [inicio, fim) do PDF, na ordem das páginas.
+
+        Só as páginas que não estão no cache são extraídas (e gravadas); o PDF só
+        é aberto se faltar alguma.
+        """
+        digital = self.hash_pdf(caminho)
+        total = self.total_paginas(caminho)
+        fim = total if fim is None else min(fim, total)
+        textos = {
+            pagina: zlib.decompress(texto).decode("utf-8")
+            for pagina, texto in self.conexao.execute(
+                "SELECT pagina, texto FROM paginas WHERE hash = ? AND extrator = ? AND pagina >= ? AND pagina < ?",
+                (digital, self.extrator, inicio, fim)
+            )
+        }
+        faltando = [pagina for pagina in range(inicio, fim) if pagina not in textos]
+        if faltando:
+            with self.backend.abrir(caminho) as documento:
+                novos = [(pagina, documento.texto(pagina)) for pagina in faltando]
+            with self.conexao:
+                self.conexao.executemany(
+                    "INSERT OR REPLACE INTO paginas VALUES (?, ?, ?, ?)",
+                    [(digital, self.extrator, pagina, zlib.compress(texto.encode("utf-8"), NIVEL_COMPRESSAO))
+                     for pagina, texto in novos]
+                )
+            textos.update(novos)
+        return [textos[pagina] for pagina in range(inicio, fim)]
+
+
+def textos_paginas(caminho, inicio=0, fim=None, usar_cache=True, arquivo_cache=None, backend=None):
+    """
+    Texto das páginas [inicio, fim) do PDF.
+
+    :param usar_cache: Se False, extrai tudo do PDF sem consultar nem gravar o cache.
+    :param backend: Motor de PDF (nome ou instância; padrão: PyPDF2).
+    """
+    if not usar_cache:
+        with obter_backend(backend).abrir(caminho) as documento:
+            fim = len(documento) if fim is None else min(fim, len(documento))
+            return [documento.texto(pagina) for pagina in range(inicio, fim)]
+    with CacheTexto(arquivo_cache, backend) as cache:
+        return cache.textos_paginas(caminho, inicio, fim)
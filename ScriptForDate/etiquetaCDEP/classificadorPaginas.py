@@ -0,0 +1,88 @@
+"""
+Classificação das páginas dos Ofícios pelos padrões de texto do filtro CDEP.
+
+Os padrões ficam compilados uma única vez. Cada padrão tem um trecho literal
+obrigatório (ex.: "assunto:"). Para cada página, o texto é passado para
+minúsculas uma vez e só os padrões cujo trecho aparece nele são
+procurados. Como quase nenhuma página tem os trechos, a maioria é
+classificada sem nenhuma busca por expressão regular.
+
+A classificação segue a regra dos scripts: a página é útil se tiver algum
+padrão prioritário ou, na falta deles, algum secundário.
+
+Exemplo:
+    classificar_pagina(texto)
+    # {"tipo": "prioritario", "padroes": ["indiciamento", "nome"]}
+"""
+import re
+from collections import namedtuple
+
+PRIORITARIO = "prioritario"
+SECUNDARIO = "secundario"
+
+# literal: trecho que toda ocorrência do padrão contém (em minúsculas, sem partes com \s*)
+Padrao = namedtuple('Padrao', ['nome', 'tipo', 'regex', 'literal'])
+
+
+def _padrao(nome, tipo, expressao, literal):
+    return Padrao(nome, tipo, re.compile(expressao, re.IGNORECASE), literal)
+
+
+PADROES = [
+    # Padrões PRINCIPAIS (prioridade na busca)
+    # Padrão 1: Comunicação de Indiciamento e Solicitação de Antecedentes Criminais
+    _padrao("indiciamento", PRIORITARIO,
+            r"Assunto:\s*Comunicação\s*de\s*Indiciamento\s*e\s*Solicitação\s*de\s*Antecedentes\s*Criminais",
+            "assunto:"),
+    # Padrão 2: Pedido de Informações sobre Antecedentes
+    _padrao("antecedentes", PRIORITARIO,
+            r"A\s*fim\s*de\s*instruir\s*Inquérito\s*Policial\s*instaurado\s*nesta\s*Delegacia\s*Circunscricional\s*de\s*Polícia,?\s*"
+            r"solicito\s*de\s*Vossa\s*Senhoria,?\s*a\s*prestimosa\s*colaboração\s*no\s*sentido\s*de\s*informar\s*o\s*que\s*consta\s*"
+            r"nesse\s*órgão\s*em\s*desfavor\s*do\(a\)\s*indiciado\(a\)\s*abaixo\s*qualificado\(a\):",
+            "instruir"),
+    # Padrão 3: Solicitação de Vida Pregressa
+    _padrao("vida_pregressa", PRIORITARIO,
+            r"por\s*infração\s*a\s*legislação\s*abaixo\s*indicada,?\s*ao\s*tempo\s*em\s*que\s*solicitamos\s*os\s*bons\s*préstimos\s*"
+            r"de\s*V\.?\s*Exa\.?\s*no\s*sentido\s*de\s*que\s*nos\s*seja\s*informado\s*o\s*que\s*consta\s*nos\s*arquivos\s*dessa\s*"
+            r"Coordenação\s*a\s*respeito\s*da\s*sua\s*vida\s*pregressa",
+            "pregressa"),
+
+    # Padrões SECUNDÁRIOS (apenas se os principais não forem encontrados)
+    _padrao("nome", SECUNDARIO, r"Nome:\s*\w+", "nome:"),  # Lista de qualificação do indiciado
+    _padrao("inquerito", SECUNDARIO, r"Inquérito Policial:\s*\d+/\d{4}", "inquérito policial:"),
+    _padrao("data_fato", SECUNDARIO, r"Data do fato:\s*\d{2}/\d{2}/\d{4}", "data do fato:"),
+    _padrao("data_instauracao", SECUNDARIO, r"Data da Instauração:\s*\d{2}/\d{2}/\d{4}", "data da instauração:"),
+    _padrao("infracao", SECUNDARIO, r"Infração Penal:\s*Artigo\s*\d+\s*do\s*CPB", "infração penal:"),
+]
+
+# Letras que o re.IGNORECASE iguala a i/s, mas que str.lower() não transforma nelas
+SUBSTITUICOES_MINUSCULAS = (("İ", "I"), ("ı", "i"), ("ſ", "s"))
+
+
+def _minusculas(texto):
+    """Texto em minúsculas para o filtro pelos trechos literais."""
+    for letra, equivalente in SUBSTITUICOES_MINUSCULAS:
+        if letra in texto:
+            texto = texto.replace(letra, equivalente)
+    return texto.lower()
+
+
+def classificar_pagina(texto):
+    """
+    Padrões encontrados no texto de uma página.
+
+    :return: {"tipo": "prioritario", "secundario" ou None, "padroes": [nomes dos padrões encontrados]}
+    """
+    if not texto:
+        return {"tipo": None, "padroes": []}
+    minusculas = _minusculas(texto)
+    encontrados = [padrao for padrao in PADROES
+                   if padrao.literal in minusculas and padrao.regex.search(texto)]
+    tipos = {padrao.tipo for padrao in encontrados}
+    tipo = PRIORITARIO if PRIORITARIO in tipos else SECUNDARIO if tipos else None
+    return {"tipo": tipo, "padroes": [padrao.nome for padrao in encontrados]}
+
+
+def pagina_util(texto):
+    """True se a página tem algum padrão prioritário ou secundário."""
+    return classificar_pagina(texto)["tipo"] is not None
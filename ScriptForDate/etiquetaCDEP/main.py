@@ -1,9 +1,18 @@
 import os
-import re
 import json
 import csv
+import sys
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
 from PyPDF2 import PdfReader, PdfWriter
-from openpyxl import Workbook
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.cnj import buscar_numero, normalizar_numero
+from comum.exportacao import exportar_excel
+from backendsPdf import obter_backend
+from cacheTexto import CacheTexto, textos_paginas
+from classificadorPaginas import classificar_pagina
 
 # -------------- CONFIGURAÇÕES INICIAIS --------------
 # Diretório de arquivos originais de Ofício
@@ -27,102 +36,132 @@ DIR_MERGES = "./ArquivosProntosCDEP"
 # Caminho da planilha Excel de resumo
 XLSX_RESUMO = "ResumoProcessos.xlsx"
 
+# Segmento, tribunal e origem dos processos da comarca (J.TR.OOOO)
+SUFIXO_COMARCA = "8.05.0216"
+
+# Filtragem dos Ofícios em um pool de processos (None = todos os núcleos)
+FILTRO_PARALELO = True
+PROCESSOS_FILTRO = None
+
+# Páginas por tarefa no modo paralelo: PDFs maiores são divididos em faixas
+PAGINAS_POR_TAREFA = 50
+
+# Reaproveita o texto já extraído das páginas (cacheTexto.py); False extrai tudo de novo
+USAR_CACHE_TEXTO = True
+
+# Motor de PDF para o texto e o filtrado (backendsPdf.py): "pypdf2", "pymupdf", "pdfium"
+# ou None para o padrão (variável PJE_BACKEND_PDF ou PyPDF2)
+BACKEND_PDF = None
+
 # ----------------------------------------------------
 
-# ----------- PADRÕES PARA FILTRAR PÁGINAS NO OFÍCIO -----------
-priority_patterns = [
-    # Padrão 1: Comunicação de Indiciamento e Solicitação de Antecedentes Criminais
-    r"Assunto:\s*Comunicação\s*de\s*Indiciamento\s*e\s*Solicitação\s*de\s*Antecedentes\s*Criminais",
-    
-    # Padrão 2: Pedido de Informações sobre Antecedentes
-    r"A\s*fim\s*de\s*instruir\s*Inquérito\s*Policial\s*instaurado\s*nesta\s*Delegacia\s*Circunscricional\s*de\s*Polícia,?\s*"
-    r"solicito\s*de\s*Vossa\s*Senhoria,?\s*a\s*prestimosa\s*colaboração\s*no\s*sentido\s*de\s*informar\s*o\s*que\s*consta\s*"
-    r"nesse\s*órgão\s*em\s*desfavor\s*do\(a\)\s*indiciado\(a\)\s*abaixo\s*qualificado\(a\):",
-    
-    # Padrão 3: Solicitação de Vida Pregressa
-    r"por\s*infração\s*a\s*legislação\s*abaixo\s*indicada,?\s*ao\s*tempo\s*em\s*que\s*solicitamos\s*os\s*bons\s*préstimos\s*"
-    r"de\s*V\.?\s*Exa\.?\s*no\s*sentido\s*de\s*que\s*nos\s*seja\s*informado\s*o\s*que\s*consta\s*nos\s*arquivos\s*dessa\s*"
-    r"Coordenação\s*a\s*respeito\s*da\s*sua\s*vida\s*pregressa"
-]
-
-# Padrões SECUNDÁRIOS (apenas se os principais não forem encontrados)
-secondary_patterns = [
-    r"Nome:\s*\w+",  # Padrão para encontrar a lista de qualificação do indiciado
-    r"Inquérito Policial:\s*\d+/\d{4}",  # Informação sobre inquérito
-    r"Data do fato:\s*\d{2}/\d{2}/\d{4}",  # Data do crime
-    r"Data da Instauração:\s*\d{2}/\d{2}/\d{4}",  # Data de instauração do inquérito
-    r"Infração Penal:\s*Artigo\s*\d+\s*do\s*CPB",  # Infração penal mencionada
-]
-
-# Estrutura para armazenar resultado do filtro (Ofícios)
-resultado_filtro_oficios = {"processados": [], "nao_processados": []}
+# Padrões para filtrar páginas no Ofício: ver classificadorPaginas.py
 
-def extrair_paginas_uteis(pdf_path, output_path):
+# Estrutura para armazenar resultado do filtro (Ofícios); "paginas" guarda, para cada
+# Ofício, as páginas selecionadas e os padrões encontrados em cada uma
+resultado_filtro_oficios = {"processados": [], "nao_processados": [], "paginas": {}}
+
+def selecionar_paginas(pdf_path, inicio=1, fim=None):
     """
-    Extrai a primeira página e páginas que contenham padrões
-    (prioritários ou secundários) de um PDF de Ofício.
-    Salva o PDF filtrado em output_path se encontrar algo além da primeira página.
+    Páginas úteis entre `inicio` e `fim` (exclusivo): {índice a partir de 0: classificação}.
+    A primeira página (0) entra sempre no filtrado e não é analisada.
+    O texto das páginas vem do cache (cacheTexto.py) quando o PDF não mudou.
     """
-    reader = PdfReader(pdf_path)
-    writer = PdfWriter()
-    
-    # Adiciona SEMPRE a primeira página
-    writer.add_page(reader.pages[0])  
-    
-    paginas_adicionadas = 1
-    encontrou_pagina = False
-    
-    # Percorre as páginas (a partir da segunda) procurando padrões
-    for i in range(1, len(reader.pages)):
-        texto_pagina = reader.pages[i].extract_text()
-        if texto_pagina:
-            # Primeiro procura pelos padrões prioritários
-            if any(re.search(pattern, texto_pagina, re.IGNORECASE) for pattern in priority_patterns):
-                writer.add_page(reader.pages[i])
-                paginas_adicionadas += 1
-                encontrou_pagina = True
-                # Não verifica padrões secundários se já achou prioridade
-                continue
-            
-            # Se não achou prioridade, verifica padrões secundários
-            if any(re.search(pattern, texto_pagina, re.IGNORECASE) for pattern in secondary_patterns):
-                writer.add_page(reader.pages[i])
-                paginas_adicionadas += 1
-                encontrou_pagina = True
-
-    # Se encontrar algo além da primeira, salva um novo PDF
-    if encontrou_pagina:
-        with open(output_path, "wb") as output_pdf:
-            writer.write(output_pdf)
+    inicio = max(inicio, 1)
+    paginas = {}
+    for i, texto in enumerate(textos_paginas(pdf_path, inicio, fim, USAR_CACHE_TEXTO, backend=BACKEND_PDF), start=inicio):
+        classificacao = classificar_pagina(texto)
+        if classificacao["tipo"]:
+            paginas[i] = classificacao
+    return paginas
+
+def gravar_filtrado(pdf_path, output_path, paginas):
+    """
+    Salva em output_path a primeira página e as páginas selecionadas ({índice:
+    classificação}, como devolvido por selecionar_paginas) e registra o Ofício
+    como processado (achou páginas além da primeira) ou não processado.
+    """
+    # Adiciona SEMPRE a primeira página; mesmo sem páginas relevantes, salva o PDF só com ela
+    obter_backend(BACKEND_PDF).gravar_paginas(pdf_path, [0, *paginas], output_path)
+    resultado_filtro_oficios["paginas"][pdf_path] = [
+        {"pagina": i + 1, **classificacao} for i, classificacao in paginas.items()
+    ]
+    if paginas:
         resultado_filtro_oficios["processados"].append(pdf_path)
         print(f"[Filtrar] Novo PDF salvo: {output_path}")
     else:
-        # Caso não tenha páginas relevantes, só salva a primeira mesmo,
-        # mas pode-se decidir não salvar se preferir.
-        # Exemplo: salvando mesmo assim
-        with open(output_path, "wb") as output_pdf:
-            writer.write(output_pdf)
         resultado_filtro_oficios["nao_processados"].append(pdf_path)
         print(f"[Filtrar] Somente primeira página (nenhuma página com padrões) em: {pdf_path}")
 
-def filtrar_oficios():
+def extrair_paginas_uteis(pdf_path, output_path):
+    """
+    Extrai a primeira página e páginas que contenham padrões
+    (prioritários ou secundários) de um PDF de Ofício.
+    Salva o PDF filtrado em output_path.
+    """
+    gravar_filtrado(pdf_path, output_path, selecionar_paginas(pdf_path))
+
+def dividir_em_tarefas(pdf_paths, paginas_por_tarefa=PAGINAS_POR_TAREFA):
+    """
+    Tarefas (pdf, início, fim) do modo paralelo: cada PDF vira uma tarefa, e os
+    muito grandes são divididos em faixas de `paginas_por_tarefa` páginas.
+    """
+    tarefas = []
+    # Sem o cache de texto, o banco em memória só conta as páginas
+    with CacheTexto(None if USAR_CACHE_TEXTO else ":memory:", BACKEND_PDF) as cache:
+        for pdf_path in pdf_paths:
+            total = cache.total_paginas(pdf_path)
+            for inicio in range(1, max(total, 2), paginas_por_tarefa):
+                tarefas.append((pdf_path, inicio, min(inicio + paginas_por_tarefa, total)))
+    return tarefas
+
+def _selecionar_paginas_pool(tarefa):
+    """Análise de uma faixa de páginas em um processo do pool: devolve (pdf, {página: classificação}, situação)."""
+    pdf_path, inicio, fim = tarefa
+    paginas = selecionar_paginas(pdf_path, inicio, fim)
+    return pdf_path, paginas, "processados" if paginas else "nao_processados"
+
+def filtrar_em_paralelo(pdf_paths, processos=None, paginas_por_tarefa=PAGINAS_POR_TAREFA):
+    """
+    Mesmo resultado de extrair_paginas_uteis para cada PDF, com a extração de texto
+    distribuída em um pool de processos.
+
+    Só a seleção das páginas roda nos processos; a gravação dos PDFs e o registro no
+    JSON ficam no processo principal, na ordem de `pdf_paths`.
+    """
+    tarefas = dividir_em_tarefas(pdf_paths, paginas_por_tarefa)
+    faixas_pendentes = Counter(pdf_path for pdf_path, _, _ in tarefas)
+    paginas_por_pdf = {pdf_path: {} for pdf_path in pdf_paths}
+    with ProcessPoolExecutor(max_workers=processos) as pool:
+        # map devolve na ordem das tarefas: as faixas de cada PDF chegam em sequência e em ordem
+        for pdf_path, paginas, _ in pool.map(_selecionar_paginas_pool, tarefas):
+            paginas_por_pdf[pdf_path].update(paginas)
+            faixas_pendentes[pdf_path] -= 1
+            if not faixas_pendentes[pdf_path]:
+                output_path = os.path.join(DIR_OFICIOS_FILTRADOS, f"filtrado_{os.path.basename(pdf_path)}")
+                gravar_filtrado(pdf_path, output_path, paginas_por_pdf.pop(pdf_path))
+
+def filtrar_oficios(paralelo=FILTRO_PARALELO, processos=PROCESSOS_FILTRO):
     """
     Filtra todos os PDFs no diretório de Ofícios (DIR_OFICIOS_ORIGINAIS),
     salvando a saída no DIR_OFICIOS_FILTRADOS.
+    Os PDFs são percorridos em ordem alfabética, com ou sem o modo paralelo.
     """
     # Garantir que a pasta de saída exista
     os.makedirs(DIR_OFICIOS_FILTRADOS, exist_ok=True)
-    
-    pdf_encontrados = False
-    for pdf_file in os.listdir(DIR_OFICIOS_ORIGINAIS):
-        if pdf_file.lower().endswith(".pdf"):
-            pdf_encontrados = True
-            pdf_path = os.path.join(DIR_OFICIOS_ORIGINAIS, pdf_file)
-            output_path = os.path.join(DIR_OFICIOS_FILTRADOS, f"filtrado_{pdf_file}")
-            extrair_paginas_uteis(pdf_path, output_path)
 
-    if not pdf_encontrados:
+    pdf_paths = [os.path.join(DIR_OFICIOS_ORIGINAIS, pdf_file)
+                 for pdf_file in sorted(os.listdir(DIR_OFICIOS_ORIGINAIS))
+                 if pdf_file.lower().endswith(".pdf")]
+
+    if not pdf_paths:
         print("Nenhum arquivo PDF encontrado na pasta de entrada de Ofícios.")
+    elif paralelo:
+        filtrar_em_paralelo(pdf_paths, processos)
+    else:
+        for pdf_path in pdf_paths:
+            output_path = os.path.join(DIR_OFICIOS_FILTRADOS, f"filtrado_{os.path.basename(pdf_path)}")
+            extrair_paginas_uteis(pdf_path, output_path)
 
     # Salva os resultados do filtro em JSON
     with open(JSON_OUTPUT, "w", encoding="utf-8") as json_file:
@@ -161,10 +200,8 @@ def main():
     if not os.path.exists(DIR_MERGES):
         os.makedirs(DIR_MERGES)
 
-    # 2. Regex para capturar o número de processo no formato:
-    #    ex: 0001176-79.2013.8.05.0216
-    #    Pega 15 caracteres (dígitos, ponto, hífen) antes de ".8.05.0216"
-    pattern_processo = re.compile(r'(?P<processo>[0-9.\-]{15}\.8\.05\.0216)')
+    # 2. Número de processo da comarca no nome do arquivo, no formato CNJ:
+    #    ex: 0001176-79.2013.8.05.0216 (também aceito só com os dígitos)
 
     # Dicionários para mapear {numero_processo: caminho_pdf}
     pdf_oficios_dict = {}
@@ -175,9 +212,8 @@ def main():
         for arquivo in os.listdir(DIR_OFICIOS_FILTRADOS):
             if arquivo.lower().endswith(".pdf"):
                 caminho = os.path.join(DIR_OFICIOS_FILTRADOS, arquivo)
-                match = pattern_processo.search(arquivo)
-                if match:
-                    num_processo = match.group("processo")
+                num_processo = buscar_numero(arquivo, SUFIXO_COMARCA)
+                if num_processo:
                     pdf_oficios_dict[num_processo] = caminho
 
     # 2b. Identificar processos nas Sentenças --------------------------
@@ -185,9 +221,8 @@ def main():
         for arquivo in os.listdir(DIR_SENTENCAS):
             if arquivo.lower().endswith(".pdf"):
                 caminho = os.path.join(DIR_SENTENCAS, arquivo)
-                match = pattern_processo.search(arquivo)
-                if match:
-                    num_processo = match.group("processo")
+                num_processo = buscar_numero(arquivo, SUFIXO_COMARCA)
+                if num_processo:
                     pdf_sentenças_dict[num_processo] = caminho
 
     # 3. Ler a lista de TODOS os processos a partir do CSV -------------
@@ -197,24 +232,13 @@ def main():
             leitor = csv.DictReader(f, delimiter=";")
             for linha in leitor:
                 # Supondo que a coluna seja exatamente "numeroProcesso"
-                todos_processos.append(linha["numeroProcesso"])
+                todos_processos.append(normalizar_numero(linha["numeroProcesso"]) or linha["numeroProcesso"])
     else:
         print(f"ERRO: O arquivo {CSV_TODOS_PROCESSOS} não foi encontrado.")
         return
 
     # 4. Criar planilha de resumo --------------------------------------
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Resumo de Processos"
-
-    # Cabeçalho
-    ws.append([
-        "numeroProcesso", 
-        "Presente em Sentenças?",
-        "Presente em Ofícios?",
-        "Status do Merge",
-        "Motivo"
-    ])
+    linhas_resumo = []
 
     # Conjuntos para verificar presença
     set_oficios = set(pdf_oficios_dict.keys())
@@ -252,7 +276,7 @@ def main():
                 motivo = "desconhecido"  # caso inesperado
 
         # Adiciona linha no Excel
-        ws.append([
+        linhas_resumo.append([
             processo,
             sentenca_flag,
             oficio_flag,
@@ -261,7 +285,14 @@ def main():
         ])
 
     # 6. Salvar o Excel de resumo --------------------------------------
-    wb.save(XLSX_RESUMO)
+    resumo = pd.DataFrame(linhas_resumo, columns=[
+        "numeroProcesso",
+        "Presente em Sentenças?",
+        "Presente em Ofícios?",
+        "Status do Merge",
+        "Motivo"
+    ])
+    exportar_excel(resumo, XLSX_RESUMO, nome_aba="Resumo de Processos")
     print(f"\nPlanilha de resumo '{XLSX_RESUMO}' criada com sucesso.")
 
 # ---------- DISPARA O SCRIPT PRINCIPAL -----------
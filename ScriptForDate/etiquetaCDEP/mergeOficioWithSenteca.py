@@ -1,8 +1,15 @@
 #!/usr/bin/env python3
 import os
-import re
+import sys
 from PyPDF2 import PdfReader, PdfWriter
-from openpyxl import Workbook
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.cnj import buscar_numero
+from comum.exportacao import exportar_excel
+
+# Segmento, tribunal e origem dos processos da comarca (J.TR.OOOO)
+SUFIXO_COMARCA = "8.05.0216"
 
 def merge_pdfs(pdf_paths, output_path):
     """Mescla (merge) a lista de PDFs em um único arquivo."""
@@ -35,11 +42,9 @@ def main():
     pdf_sentenca = {}
 
     # ------------------------------------------------------------
-    # Regex que captura exatos 15 caracteres (podendo ser dígitos,
-    # ponto ou hífen) imediatamente antes de ".8.05.0216".
+    # Número de processo da comarca (formato CNJ) no nome do arquivo.
     # Exemplo: 0001176-79.2013.8.05.0216 ou 8001176-79.2013.8.05.0216
     # ------------------------------------------------------------
-    pattern = re.compile(r'(?P<processo>[0-9.\-]{15}\.8\.05\.0216)')
 
     # -----------------------------
     # Verifica se os diretórios de ofício e sentença existem
@@ -57,9 +62,8 @@ def main():
     for arquivo in os.listdir(dir_oficio):
         if arquivo.lower().endswith(".pdf"):
             caminho = os.path.join(dir_oficio, arquivo)
-            match = pattern.search(arquivo)
-            if match:
-                num_processo = match.group("processo")
+            num_processo = buscar_numero(arquivo, SUFIXO_COMARCA)
+            if num_processo:
                 pdf_oficio[num_processo] = caminho
 
     # -----------------------------
@@ -68,9 +72,8 @@ def main():
     for arquivo in os.listdir(dir_sentenca):
         if arquivo.lower().endswith(".pdf"):
             caminho = os.path.join(dir_sentenca, arquivo)
-            match = pattern.search(arquivo)
-            if match:
-                num_processo = match.group("processo")
+            num_processo = buscar_numero(arquivo, SUFIXO_COMARCA)
+            if num_processo:
                 pdf_sentenca[num_processo] = caminho
 
     # -----------------------------
@@ -94,10 +97,7 @@ def main():
     # Cria a planilha de resumo
     # -----------------------------
     # Cabeçalho: Processo, Status, Erro
-    wb = Workbook()
-    ws = wb.active
-    ws.title = "Resumo de Processos"
-    ws.append(["Processo", "Status", "Erro"])
+    linhas_resumo = []
 
     # -----------------------------
     # Preenche a planilha
@@ -126,13 +126,14 @@ def main():
             else:
                 erro = "Desconhecido"  # Caso improvável
 
-        ws.append([processo, status, erro])
+        linhas_resumo.append([processo, status, erro])
 
     # -----------------------------
     # Salva a planilha
     # -----------------------------
     planilha_saida = "ResumoProcessos.xlsx"
-    wb.save(planilha_saida)
+    exportar_excel(pd.DataFrame(linhas_resumo, columns=["Processo", "Status", "Erro"]),
+                   planilha_saida, nome_aba="Resumo de Processos")
     print(f"\nPlanilha '{planilha_saida}' criada com sucesso.")
 
 if __name__ == "__main__":
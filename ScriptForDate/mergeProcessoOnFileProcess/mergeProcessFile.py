@@ -1,39 +1,229 @@
+"""
+Junta os CSVs de processos exportados do PJe (pasta ./processos) em uma única base.
+
+Os arquivos são lidos em paralelo pelo leitor de CSV do pyarrow e gravados em
+streaming, sem montar a base inteira em memória:
+
+- cada arquivo é validado contra as 19 colunas esperadas (arquivos sem alguma
+  delas são informados e ignorados);
+- as flags pode*EmLote viram booleanos e as colunas com poucos valores
+  distintos (orgaoJulgador, classeJudicial, nomeTarefa, cargoJudicial) são
+  lidas já codificadas em dicionário;
+- processos repetidos (mesmo numeroProcesso) ficam só na primeira ocorrência,
+  seguindo a ordem alfabética dos arquivos.
+
+A saída é um dataset Parquet particionado no estilo Hive
+(merged_processos/orgaoJulgador=.../part-0.parquet), lido por colunas pelos
+scripts seguintes (ex.: BD_Obitos_with_BD_Pje.py). Cada execução substitui o
+dataset inteiro (gravado em uma pasta temporária e trocado no final), então
+não sobram partições de execuções anteriores. O CSV combinado continua
+disponível com --csv.
+
+Uso:
+    python mergeProcessFile.py --pasta ./processos --saida merged_processos --csv merged_processos.csv
+"""
+import argparse
 import os
-import pandas as pd
+import sys
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
 
-# Diretório contendo os arquivos CSV
-directory = './processos'
+import numpy as np
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+import pyarrow.dataset as ds
 
-# Lista para armazenar os DataFrames
-dataframes = []
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.exportacao import pasta_substituta
+from comum.progresso import Progresso
 
 # Nomes das colunas, conforme fornecido
-columns = [
+COLUNAS = [
     'poloAtivo', 'poloPassivo', 'numeroProcesso', 'classeJudicial',
-    'orgaoJulgador', 'dataChegada', 'conferido', 'nomeTarefa', 
-     'tagsProcessoList', 'podeMovimentarEmLote',
+    'orgaoJulgador', 'dataChegada', 'conferido', 'nomeTarefa',
+    'tagsProcessoList', 'podeMovimentarEmLote',
     'podeMinutarEmLote', 'podeIntimarEmLote', 'podeDesignarAudienciaEmLote',
     'podeDesignarPericiaEmLote', 'podeRenajudEmLote', 'assuntoPrincipal',
     'cargoJudicial', 'ultimoMovimento', 'descricaoUltimoMovimento'
 ]
 
-# Iterar sobre todos os arquivos no diretório
-for filename in os.listdir(directory):
-    if filename.endswith('.csv'):
-        file_path = os.path.join(directory, filename)
-        try:
-            # Ler o arquivo CSV com ponto-e-vírgula como separador
-            df = pd.read_csv(file_path, sep=';', usecols=columns, engine='python')
-            dataframes.append(df)
-        except Exception as e:
-            print(f"Erro ao processar o arquivo {filename}: {e}")
-
-# Concatenar todos os DataFrames em um único
-if dataframes:
-    merged_df = pd.concat(dataframes, ignore_index=True)
-    
-    # Salvar o resultado em um novo arquivo CSV
-    merged_df.to_csv('merged_processos.csv', sep=',', index=False)
-    print("Arquivos combinados e salvos como 'merged_processos.csv'.")
-else:
-    print("Nenhum arquivo válido encontrado para combinar.")
+COLUNAS_BOOLEANAS = [coluna for coluna in COLUNAS if coluna.startswith('pode') and coluna.endswith('EmLote')]
+COLUNAS_DICIONARIO = ['orgaoJulgador', 'classeJudicial', 'nomeTarefa', 'cargoJudicial']
+
+TIPO_DICIONARIO = pa.dictionary(pa.int32(), pa.string())
+
+ESQUEMA = pa.schema([
+    (coluna, pa.bool_() if coluna in COLUNAS_BOOLEANAS
+     else TIPO_DICIONARIO if coluna in COLUNAS_DICIONARIO
+     else pa.string())
+    for coluna in COLUNAS
+])
+
+PARTICOES_PADRAO = ('orgaoJulgador',)
+
+
+def listar_csvs(pasta):
+    """CSVs da pasta, em ordem alfabética (a ordem decide qual cópia de um processo repetido fica)."""
+    return [os.path.join(pasta, nome) for nome in sorted(os.listdir(pasta)) if nome.endswith('.csv')]
+
+
+def ler_csv(caminho, sep=';', encoding='utf8'):
+    """
+    Lê um CSV de processos já no esquema da base.
+
+    Levanta erro se faltar alguma das colunas ou se uma flag pode*EmLote
+    tiver um valor que não seja booleano.
+    """
+    tabela = pa_csv.read_csv(
+        caminho,
+        read_options=pa_csv.ReadOptions(encoding=encoding),
+        parse_options=pa_csv.ParseOptions(delimiter=sep, newlines_in_values=True),
+        convert_options=pa_csv.ConvertOptions(
+            include_columns=COLUNAS,
+            column_types=ESQUEMA,
+            strings_can_be_null=True,
+        ),
+    )
+    if not tabela.schema.equals(ESQUEMA):
+        raise ValueError(f"esquema inesperado: {tabela.schema}")
+    return tabela
+
+
+def _ler_ou_erro(caminho):
+    try:
+        return ler_csv(caminho), None
+    except (pa.ArrowException, KeyError, ValueError) as e:
+        return None, e
+
+
+def ler_em_paralelo(arquivos, processos=None, adiantados=None):
+    """
+    Lê os arquivos em threads (o pyarrow libera o GIL) e entrega (arquivo, tabela, erro) na ordem da lista.
+
+    No máximo `adiantados` leituras ficam em andamento ou à espera de consumo,
+    para a memória não crescer com a quantidade de arquivos.
+    """
+    processos = processos or min(8, os.cpu_count() or 1)
+    adiantados = adiantados or processos * 2
+    pendentes = deque()
+    with ThreadPoolExecutor(max_workers=processos) as executor:
+        for arquivo in arquivos:
+            pendentes.append((arquivo, executor.submit(_ler_ou_erro, arquivo)))
+            if len(pendentes) >= adiantados:
+                arquivo_pronto, futuro = pendentes.popleft()
+                yield (arquivo_pronto, *futuro.result())
+        while pendentes:
+            arquivo_pronto, futuro = pendentes.popleft()
+            yield (arquivo_pronto, *futuro.result())
+
+
+def sem_repetidos(tabela, vistos):
+    """
+    Remove da tabela os processos já vistos (em `vistos` ou mais acima na própria tabela).
+
+    Linhas sem numeroProcesso são mantidas. `vistos` é atualizado com os números mantidos.
+    """
+    numeros = tabela.column('numeroProcesso').to_pandas()
+    primeiros = (numeros.notna() & ~numeros.duplicated()).to_numpy()
+    candidatos = numeros.to_numpy()[primeiros]
+    # Consulta item a item ao set: isin(vistos) montaria de novo, a cada arquivo, a tabela
+    # hash de todos os números já vistos (custo quadrático no número de arquivos)
+    novos = np.fromiter((numero not in vistos for numero in candidatos), dtype=bool, count=len(candidatos))
+    vistos.update(candidatos[novos])
+    manter = numeros.isna().to_numpy(copy=True)
+    manter[np.flatnonzero(primeiros)[novos]] = True
+    if manter.all():
+        return tabela
+    return tabela.filter(pa.array(manter))
+
+
+def _tabela_csv(tabela):
+    """Dicionários de volta a texto, para gravar no CSV."""
+    return tabela.cast(pa.schema([
+        pa.field(campo.name, pa.string()) if pa.types.is_dictionary(campo.type) else campo
+        for campo in tabela.schema
+    ]))
+
+
+def mesclar_processos(pasta='./processos', destino='merged_processos', destino_csv=None,
+                      particoes=PARTICOES_PADRAO, compressao='zstd', processos=None):
+    """
+    Junta os CSVs da pasta em um dataset Parquet particionado (e, opcionalmente, em um CSV).
+
+    :param particoes: Colunas de partição do dataset (vazio grava arquivos sem partição).
+    :param processos: Quantidade de leituras simultâneas (padrão: núcleos da máquina, até 8).
+    :return: Dicionário com as contagens de arquivos e linhas.
+    """
+    progresso = Progresso('mergeProcessFile')
+    arquivos = listar_csvs(pasta)
+    contagem = {'arquivos': len(arquivos), 'arquivos_com_erro': 0, 'linhas_lidas': 0, 'linhas_gravadas': 0}
+    vistos = set()
+    escritor_csv = None
+
+    def lotes():
+        nonlocal escritor_csv
+        progresso.iniciar(len(arquivos), "Combinando arquivos")
+        for arquivo, tabela, erro in ler_em_paralelo(arquivos, processos):
+            if erro is not None:
+                print(f"Erro ao processar o arquivo {os.path.basename(arquivo)}: {erro}")
+                contagem['arquivos_com_erro'] += 1
+                progresso.avancar()
+                continue
+            contagem['linhas_lidas'] += tabela.num_rows
+            with progresso.etapa('deduplicacao'):
+                tabela = sem_repetidos(tabela, vistos)
+            contagem['linhas_gravadas'] += tabela.num_rows
+            if destino_csv:
+                with progresso.etapa('gravacao_csv'):
+                    if escritor_csv is None:
+                        escritor_csv = pa_csv.CSVWriter(destino_csv, _tabela_csv(tabela).schema,
+                                                        write_options=pa_csv.WriteOptions(quoting_style='needed'))
+                    escritor_csv.write_table(_tabela_csv(tabela))
+            progresso.avancar()
+            yield from tabela.to_batches()
+        progresso.concluir()
+
+    particionamento = ds.partitioning(
+        pa.schema([ESQUEMA.field(coluna) for coluna in particoes]), flavor='hive'
+    ) if particoes else None
+    try:
+        with progresso.etapa('gravacao'), pasta_substituta(destino) as temporaria:
+            ds.write_dataset(
+                lotes(), temporaria, schema=ESQUEMA, format='parquet',
+                partitioning=particionamento,
+                file_options=ds.ParquetFileFormat().make_write_options(compression=compressao),
+            )
+    finally:
+        if escritor_csv is not None:
+            escritor_csv.close()
+
+    progresso.finalizar(**contagem)
+    return contagem
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pasta', default='./processos', help="Pasta com os CSVs exportados do PJe.")
+    parser.add_argument('--saida', default='merged_processos', help="Pasta do dataset Parquet.")
+    parser.add_argument('--csv', default=None, help="Grava também o CSV combinado neste caminho.")
+    parser.add_argument('--particoes', default=','.join(PARTICOES_PADRAO),
+                        help="Colunas de partição separadas por vírgula (vazio: sem partição).")
+    parser.add_argument('--processos', type=int, default=None, help="Leituras simultâneas.")
+    args = parser.parse_args()
+
+    particoes = [coluna for coluna in args.particoes.split(',') if coluna]
+    desconhecidas = set(particoes) - set(COLUNAS)
+    if desconhecidas:
+        parser.error(f"colunas de partição desconhecidas: {', '.join(sorted(desconhecidas))}")
+
+    contagem = mesclar_processos(args.pasta, args.saida, args.csv, particoes, processos=args.processos)
+    if contagem['linhas_gravadas'] or contagem['arquivos'] > contagem['arquivos_com_erro']:
+        print(f"{contagem['arquivos'] - contagem['arquivos_com_erro']} arquivo(s) combinados: "
+              f"{contagem['linhas_lidas']} linhas lidas, {contagem['linhas_gravadas']} processos distintos "
+              f"salvos em '{args.saida}'" + (f" e '{args.csv}'." if args.csv else "."))
+    else:
+        print("Nenhum arquivo válido encontrado para combinar.")
+
+
+if __name__ == '__main__':
+    main()
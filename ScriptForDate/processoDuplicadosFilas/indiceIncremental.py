@@ -0,0 +1,344 @@
+"""
+Índice incremental de processos repetidos nas filas de tarefas do PJe.
+
+Em vez de reler todos os CSVs de `analisar/` a cada execução, guarda em
+`pasta_estado` a contribuição de cada arquivo: para cada numeroProcesso e
+NomeTarefa, quantas linhas o arquivo tem e em que posição a tarefa aparece
+primeiro. Só os arquivos novos, substituídos ou removidos são processados de
+novo; a detecção usa a impressão digital do arquivo (tamanho, mtime e hash do
+conteúdo, este só recalculado quando tamanho ou mtime mudam).
+
+O relatório processos_repetidos.csv (mesmo formato do main.py) é montado a
+partir do índice, aplicando a regra das tarefas ignoradas na consulta. Com o
+modo de observação, a pasta é acompanhada pelo watchdog (se instalado) ou por
+varredura periódica, e o relatório é regenerado a cada mudança.
+
+Uso:
+    python indiceIncremental.py                   # atualiza o índice e gera o relatório
+    python indiceIncremental.py --observar        # continua observando a pasta
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.cache_dados import impressao_digital
+from comum.duplicados import processos_repetidos
+from comum.exportacao import exportar_csv
+from comum.leitura import detectar_delimitador, padronizar_nome_coluna
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:  # sem watchdog a pasta é observada por varredura periódica
+    Observer = None
+    FileSystemEventHandler = object
+
+TAREFAS_IGNORADAS = ["Arquivo definitivo", "Imprimir Expediente", "(CR) Processos arquivados"]
+
+COLUNAS_CONTRIBUICAO = ['numeroProcesso', 'NomeTarefa', 'linhas', 'posicao']
+
+# Versão do formato das contribuições; mudar invalida o índice salvo
+VERSAO_INDICE = 1
+
+
+def log(message):
+    """Função simples para exibir mensagens de log."""
+    print(f"[INDICE] {datetime.now().strftime('%Y-%m-%d %H:%M:%S')} - {message}")
+
+
+def contribuicao_arquivo(arquivo):
+    """
+    Resume um CSV de fila: uma linha por (numeroProcesso, NomeTarefa).
+
+    :return: (DataFrame com numeroProcesso, NomeTarefa, linhas e posicao da primeira
+             ocorrência; colunas encontradas no arquivo) ou (None, None) se não puder ser lido.
+    """
+    delimitador = detectar_delimitador(arquivo)
+    try:
+        cabecalho = pd.read_csv(arquivo, delimiter=delimitador, encoding='utf-8', nrows=0).columns
+        mapeamento = padronizar_nome_coluna(cabecalho)
+        colunas = [c for c in cabecalho if mapeamento[c] in ('numeroProcesso', 'NomeTarefa')]
+        if not colunas:
+            df = pd.DataFrame()
+        else:
+            df = pd.read_csv(arquivo, delimiter=delimitador, encoding='utf-8', usecols=colunas, dtype=str)
+    except Exception as e:
+        print(f"Erro ao ler o arquivo {arquivo}: {e}")
+        return None, None
+
+    df = df.rename(columns=mapeamento)
+    encontradas = sorted(set(df.columns))
+    if 'numeroProcesso' not in df.columns:
+        return pd.DataFrame(columns=COLUNAS_CONTRIBUICAO), encontradas
+    if 'NomeTarefa' not in df.columns:
+        df['NomeTarefa'] = pd.Series(pd.NA, index=df.index, dtype='string')
+
+    df = df[['numeroProcesso', 'NomeTarefa']].dropna(subset=['numeroProcesso'])
+    df['posicao'] = range(len(df))
+    contribuicao = (df.groupby(['numeroProcesso', 'NomeTarefa'], dropna=False, sort=False)['posicao']
+                    .agg(linhas='size', posicao='min')
+                    .reset_index())
+    return contribuicao[COLUNAS_CONTRIBUICAO], encontradas
+
+
+class IndiceDuplicados:
+    """
+    Índice persistente numeroProcesso -> (subpasta, NomeTarefa) dos CSVs de uma pasta.
+
+    Arquivos diretamente em `pasta_analisar` ficam na subpasta '' (os que o
+    main.py lê); os das subpastas ("Civil Direção", ...) ficam na subpasta de origem.
+    """
+
+    def __init__(self, pasta_analisar='analisar', pasta_estado='estado_indice_duplicados'):
+        self.pasta_analisar = pasta_analisar
+        self.pasta_estado = pasta_estado
+        self.pasta_contribuicoes = os.path.join(pasta_estado, 'contribuicoes')
+        self._trava = threading.Lock()
+        self.arquivos = {}
+        self.contribuicoes = {}
+        self.falhas = {}  # arquivo -> hash da versão que não pôde ser lida
+        self._tabela = None
+        self._carregar()
+
+    # ----- persistência -------------------------------------------------
+
+    def _caminho_estado(self):
+        return os.path.join(self.pasta_estado, 'estado.json')
+
+    def _carregar(self):
+        """Lê o estado salvo (arquivos indexados e as contribuições de cada um)."""
+        if not os.path.exists(self._caminho_estado()):
+            return
+        with open(self._caminho_estado(), 'r', encoding='utf-8') as f:
+            estado = json.load(f)
+        if estado.get('versao') != VERSAO_INDICE:
+            log("Índice salvo em outra versão; será reconstruído.")
+            return
+        for relativo, info in estado['arquivos'].items():
+            caminho = self._caminho_contribuicao(info['hash'])
+            if os.path.exists(caminho):
+                self.arquivos[relativo] = info
+                self.contribuicoes[relativo] = pd.read_parquet(caminho)
+
+    def _salvar(self):
+        os.makedirs(self.pasta_contribuicoes, exist_ok=True)
+        temporario = self._caminho_estado() + '.tmp'
+        with open(temporario, 'w', encoding='utf-8') as f:
+            json.dump({'versao': VERSAO_INDICE, 'arquivos': self.arquivos}, f, indent=2, ensure_ascii=False)
+        os.replace(temporario, self._caminho_estado())
+        # Remove contribuições que nenhum arquivo usa mais
+        em_uso = {f"{info['hash']}.parquet" for info in self.arquivos.values()}
+        for nome in os.listdir(self.pasta_contribuicoes):
+            if nome.endswith('.parquet') and nome not in em_uso:
+                os.remove(os.path.join(self.pasta_contribuicoes, nome))
+
+    # ----- atualização --------------------------------------------------
+
+    def listar_arquivos(self):
+        """CSVs da pasta e das subpastas, pelo caminho relativo (ordenados)."""
+        encontrados = []
+        for raiz, pastas, arquivos in os.walk(self.pasta_analisar):
+            pastas[:] = sorted(p for p in pastas if not p.startswith('.'))
+            for nome in arquivos:
+                if nome.lower().endswith('.csv'):
+                    encontrados.append(os.path.relpath(os.path.join(raiz, nome), self.pasta_analisar))
+        return sorted(encontrados)
+
+    def atualizar(self):
+        """
+        Varre a pasta e reprocessa só os arquivos novos ou alterados.
+
+        Um arquivo que não pode ser lido sai do índice (a contribuição da versão
+        anterior não vale mais) e é informado em "com_erro" uma vez por versão.
+
+        :return: Dicionário com as listas "novos", "alterados", "removidos" e "com_erro".
+        """
+        with self._trava:
+            atuais = self.listar_arquivos()
+            mudancas = {'novos': [], 'alterados': [], 'removidos': sorted(set(self.arquivos) - set(atuais)),
+                        'com_erro': []}
+            for relativo in mudancas['removidos']:
+                del self.arquivos[relativo]
+                del self.contribuicoes[relativo]
+            for relativo in set(self.falhas) - set(atuais):
+                del self.falhas[relativo]
+
+            for relativo in atuais:
+                caminho = os.path.join(self.pasta_analisar, relativo)
+                try:
+                    digital = impressao_digital(caminho, self.pasta_estado)
+                except OSError:
+                    continue  # arquivo removido ou ainda sendo copiado
+                anterior = self.arquivos.get(relativo)
+                if (anterior and anterior['hash'] == digital['hash']) or self.falhas.get(relativo) == digital['hash']:
+                    continue
+
+                contribuicao, colunas = contribuicao_arquivo(caminho)
+                if contribuicao is None:
+                    self.falhas[relativo] = digital['hash']
+                    self.arquivos.pop(relativo, None)
+                    self.contribuicoes.pop(relativo, None)
+                    mudancas['com_erro'].append(relativo)
+                    continue
+                self.falhas.pop(relativo, None)
+                contribuicao.to_parquet(self._caminho_contribuicao(digital['hash'], criar=True), index=False)
+                self.contribuicoes[relativo] = contribuicao
+                self.arquivos[relativo] = {
+                    'hash': digital['hash'],
+                    'subpasta': os.path.dirname(relativo),
+                    'colunas': colunas,
+                    'linhas': int(contribuicao['linhas'].sum()),
+                    'indexado_em': datetime.now().isoformat(timespec='seconds'),
+                }
+                mudancas['alterados' if anterior else 'novos'].append(relativo)
+
+            if any(mudancas.values()):
+                self._tabela = None
+                self._salvar()
+            return mudancas
+
+    def _caminho_contribuicao(self, hash_arquivo, criar=False):
+        if criar:
+            os.makedirs(self.pasta_contribuicoes, exist_ok=True)
+        return os.path.join(self.pasta_contribuicoes, f"{hash_arquivo}.parquet")
+
+    # ----- consulta -----------------------------------------------------
+
+    def tabela(self):
+        """Todas as contribuições em uma tabela, com subpasta e ordem do arquivo (montada uma vez por mudança)."""
+        if self._tabela is None:
+            partes = []
+            for ordem, relativo in enumerate(sorted(self.contribuicoes)):
+                parte = self.contribuicoes[relativo]
+                partes.append(parte.assign(subpasta=self.arquivos[relativo]['subpasta'], ordem=ordem))
+            colunas = COLUNAS_CONTRIBUICAO + ['subpasta', 'ordem']
+            self._tabela = pd.concat(partes, ignore_index=True)[colunas] if partes else pd.DataFrame(columns=colunas)
+        return self._tabela
+
+    def colunas_encontradas(self, subpasta=''):
+        return {coluna for info in self.arquivos.values() if info['subpasta'] == subpasta
+                for coluna in info['colunas']}
+
+    def processos_repetidos(self, tarefas_ignoradas=TAREFAS_IGNORADAS, subpasta=''):
+        """
+        Processos com mais de uma linha nos arquivos da subpasta e as tarefas associadas.
+
+        Mesma regra do main.py: as tarefas distintas são listadas na ordem em que
+        aparecem e o processo é descartado quando só tem uma tarefa e ela é ignorada.
+
+        :return: DataFrame com "processoID" e "tarefasAssociadas", ou None se os
+                 arquivos da subpasta não têm as colunas numeroProcesso e NomeTarefa.
+        """
+        with self._trava:
+            if not {'numeroProcesso', 'NomeTarefa'} <= self.colunas_encontradas(subpasta):
+                return None
+            tabela = self.tabela()
+        tabela = tabela[tabela['subpasta'] == subpasta]
+
+        # As linhas já estão agregadas por arquivo: cada uma pesa o número de linhas originais
+        tabela = tabela.sort_values(['ordem', 'posicao'], kind='stable')
+        resultado = processos_repetidos(tabela['numeroProcesso'], tabela['NomeTarefa'], tarefas_ignoradas,
+                                        linhas=tabela['linhas'])
+        return resultado.rename(columns={'numeroProcesso': 'processoID', 'tarefas': 'tarefasAssociadas'})
+
+    def gravar_relatorio(self, nome_arquivo_saida='processos_repetidos.csv',
+                         tarefas_ignoradas=TAREFAS_IGNORADAS, subpasta=''):
+        inicio = time.perf_counter()
+        df_final = self.processos_repetidos(tarefas_ignoradas, subpasta)
+        if df_final is None:
+            print("Não foi possível encontrar as colunas 'numeroProcesso' e/ou 'NomeTarefa' em alguns arquivos.")
+            return None
+        exportar_csv(df_final, nome_arquivo_saida, sep=';')
+        log(f"Arquivo '{nome_arquivo_saida}' gerado com {len(df_final)} processos "
+            f"em {(time.perf_counter() - inicio) * 1000:.0f} ms.")
+        return df_final
+
+    # ----- observação ---------------------------------------------------
+
+    def observar(self, ao_mudar, intervalo=5.0, espera=2.0):
+        """
+        Observa a pasta e chama `ao_mudar(mudancas)` depois de cada atualização do índice.
+
+        Com o watchdog, os eventos do sistema de arquivos disparam a varredura
+        (aguardando `espera` segundos sem novos eventos, para cópias em andamento);
+        sem ele, a pasta é varrida a cada `intervalo` segundos. Ctrl+C encerra.
+        """
+        def verificar():
+            mudancas = self.atualizar()
+            if any(mudancas.values()):
+                log(f"{len(mudancas['novos'])} novos, {len(mudancas['alterados'])} alterados, "
+                    f"{len(mudancas['removidos'])} removidos, {len(mudancas['com_erro'])} com erro de leitura.")
+                ao_mudar(mudancas)
+
+        if Observer is None:
+            log(f"watchdog não instalado; varrendo '{self.pasta_analisar}' a cada {intervalo:.0f} s.")
+            try:
+                while True:
+                    time.sleep(intervalo)
+                    verificar()
+            except KeyboardInterrupt:
+                return
+
+        sinal = threading.Event()
+        observador = Observer()
+        observador.schedule(_EventosPasta(sinal), self.pasta_analisar, recursive=True)
+        observador.start()
+        log(f"Observando '{self.pasta_analisar}'.")
+        try:
+            while True:
+                sinal.wait()
+                # Espera a pasta ficar quieta antes de varrer
+                while sinal.wait(espera):
+                    sinal.clear()
+                verificar()
+        except KeyboardInterrupt:
+            pass
+        finally:
+            observador.stop()
+            observador.join()
+
+
+class _EventosPasta(FileSystemEventHandler):
+    """Sinaliza qualquer criação, alteração, remoção ou movimentação de CSV."""
+
+    def __init__(self, sinal):
+        super().__init__()
+        self.sinal = sinal
+
+    def on_any_event(self, event):
+        caminhos = [getattr(event, 'src_path', ''), getattr(event, 'dest_path', '')]
+        if any(str(caminho).lower().endswith('.csv') for caminho in caminhos):
+            self.sinal.set()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Índice incremental de processos repetidos.")
+    parser.add_argument('--pasta', default='analisar')
+    parser.add_argument('--estado', default='estado_indice_duplicados')
+    parser.add_argument('--saida', default='processos_repetidos.csv')
+    parser.add_argument('--observar', action='store_true', help="Continua observando a pasta.")
+    parser.add_argument('--intervalo', type=float, default=5.0,
+                        help="Segundos entre varreduras quando o watchdog não está instalado.")
+    args = parser.parse_args()
+
+    indice = IndiceDuplicados(args.pasta, args.estado)
+    mudancas = indice.atualizar()
+    log(f"Índice atualizado: {len(mudancas['novos'])} novos, {len(mudancas['alterados'])} alterados, "
+        f"{len(mudancas['removidos'])} removidos, {len(indice.arquivos)} arquivos indexados.")
+    if mudancas['com_erro']:
+        log(f"Fora do índice por erro de leitura: {', '.join(mudancas['com_erro'])}.")
+    indice.gravar_relatorio(args.saida)
+
+    if args.observar:
+        indice.observar(lambda _: indice.gravar_relatorio(args.saida), intervalo=args.intervalo)
+
+
+if __name__ == "__main__":
+    main()
@@ -2,82 +2,88 @@
 
 
 import os
-import csv
+import sys
 import glob
+from concurrent.futures import ProcessPoolExecutor
 import pandas as pd
 
-def detectar_delimitador(caminho_arquivo, amostra_maxima=2048):
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.duplicados import processos_repetidos
+from comum.exportacao import exportar_excel
+from comum.leitura import ler_csv_com_cache
+from comum.progresso import Progresso
+
+# Colunas usadas na análise (nomes já padronizados)
+COLUNAS_ORDENADAS = ("numeroProcesso", "NomeTarefa")
+COLUNAS_ESSENCIAIS = set(COLUNAS_ORDENADAS)
+
+def ler_arquivo(arquivo, engine='python', somente_essenciais=False, usar_cache=True):
     """
-    Detecta o delimitador do arquivo CSV lendo um bloco de dados (amostra) e
-    usando o csv.Sniffer. Se não for possível, retorna ';'.
+    Lê um CSV (delimitador detectado) e padroniza os nomes das colunas.
+
+    A leitura passa pelo cache de comum.leitura: arquivos que não mudaram desde
+    a última execução são abertos direto da cópia em cache.
+
+    :param engine: Parser do pandas: 'python' (original), 'c' ou 'pyarrow'.
+    :param somente_essenciais: Se True, lê só as colunas de processo e tarefa, como texto.
+    :return: (DataFrame, None) ou (None, mensagem de erro).
     """
-    with open(caminho_arquivo, 'r', encoding='utf-8', errors='ignore') as f:
-        amostra = f.read(amostra_maxima)
-        f.seek(0)
-    sniffer = csv.Sniffer()
     try:
-        dialect = sniffer.sniff(amostra)
-        return dialect.delimiter
-    except csv.Error:
-        return ';'
+        if somente_essenciais:
+            df, _ = ler_csv_com_cache(arquivo, colunas=COLUNAS_ESSENCIAIS, encoding='utf-8',
+                                      engine=engine, usar_cache=usar_cache)
+        else:
+            df, _ = ler_csv_com_cache(arquivo, dtype=None, encoding='utf-8', engine=engine,
+                                      usar_cache=usar_cache)
+    except Exception as e:
+        return None, f"Erro ao ler o arquivo {arquivo}: {e}"
+    return df, None
 
-def padronizar_nome_coluna(colunas):
+def _ler_arquivo_pool(tarefa):
+    """Leitura de um arquivo em um processo do pool: tarefa = (subpasta, arquivo, engine)."""
+    subpasta, arquivo, engine = tarefa
+    df, erro = ler_arquivo(arquivo, engine, somente_essenciais=True)
+    return subpasta, df, erro
+
+def analisar_repetidos(df_total, tarefas_ignoradas):
     """
-    Faz a padronização dos nomes de colunas, para que colunas como
-    'numeroProcesso', 'numero_processo' etc. sejam tratadas como 'numeroProcesso',
-    e 'NomeTarefa'/'nomeTarefa' sejam tratadas como 'NomeTarefa'.
+    Agrupa as tarefas dos processos que aparecem mais de uma vez (ver comum.duplicados).
+
+    :return: DataFrame com "numeroProcesso" e "nomeTarefa" (tarefas separadas por vírgula).
     """
-    possiveis_nomes_numero_processo = [
-        "numeroProcesso", "numero_processo", "numeroProcesso ", "numero_processo "
-    ]
-    possiveis_nomes_tarefa = [
-        "NomeTarefa", "nomeTarefa", "NomeTarefa ", "nomeTarefa "
-    ]
-    
-    mapeamento = {}
-    for col in colunas:
-        col_limpo = col.strip()
-        col_lower = col_limpo.lower()
-        
-        if col_lower in [nome.lower() for nome in possiveis_nomes_numero_processo]:
-            mapeamento[col] = "numeroProcesso"
-        elif col_lower in [nome.lower() for nome in possiveis_nomes_tarefa]:
-            mapeamento[col] = "NomeTarefa"
-        else:
-            mapeamento[col] = col_limpo
-    return mapeamento
+    resultado = processos_repetidos(df_total["numeroProcesso"], df_total["NomeTarefa"], tarefas_ignoradas)
+    return resultado.rename(columns={"tarefas": "nomeTarefa"})
+
+def _analisar_subpasta_pool(tarefa):
+    """Análise de uma subpasta em um processo do pool: tarefa = (subpasta, DataFrame, tarefas ignoradas)."""
+    subpasta, df, tarefas_ignoradas = tarefa
+    return subpasta, analisar_repetidos(df, tarefas_ignoradas)
 
-def processar_pasta(pasta_raiz, subpasta, tarefas_ignoradas):
+def processar_pasta(pasta_raiz, subpasta, tarefas_ignoradas, progresso=None):
     """
     Lê todos os arquivos CSV dentro de `pasta_raiz/subpasta`,
     concatena em um único DataFrame, processa tarefas repetidas/ignoradas
     e retorna o DataFrame final.
     """
+    progresso = progresso or Progresso('repetidosProcessosMultiShell')
     caminho_subpasta = os.path.join(pasta_raiz, subpasta)
     arquivos_csv = glob.glob(os.path.join(caminho_subpasta, "*.csv"))
     
-    df_total = pd.DataFrame()
+    dataframes = []
     
+    progresso.iniciar(len(arquivos_csv), f"Lendo arquivos de {subpasta}")
     for arquivo in arquivos_csv:
-        delimitador = detectar_delimitador(arquivo)
-        
-        try:
-            df = pd.read_csv(
-                arquivo,
-                delimiter=delimitador,
-                encoding='utf-8',
-                engine='python'
-            )
-        except Exception as e:
-            print(f"Erro ao ler o arquivo {arquivo}: {e}")
-            continue
-        
-        # Padroniza nomes de colunas
-        mapeamento = padronizar_nome_coluna(df.columns)
-        df.rename(columns=mapeamento, inplace=True)
-        
-        # Concatena ao DataFrame total
-        df_total = pd.concat([df_total, df], ignore_index=True)
+        with progresso.etapa('leitura'):
+            df, erro = ler_arquivo(arquivo)
+        if erro:
+            print(erro)
+        else:
+            dataframes.append(df)
+        progresso.avancar()
+    progresso.concluir()
+    
+    # Concatena uma única vez, no final
+    df_total = pd.concat(dataframes, ignore_index=True) if dataframes else pd.DataFrame()
     
     if df_total.empty:
         print(f"Não foram encontrados arquivos válidos em: {caminho_subpasta}")
@@ -88,40 +94,70 @@ def processar_pasta(pasta_raiz, subpasta, tarefas_ignoradas):
         print(f"[{subpasta}] Não foi possível encontrar as colunas 'numeroProcesso' e/ou 'NomeTarefa'.")
         return pd.DataFrame()  # Retorna DataFrame vazio
     
-    # Remove linhas sem numeroProcesso
-    df_total.dropna(subset=["numeroProcesso"], inplace=True)
-    
-    # Identifica processos repetidos
-    freq = df_total["numeroProcesso"].value_counts()
-    processos_repetidos = freq[freq > 1].index
-    df_repetidos = df_total[df_total["numeroProcesso"].isin(processos_repetidos)]
-    
-    # Função para processar as tarefas dentro de cada processo
-    def agrupar_tarefas(grupo):
-        tarefas_unicas = grupo.dropna().unique()
-        
-        # Se houver apenas uma tarefa e ela estiver na lista de ignoradas, descartar (retorna None)
-        if len(tarefas_unicas) == 1 and tarefas_unicas[0] in tarefas_ignoradas:
-            return None
-        
-        # Concatenar todas as tarefas (inclusive as ignoradas, se houver mais de uma)
-        return ', '.join(tarefas_unicas)
-    
-    # Corrigido: agrupar somente a coluna "NomeTarefa" e usar .reset_index(name="nomeTarefa")
-    # Isso evita o conflito de colunas na hora do reset_index() e remove o DeprecationWarning.
-    df_final = (
-        df_repetidos
-        .groupby("numeroProcesso")["NomeTarefa"]  
-        .apply(agrupar_tarefas)
-        .reset_index(name="nomeTarefa")
-    )
-    
-    # Remove processos onde a tarefa resultou em None
-    df_final = df_final[df_final["nomeTarefa"].notna()]
+    with progresso.etapa('analise'):
+        return analisar_repetidos(df_total, tarefas_ignoradas)
+
+def processar_subpastas_em_paralelo(pasta_raiz, subpastas, tarefas_ignoradas, progresso=None,
+                                    processos=None, engine='c'):
+    """
+    Mesmo resultado de processar_pasta para cada subpasta, em paralelo.
+
+    Os arquivos de todas as subpastas são lidos em um pool de processos (parser
+    C ou pyarrow, só as colunas de processo e tarefa), concatenados uma única
+    vez e a análise de cada subpasta roda em paralelo.
+
+    :return: Dicionário {subpasta: DataFrame}, na ordem de `subpastas`.
+    """
+    progresso = progresso or Progresso('repetidosProcessosMultiShell')
+    tarefas = [(subpasta, arquivo, engine)
+               for subpasta in subpastas
+               for arquivo in glob.glob(os.path.join(pasta_raiz, subpasta, "*.csv"))]
 
-    return df_final
+    dataframes = []
+    colunas_por_subpasta = {subpasta: set() for subpasta in subpastas}
+    progresso.iniciar(len(tarefas), "Lendo arquivos de todas as subpastas")
+    with progresso.etapa('leitura'), ProcessPoolExecutor(max_workers=processos) as pool:
+        # map devolve na ordem das tarefas, então as linhas ficam na mesma ordem da leitura sequencial
+        for subpasta, df, erro in pool.map(_ler_arquivo_pool, tarefas):
+            if erro:
+                print(erro)
+            else:
+                colunas_por_subpasta[subpasta].update(df.columns)
+                if not df.empty:
+                    df["subpasta"] = subpasta
+                    dataframes.append(df)
+            progresso.avancar()
+    progresso.concluir()
 
-def main():
+    with progresso.etapa('concatenacao'):
+        df_total = (pd.concat(dataframes, ignore_index=True) if dataframes
+                    else pd.DataFrame(columns=["subpasta"]))
+        df_total["subpasta"] = pd.Categorical(df_total["subpasta"], categories=subpastas)
+        for coluna in COLUNAS_ESSENCIAIS:
+            if coluna not in df_total.columns:
+                df_total[coluna] = pd.Series(dtype="string")
+
+    analises = []
+    resultados = {}
+    for subpasta, df_subpasta in df_total.groupby("subpasta", observed=False, sort=False):
+        caminho_subpasta = os.path.join(pasta_raiz, subpasta)
+        if not colunas_por_subpasta[subpasta]:
+            print(f"Não foram encontrados arquivos válidos em: {caminho_subpasta}")
+            resultados[subpasta] = pd.DataFrame()
+        elif not COLUNAS_ESSENCIAIS <= colunas_por_subpasta[subpasta]:
+            print(f"[{subpasta}] Não foi possível encontrar as colunas 'numeroProcesso' e/ou 'NomeTarefa'.")
+            resultados[subpasta] = pd.DataFrame()
+        else:
+            analises.append((subpasta, df_subpasta[list(COLUNAS_ORDENADAS)].reset_index(drop=True),
+                             tarefas_ignoradas))
+
+    with progresso.etapa('analise'), ProcessPoolExecutor(max_workers=processos) as pool:
+        for subpasta, df_final in pool.map(_analisar_subpasta_pool, analises):
+            resultados[subpasta] = df_final
+
+    return {subpasta: resultados[subpasta] for subpasta in subpastas}
+
+def main(paralelo=True, processos=None):
     pasta_analisar = "analisar"
     
     # Subpastas esperadas:
@@ -138,22 +174,36 @@ def main():
     # Nome do arquivo de saída (Excel)
     nome_arquivo_saida = "processos_repetidos_por_subpasta.xlsx"
     
-    # Usa ExcelWriter para criar/atualizar o arquivo Excel
-    with pd.ExcelWriter(nome_arquivo_saida) as writer:
+    progresso = Progresso('repetidosProcessosMultiShell')
+    processos_por_subpasta = {}
+    
+    if paralelo:
+        resultados = processar_subpastas_em_paralelo(pasta_analisar, subpastas, tarefas_ignoradas,
+                                                     progresso, processos)
+    else:
+        resultados = {}
         for subpasta in subpastas:
             print(f"\nProcessando subpasta: {subpasta}")
-            df_resultado = processar_pasta(pasta_analisar, subpasta, tarefas_ignoradas)
-            
-            if df_resultado.empty:
-                print(f"Nenhum resultado para subpasta: {subpasta}")
-                continue
-            
-            # Salva em uma nova aba (sheet) com o nome da subpasta
-            sheet_name = subpasta  # Ajuste se quiser remover espaços ou caracteres especiais
-            df_resultado.to_excel(writer, sheet_name=sheet_name, index=False)
-            print(f"Resultados de '{subpasta}' adicionados na aba '{sheet_name}'.")
+            resultados[subpasta] = processar_pasta(pasta_analisar, subpasta, tarefas_ignoradas, progresso)
+    
+    # Uma aba por subpasta, todas gravadas de uma vez no final
+    abas = {}
+    for subpasta, df_resultado in resultados.items():
+        if df_resultado.empty:
+            print(f"Nenhum resultado para subpasta: {subpasta}")
+            continue
+        
+        abas[subpasta] = df_resultado
+        processos_por_subpasta[subpasta] = len(df_resultado)
+        print(f"Resultados de '{subpasta}' adicionados na aba '{subpasta}'.")
     
-    print(f"\nArquivo Excel '{nome_arquivo_saida}' gerado com sucesso!")
+    if abas:
+        with progresso.etapa('gravacao'):
+            exportar_excel(abas, nome_arquivo_saida)
+        print(f"\nArquivo Excel '{nome_arquivo_saida}' gerado com sucesso!")
+    else:
+        print("\nNenhum processo repetido encontrado; o arquivo Excel não foi gerado.")
+    progresso.finalizar(processos_repetidos=processos_por_subpasta)
 
 if __name__ == "__main__":
     main()
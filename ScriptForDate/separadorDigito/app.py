@@ -1,40 +1,114 @@
 import streamlit as st
 import pandas as pd
+import hashlib
+import io
 import json
 import os
+import sys
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.cnj import extrair_cnj
+from comum.exportacao import excel_em_bytes
+from distribuicao import (SEM_SERVIDOR, atribuir_servidores, compilar_intervalos, contagem_por_digito,
+                          intervalos_balanceados, processos_por_servidor)
+from planilhaGrande import SEM_DIGITO, coluna_digitos, digitos_planilha, pagina_planilha, planilha_completa
 
 # Caminho do arquivo de configuração
 CONFIG_FILE = "configuracao.json"
 
-# Função para atribuir servidor
-def atribuir_servidor(digito, configuracao):
-    for servidor, intervalos in configuracao['intervalos_servidores'].items():
-        for intervalo in intervalos:
-            if intervalo[0] <= digito <= intervalo[1]:
-                return servidor
-    return "Desconhecido"
-
-# Processar planilha Excel
-def processar_excel(planilha, configuracao):
-    df = pd.read_excel(planilha)
-    return processar_dataframe(df, configuracao)
-
-# Processar arquivo CSV
-def processar_csv(planilha, configuracao, delimiter):
-    df = pd.read_csv(planilha, delimiter=delimiter)
-    return processar_dataframe(df, configuracao)
-
-# Processar DataFrame
-def processar_dataframe(df, configuracao):
-    coluna_processos = configuracao['coluna_processos']
-    # Extração do dígito com tratamento de NaN
-    df['Dígito'] = df[coluna_processos].str.extract(r'-(\d{2})\.')[0]
-    df['Dígito'] = pd.to_numeric(df['Dígito'], errors='coerce')  # Converte para números, mantendo NaN
-    df['Dígito'] = df['Dígito'].fillna(0).astype(int)  # Substitui NaN por 0 e converte para inteiro
-    # Atribuir servidores
-    df['Servidor'] = df['Dígito'].apply(lambda x: atribuir_servidor(x, configuracao))
+# Linhas por página da prévia no modo arquivo grande
+LINHAS_POR_PAGINA = 200
+MIME_XLSX = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
+
+# Hash do conteúdo do arquivo enviado, calculado uma vez por upload (chave dos caches abaixo)
+def chave_arquivo(arquivo):
+    hashes = st.session_state.setdefault("hashes_arquivos", {})
+    if arquivo.file_id not in hashes:
+        hashes[arquivo.file_id] = hashlib.sha256(arquivo.getvalue()).hexdigest()
+    return hashes[arquivo.file_id]
+
+# Ler a planilha enviada e extrair o dígito; fica em cache pelo hash do conteúdo,
+# então as interações seguintes (que reexecutam o script) não leem o arquivo de novo
+@st.cache_data(show_spinner="Lendo a planilha...", max_entries=4)
+def ler_planilha(chave, nome, delimiter, coluna_processos, _conteudo):
+    if nome.endswith(".xlsx"):
+        df = pd.read_excel(io.BytesIO(_conteudo))
+    else:
+        df = pd.read_csv(io.BytesIO(_conteudo), delimiter=delimiter)
+    # Números sem dígito verificador ficam com o dígito nulo e vão para "Desconhecido"
+    df['Dígito'] = extrair_cnj(df[coluna_processos])['dv']
     return df
 
+# Atribuir servidores: só a coluna "Servidor" é recalculada quando a configuração muda
+# (com balancear, os intervalos saem da distribuição dos dígitos do arquivo)
+def processar_dataframe(df, configuracao, balancear=False):
+    intervalos = configuracao['intervalos_servidores']
+    if balancear:
+        intervalos = intervalos_balanceados(df['Dígito'], intervalos)
+    servidores = atribuir_servidores(df['Dígito'], compilar_intervalos(intervalos))
+    return df.assign(Servidor=servidores), intervalos
+
+# Planilha de download montada em memória, em cache pelo arquivo e pelos intervalos usados
+@st.cache_data(show_spinner="Gerando a planilha...", max_entries=4)
+def planilha_em_bytes(chave, delimiter, coluna_processos, intervalos, _df):
+    return excel_em_bytes(_df)
+
+# Modo arquivo grande: só o dígito de cada linha fica em memória (na sessão, sem cópia a cada
+# interação); a leitura em blocos mostra o progresso e acontece uma vez por arquivo e coluna
+def digitos_em_blocos(arquivo, chave, delimiter, coluna_processos):
+    digitos_arquivos = st.session_state.setdefault("digitos_arquivos", {})
+    chave_digitos = (chave, delimiter, coluna_processos)
+    if chave_digitos not in digitos_arquivos:
+        barra = st.progress(0.0, text="Lendo a planilha em blocos...")
+
+        def avancar(fracao):
+            if fracao is not None:
+                barra.progress(fracao, text=f"Lendo a planilha em blocos... {fracao:.0%}")
+
+        digitos = digitos_planilha(arquivo.getvalue(), arquivo.name, coluna_processos, delimiter, avancar)
+        barra.empty()
+        digitos_arquivos.clear()  # só o arquivo atual
+        digitos_arquivos[chave_digitos] = digitos
+    return digitos_arquivos[chave_digitos]
+
+# Modo arquivo grande: cada página da prévia fica em cache; o XLSX em read_only é percorrido do início
+# até a página a cada leitura, e toda interação (ex.: preparar o download) reexecuta o script
+@st.cache_data(show_spinner="Lendo a página...", max_entries=20)
+def pagina_em_cache(chave, nome, delimiter, inicio, _conteudo):
+    return pagina_planilha(_conteudo, nome, inicio, LINHAS_POR_PAGINA, delimiter)
+
+# Modo arquivo grande: a planilha completa só é montada aqui, no download
+@st.cache_data(show_spinner="Montando a planilha completa...", max_entries=2)
+def planilha_grande_em_bytes(chave, delimiter, coluna_processos, intervalos, nome, _conteudo, _digitos):
+    df = planilha_completa(_conteudo, nome, delimiter)
+    df['Dígito'] = coluna_digitos(_digitos)
+    df['Servidor'] = atribuir_servidores(df['Dígito'], compilar_intervalos(intervalos))
+    return excel_em_bytes(df)
+
+# Carga de cada servidor com os intervalos usados
+def mostrar_resumo(intervalos, quantidades):
+    resumo = pd.DataFrame({
+        "Servidor": list(intervalos),
+        "Dígitos": [", ".join(f"{a:02d}-{b:02d}" for a, b in faixas) for faixas in intervalos.values()],
+    })
+    resumo["Processos"] = resumo["Servidor"].map(quantidades).fillna(0).astype(int)
+    if quantidades.get(SEM_SERVIDOR, 0):
+        resumo.loc[len(resumo)] = [SEM_SERVIDOR, "sem dígito", int(quantidades[SEM_SERVIDOR])]
+    st.subheader("Processos por servidor")
+    st.dataframe(resumo, hide_index=True)
+
+# Download: a planilha só é gerada quando pedida (e reaproveitada enquanto arquivo e intervalos não mudarem)
+def botao_download(pedido, gerar):
+    if st.button("Preparar arquivo para download"):
+        st.session_state.download_pedido = pedido
+    if st.session_state.get("download_pedido") == pedido:
+        st.download_button(
+            label="Baixar arquivo processado",
+            data=gerar(),
+            file_name="arquivo_processado.xlsx",
+            mime=MIME_XLSX
+        )
+
 # Inicializar o estado
 if "configuracao" not in st.session_state:
     if os.path.exists(CONFIG_FILE):
@@ -63,35 +137,74 @@ st.sidebar.header("Configuração")
 coluna_processos = st.sidebar.text_input(
     "Nome da coluna dos processos:", st.session_state.configuracao["coluna_processos"]
 )
+st.session_state.configuracao["coluna_processos"] = coluna_processos
 
 # Configurações para CSV
 st.sidebar.subheader("Configurações de CSV")
 csv_delimiter = st.sidebar.text_input("Delimitador para CSV:", value=";")
 
+# Distribuição
+st.sidebar.subheader("Distribuição")
+balancear = st.sidebar.checkbox(
+    "Equilibrar carga pelos dígitos do arquivo",
+    help="Ignora os intervalos salvos e calcula faixas contíguas de dígitos com a mesma quantidade de processos por servidor."
+)
+
+# Arquivo grande
+st.sidebar.subheader("Arquivo grande")
+modo_grande = st.sidebar.checkbox(
+    "Modo arquivo grande",
+    help="Lê a planilha em blocos, mostra a prévia por páginas e só monta o resultado completo no download."
+)
+
 # Upload de arquivo
 uploaded_file = st.file_uploader("Envie sua planilha (Excel ou CSV)", type=["xlsx", "csv"])
-if uploaded_file:
+if uploaded_file and not uploaded_file.name.endswith((".xlsx", ".csv")):
+    st.error("Formato de arquivo não suportado. Envie um arquivo .xlsx ou .csv.")
+elif uploaded_file and modo_grande:
+    try:
+        chave = chave_arquivo(uploaded_file)
+        digitos = digitos_em_blocos(uploaded_file, chave, csv_delimiter, coluna_processos)
+        intervalos = st.session_state.configuracao['intervalos_servidores']
+        if balancear:
+            intervalos = intervalos_balanceados(digitos, intervalos)
+        tabela = compilar_intervalos(intervalos)
+
+        st.success(f"Arquivo processado com sucesso! {len(digitos):,} linhas.".replace(",", "."))
+        mostrar_resumo(intervalos, processos_por_servidor(contagem_por_digito(digitos), tabela,
+                                                          sem_digito=int((digitos == SEM_DIGITO).sum())))
+
+        # Prévia paginada: só a página pedida é lida do arquivo
+        st.subheader("Prévia")
+        total_paginas = max(1, -(-len(digitos) // LINHAS_POR_PAGINA))
+        pagina = st.number_input(f"Página (de {total_paginas})", min_value=1, max_value=total_paginas, value=1)
+        inicio = (pagina - 1) * LINHAS_POR_PAGINA
+        df_pagina = pagina_em_cache(chave, uploaded_file.name, csv_delimiter, inicio, uploaded_file.getvalue())
+        df_pagina['Dígito'] = coluna_digitos(digitos[inicio:inicio + len(df_pagina)])
+        df_pagina['Servidor'] = atribuir_servidores(df_pagina['Dígito'], tabela)
+        st.dataframe(df_pagina)
+
+        botao_download(
+            (chave, csv_delimiter, coluna_processos, json.dumps(intervalos), "grande"),
+            lambda: planilha_grande_em_bytes(chave, csv_delimiter, coluna_processos, intervalos, uploaded_file.name,
+                                             uploaded_file.getvalue(), digitos)
+        )
+    except Exception as e:
+        st.error(f"Erro ao processar o arquivo: {e}")
+elif uploaded_file:
     try:
-        if uploaded_file.name.endswith(".xlsx"):
-            df_resultado = processar_excel(uploaded_file, st.session_state.configuracao)
-        elif uploaded_file.name.endswith(".csv"):
-            df_resultado = processar_csv(uploaded_file, st.session_state.configuracao, csv_delimiter)
-        else:
-            st.error("Formato de arquivo não suportado. Envie um arquivo .xlsx ou .csv.")
-        
+        chave = chave_arquivo(uploaded_file)
+        df_planilha = ler_planilha(chave, uploaded_file.name, csv_delimiter, coluna_processos, uploaded_file.getvalue())
+        df_resultado, intervalos = processar_dataframe(df_planilha, st.session_state.configuracao, balancear)
+
         st.success("Arquivo processado com sucesso!")
         st.dataframe(df_resultado)
+        mostrar_resumo(intervalos, df_resultado["Servidor"].value_counts())
 
-        # Opção para download
-        output_file = "arquivo_processado.xlsx"
-        df_resultado.to_excel(output_file, index=False)
-        with open(output_file, "rb") as f:
-            st.download_button(
-                label="Baixar arquivo processado",
-                data=f,
-                file_name="arquivo_processado.xlsx",
-                mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"
-            )
+        botao_download(
+            (chave, csv_delimiter, coluna_processos, json.dumps(intervalos)),
+            lambda: planilha_em_bytes(chave, csv_delimiter, coluna_processos, intervalos, df_resultado)
+        )
     except Exception as e:
         st.error(f"Erro ao processar o arquivo: {e}")
 
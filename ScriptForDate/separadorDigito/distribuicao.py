@@ -0,0 +1,155 @@
+"""
+Distribuição dos processos entre os servidores pelo dígito verificador (00-99).
+
+`compilar_intervalos` transforma o "intervalos_servidores" da configuração em
+uma tabela de 100 posições (dígito -> servidor), recusando intervalos que se
+sobrepõem, que saem de 0-99 ou que deixam dígitos sem servidor. A coluna de
+dígitos inteira é então atribuída com um único take sobre essa tabela.
+Números sem dígito verificador (dígito nulo) não vão para nenhum servidor:
+ficam como "Desconhecido" no app, no main.py e no lote.py.
+
+`intervalos_balanceados` calcula, a partir dos dígitos do próprio arquivo,
+intervalos contíguos que dividem os processos da forma mais equilibrada
+possível entre os servidores (menor carga máxima), mantendo a ordem dos
+servidores da configuração.
+
+Exemplo:
+    tabela = compilar_intervalos(configuracao['intervalos_servidores'])
+    df['Servidor'] = atribuir_servidores(df['Dígito'], tabela)
+"""
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+DIGITOS = 100
+SEM_SERVIDOR = "Desconhecido"
+
+# servidores: nomes na ordem da configuração; codigos: posição do servidor para cada dígito
+TabelaServidores = namedtuple('TabelaServidores', ['servidores', 'codigos'])
+
+
+def _faixas(digitos):
+    """[0, 1, 2, 5] -> '0-2, 5' (para as mensagens de erro)."""
+    faixas = []
+    for digito in digitos:
+        if faixas and digito == faixas[-1][1] + 1:
+            faixas[-1][1] = digito
+        else:
+            faixas.append([digito, digito])
+    return ', '.join(str(a) if a == b else f"{a}-{b}" for a, b in faixas)
+
+
+def compilar_intervalos(intervalos_servidores, permitir_lacunas=False):
+    """
+    Monta a tabela dígito -> servidor.
+
+    :param intervalos_servidores: {servidor: [[inicio, fim], ...]} (limites inclusivos).
+    :param permitir_lacunas: Se True, dígitos sem servidor ficam como "Desconhecido"
+                             em vez de gerar erro.
+    :raises ValueError: Com todos os problemas encontrados (intervalos inválidos,
+                        sobrepostos ou dígitos sem servidor).
+    """
+    servidores = list(intervalos_servidores)
+    codigos = np.full(DIGITOS, -1, dtype=np.int16)
+    erros = []
+    for posicao, servidor in enumerate(servidores):
+        for intervalo in intervalos_servidores[servidor]:
+            try:
+                inicio, fim = (int(limite) for limite in intervalo)
+            except (TypeError, ValueError):
+                erros.append(f"{servidor}: intervalo inválido {intervalo!r}.")
+                continue
+            if not 0 <= inicio <= fim < DIGITOS:
+                erros.append(f"{servidor}: intervalo [{inicio}, {fim}] fora de 0-{DIGITOS - 1} ou invertido.")
+                continue
+            faixa = codigos[inicio:fim + 1]
+            ocupados = np.flatnonzero((faixa >= 0) & (faixa != posicao))
+            for codigo in np.unique(faixa[ocupados]):
+                repetidos = inicio + ocupados[faixa[ocupados] == codigo]
+                erros.append(f"Dígitos {_faixas(repetidos.tolist())} estão em {servidores[codigo]} e em {servidor}.")
+            faixa[faixa < 0] = posicao
+
+    lacunas = np.flatnonzero(codigos < 0)
+    if len(lacunas) and not permitir_lacunas:
+        erros.append(f"Dígitos sem servidor: {_faixas(lacunas.tolist())}.")
+    if erros:
+        raise ValueError("Configuração de intervalos inválida:\n" + "\n".join(erros))
+    return TabelaServidores(servidores, codigos)
+
+
+def atribuir_servidores(digitos, tabela):
+    """
+    Servidor de cada dígito, de uma vez para a coluna inteira.
+
+    Dígitos nulos, fora de 0-99 ou sem servidor (com permitir_lacunas) ficam como "Desconhecido".
+    """
+    digitos = pd.Series(digitos)
+    valores = pd.to_numeric(digitos, errors='coerce').to_numpy(dtype=float, na_value=np.nan)
+    validos = np.isfinite(valores) & (valores >= 0) & (valores < DIGITOS)
+    codigos = np.full(len(valores), -1, dtype=np.int16)
+    codigos[validos] = tabela.codigos[valores[validos].astype(np.intp)]
+    # A última posição de `nomes` (índice -1) é a dos dígitos sem servidor
+    nomes = np.array(tabela.servidores + [SEM_SERVIDOR], dtype=object)
+    return pd.Series(nomes[codigos], index=digitos.index, name='Servidor')
+
+
+def contagem_por_digito(digitos):
+    """Quantidade de processos com cada dígito (array de 100 posições); nulos são ignorados."""
+    valores = pd.to_numeric(pd.Series(digitos), errors='coerce').dropna()
+    valores = valores[(valores >= 0) & (valores < DIGITOS)].astype(np.intp)
+    return np.bincount(valores.to_numpy(), minlength=DIGITOS)
+
+
+def processos_por_servidor(contagem, tabela, sem_digito=0):
+    """
+    Quantidade de processos de cada servidor a partir da contagem por dígito (sem olhar linha a linha).
+
+    :param sem_digito: Processos sem dígito verificador, contados em "Desconhecido".
+    """
+    # Posição 0 reservada aos dígitos sem servidor (código -1)
+    totais = np.bincount(tabela.codigos + 1, weights=contagem, minlength=len(tabela.servidores) + 1)
+    quantidades = pd.Series(totais[1:].astype(np.int64), index=tabela.servidores, name='Processos')
+    if totais[0] + sem_digito:
+        quantidades[SEM_SERVIDOR] = int(totais[0] + sem_digito)
+    return quantidades
+
+
+def intervalos_balanceados(digitos, servidores):
+    """
+    Intervalos contíguos de dígitos (cobrindo 0-99) com a carga mais equilibrada possível.
+
+    Partição linear ótima: minimiza a maior quantidade de processos de um servidor;
+    cada servidor recebe ao menos um dígito.
+
+    :param digitos: Dígitos do arquivo enviado.
+    :param servidores: Servidores, na ordem em que recebem os dígitos.
+    :return: {servidor: [[inicio, fim]]}, no formato de "intervalos_servidores".
+    """
+    servidores = list(servidores)
+    k = len(servidores)
+    if not 0 < k <= DIGITOS:
+        raise ValueError(f"São necessários de 1 a {DIGITOS} servidores para balancear (recebidos {k}).")
+    acumulado = np.concatenate([[0], np.cumsum(contagem_por_digito(digitos))])
+
+    # custo[j][i]: menor carga máxima dividindo os dígitos 0..i-1 entre j servidores
+    infinito = np.iinfo(np.int64).max
+    custo = np.full((k + 1, DIGITOS + 1), infinito, dtype=np.int64)
+    corte = np.zeros((k + 1, DIGITOS + 1), dtype=np.intp)
+    custo[1, 1:] = acumulado[1:]
+    for j in range(2, k + 1):
+        for i in range(j, DIGITOS + 1):
+            # O j-ésimo servidor fica com os dígitos c..i-1 (c >= j - 1, para sobrar um dígito a cada anterior)
+            inicios = np.arange(j - 1, i)
+            candidatos = np.maximum(custo[j - 1, inicios], acumulado[i] - acumulado[inicios])
+            melhor = int(np.argmin(candidatos))
+            custo[j, i] = candidatos[melhor]
+            corte[j, i] = inicios[melhor]
+
+    intervalos = {}
+    fim = DIGITOS
+    for j in range(k, 0, -1):
+        inicio = int(corte[j, fim]) if j > 1 else 0
+        intervalos[servidores[j - 1]] = [[inicio, fim - 1]]
+        fim = inicio
+    return {servidor: intervalos[servidor] for servidor in servidores}
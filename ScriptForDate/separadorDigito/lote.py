@@ -0,0 +1,192 @@
+"""
+Distribuição em lote: várias planilhas de uma vez, sem a interface do Streamlit.
+
+Cada planilha de entrada (XLSX ou CSV, arquivos ou pastas) é processada em um
+processo do pool com a mesma configuração de servidores, e gera uma pasta com
+um arquivo por servidor (na ordem original das linhas). No final é gravado um
+resumo consolidado com a quantidade de processos de cada servidor por arquivo;
+as planilhas que falharam vão para a aba "Erros" do resumo e o comando termina
+com código de saída 1.
+
+Uso:
+    python lote.py filas/ extra.xlsx --saida distribuicao_hoje
+    python lote.py filas/*.csv --formato csv --balancear --processos 4
+
+Saída:
+    <saida>/<planilha>/<planilha>_<SERVIDOR>.xlsx
+    <saida>/resumo_distribuicao.xlsx
+"""
+import argparse
+import json
+import os
+import re
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import pandas as pd
+
+from distribuicao import SEM_SERVIDOR, atribuir_servidores, compilar_intervalos, intervalos_balanceados
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.cnj import extrair_cnj
+from comum.exportacao import exportar, exportar_excel
+from comum.leitura import detectar_delimitador
+from comum.progresso import Progresso
+
+ARQUIVO_CONFIGURACAO = os.path.join(os.path.dirname(os.path.abspath(__file__)), "configuracao_servidores.json")
+EXTENSOES = (".xlsx", ".csv")
+ARQUIVO_RESUMO = "resumo_distribuicao.xlsx"
+CARACTERES_INVALIDOS = r'[\\/:*?"<>|]+'
+
+
+def listar_entradas(caminhos):
+    """Arquivos de entrada: os informados e as planilhas das pastas informadas (em ordem alfabética)."""
+    entradas = []
+    for caminho in caminhos:
+        if os.path.isdir(caminho):
+            entradas.extend(sorted(os.path.join(caminho, nome) for nome in os.listdir(caminho)
+                                   if nome.lower().endswith(EXTENSOES) and not nome.startswith("~$")))
+        else:
+            entradas.append(caminho)
+    return list(dict.fromkeys(entradas))
+
+
+def nomes_saida(entradas):
+    """Nome da pasta de saída de cada entrada (nome do arquivo sem extensão, sem repetir)."""
+    usados = {}
+    nomes = []
+    for entrada in entradas:
+        nome = re.sub(CARACTERES_INVALIDOS, "_", os.path.splitext(os.path.basename(entrada))[0])
+        usados[nome] = usados.get(nome, 0) + 1
+        nomes.append(nome if usados[nome] == 1 else f"{nome} ({usados[nome]})")
+    return nomes
+
+
+def ler_planilha(arquivo):
+    if arquivo.lower().endswith(".xlsx"):
+        return pd.read_excel(arquivo)
+    return pd.read_csv(arquivo, delimiter=detectar_delimitador(arquivo))
+
+
+def processar_entrada(tarefa):
+    """
+    Distribui uma planilha e grava um arquivo por servidor (roda em um processo do pool).
+
+    :param tarefa: (arquivo, pasta de saída, nome, configuração, tabela compilada ou None para balancear, formato)
+    :return: {"arquivo", "linhas", "contagem" {servidor: processos}, "erro" (mensagem ou None)}
+    """
+    arquivo, pasta_saida, nome, configuracao, tabela, formato = tarefa
+    resultado = {"arquivo": arquivo, "linhas": 0, "contagem": {}, "erro": None}
+    try:
+        df = ler_planilha(arquivo)
+        coluna_processos = configuracao['coluna_processos']
+        if coluna_processos not in df.columns:
+            raise ValueError(f"coluna '{coluna_processos}' não encontrada")
+        df['Dígito'] = extrair_cnj(df[coluna_processos])['dv']
+        if tabela is None:
+            servidores = list(configuracao['intervalos_servidores'])
+            tabela = compilar_intervalos(intervalos_balanceados(df['Dígito'], servidores))
+        df['Servidor'] = atribuir_servidores(df['Dígito'], tabela)
+
+        destino = os.path.join(pasta_saida, nome)
+        os.makedirs(destino, exist_ok=True)
+        for servidor, df_servidor in df.groupby('Servidor', sort=False):
+            nome_servidor = re.sub(CARACTERES_INVALIDOS, "_", str(servidor))
+            exportar(df_servidor, os.path.join(destino, f"{nome}_{nome_servidor}.{formato}"))
+        resultado["linhas"] = len(df)
+        resultado["contagem"] = df['Servidor'].value_counts().to_dict()
+    except Exception as e:
+        resultado["erro"] = str(e) or type(e).__name__
+    return resultado
+
+
+def montar_resumo(resultados, servidores):
+    """Uma linha por arquivo (e uma de total) com a quantidade de processos de cada servidor."""
+    colunas = list(servidores)
+    if any(SEM_SERVIDOR in r["contagem"] for r in resultados):
+        colunas.append(SEM_SERVIDOR)
+    linhas = [{"Arquivo": os.path.basename(r["arquivo"]),
+               **{servidor: r["contagem"].get(servidor, 0) for servidor in colunas},
+               "Total": r["linhas"]}
+              for r in resultados if r["erro"] is None]
+    resumo = pd.DataFrame(linhas, columns=["Arquivo", *colunas, "Total"])
+    total = resumo[[*colunas, "Total"]].sum().to_dict()
+    return pd.concat([resumo, pd.DataFrame([{"Arquivo": "TOTAL", **total}])], ignore_index=True)
+
+
+def montar_erros(resultados):
+    """Uma linha por arquivo que não pôde ser distribuído, com a mensagem de erro."""
+    return pd.DataFrame([{"Arquivo": r["arquivo"], "Erro": r["erro"]} for r in resultados if r["erro"] is not None],
+                        columns=["Arquivo", "Erro"])
+
+
+def processar_lote(entradas, configuracao, pasta_saida, formato="xlsx", balancear=False, processos=None,
+                   progresso=None):
+    """
+    Distribui todas as entradas em paralelo e grava o resumo consolidado.
+
+    :return: (resumo, erros): DataFrames gravados nas abas "Resumo" e "Erros" (esta só se
+             alguma entrada falhou) de <pasta_saida>/resumo_distribuicao.xlsx.
+    """
+    progresso = progresso or Progresso('separadorDigitoLote')
+    # Compilada uma vez só, no processo principal: configuração inválida para antes de abrir o pool
+    tabela = compilar_intervalos(configuracao['intervalos_servidores'])
+    tarefas = [(entrada, pasta_saida, nome, configuracao, None if balancear else tabela, formato)
+               for entrada, nome in zip(entradas, nomes_saida(entradas))]
+
+    resultados = []
+    progresso.iniciar(len(tarefas), "Distribuindo planilhas")
+    with progresso.etapa('distribuicao'), ProcessPoolExecutor(max_workers=processos) as pool:
+        # map devolve na ordem das entradas, então o resumo não depende de qual processo terminou antes
+        for resultado in pool.map(processar_entrada, tarefas):
+            if resultado["erro"]:
+                print(f"Erro ao processar {resultado['arquivo']}: {resultado['erro']}")
+            resultados.append(resultado)
+            progresso.avancar()
+    progresso.concluir()
+
+    resumo = montar_resumo(resultados, tabela.servidores)
+    erros = montar_erros(resultados)
+    abas = {'Resumo': resumo, 'Erros': erros} if len(erros) else {'Resumo': resumo}
+    with progresso.etapa('gravacao'):
+        exportar_excel(abas, os.path.join(pasta_saida, ARQUIVO_RESUMO))
+    return resumo, erros
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('entradas', nargs='+', help="Planilhas (.xlsx/.csv) ou pastas com planilhas.")
+    parser.add_argument('--configuracao', default=ARQUIVO_CONFIGURACAO, help="Configuração dos servidores (JSON).")
+    parser.add_argument('--saida', default="distribuicao_lote", help="Pasta de saída.")
+    parser.add_argument('--formato', choices=['xlsx', 'csv', 'parquet'], default='xlsx',
+                        help="Formato dos arquivos por servidor.")
+    parser.add_argument('--balancear', action='store_true',
+                        help="Intervalos calculados pelos dígitos de cada planilha (mesma carga por servidor).")
+    parser.add_argument('--processos', type=int, default=None, help="Processos do pool (padrão: todos os núcleos).")
+    args = parser.parse_args()
+
+    with open(args.configuracao, 'r', encoding='utf-8') as f:
+        configuracao = json.load(f)
+    entradas = listar_entradas(args.entradas)
+    if not entradas:
+        sys.exit("Nenhuma planilha .xlsx ou .csv encontrada nas entradas.")
+    os.makedirs(args.saida, exist_ok=True)
+
+    progresso = Progresso('separadorDigitoLote',
+                          arquivo_resumo=os.path.join(args.saida, 'separadorDigitoLote_resumo.json'))
+    try:
+        resumo, erros = processar_lote(entradas, configuracao, args.saida, args.formato, args.balancear,
+                                       args.processos, progresso)
+    except ValueError as e:
+        sys.exit(f"Erro: {e}")
+    print(resumo.to_string(index=False))
+    print(f"\nArquivos por servidor e resumo gravados em {args.saida}")
+    progresso.finalizar(arquivos=len(entradas), arquivos_com_erro=len(erros),
+                        processos=int(resumo["Total"].iloc[-1]))
+    if len(erros):
+        sys.exit(f"{len(erros)} de {len(entradas)} planilhas não foram distribuídas "
+                 f"(aba Erros de {os.path.join(args.saida, ARQUIVO_RESUMO)}).")
+
+
+if __name__ == '__main__':
+    main()
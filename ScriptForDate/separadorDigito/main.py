@@ -1,28 +1,37 @@
+import os
+import sys
 import pandas as pd
 import json
 
-def atribuir_servidor(digito, configuracao):
-    """
-    Atribui um servidor com base no dígito usando a configuração fornecida.
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.cnj import extrair_cnj
+from comum.exportacao import exportar_excel
+from distribuicao import atribuir_servidores, compilar_intervalos, intervalos_balanceados
+
+def processar_arquivo(arquivo_entrada, arquivo_configuracao, arquivo_saida, balancear=False):
     """
-    for servidor, intervalos in configuracao['intervalos_servidores'].items():
-        for intervalo in intervalos:
-            if intervalo[0] <= digito <= intervalo[1]:
-                return servidor
-    return "Desconhecido"
+    Atribui um servidor a cada processo pelo dígito verificador.
 
-def processar_arquivo(arquivo_entrada, arquivo_configuracao, arquivo_saida):
+    Com balancear=True, os intervalos da configuração são trocados por intervalos
+    calculados a partir dos dígitos do próprio arquivo (mesma carga para todos).
+    """
     with open(arquivo_configuracao, 'r') as f:
         configuracao = json.load(f)
 
     df = pd.read_excel(arquivo_entrada)
 
     coluna_processos = configuracao['coluna_processos']
-    df['Dígito'] = df[coluna_processos].str.extract(r'-(\d{2})\.')[0].astype(int)
+    # Números sem dígito verificador ficam com o dígito nulo e vão para "Desconhecido"
+    df['Dígito'] = extrair_cnj(df[coluna_processos])['dv']
 
-    df['Servidor'] = df['Dígito'].apply(lambda x: atribuir_servidor(x, configuracao))
+    intervalos = configuracao['intervalos_servidores']
+    if balancear:
+        intervalos = intervalos_balanceados(df['Dígito'], intervalos)
+        for servidor, faixas in intervalos.items():
+            print(f"{servidor}: dígitos {faixas[0][0]:02d}-{faixas[0][1]:02d}")
+    df['Servidor'] = atribuir_servidores(df['Dígito'], compilar_intervalos(intervalos))
 
-    df.to_excel(arquivo_saida, index=False)
+    exportar_excel(df, arquivo_saida)
     print(f"Arquivo salvo em {arquivo_saida}")
 
 if __name__ == "__main__":
@@ -34,4 +43,5 @@ if __name__ == "__main__":
 
     arquivo_entrada = "Felipe.xlsx" 
     arquivo_saida = "processos_com_servidores.xlsx"
-    processar_arquivo(arquivo_entrada, arquivo_configuracao, arquivo_saida)
+    balancear = False  # True: intervalos calculados pela distribuição dos dígitos do arquivo
+    processar_arquivo(arquivo_entrada, arquivo_configuracao, arquivo_saida, balancear)
@@ -0,0 +1,130 @@
+"""
+Leitura em blocos das planilhas enviadas ao app (modo arquivo grande).
+
+Em vez de carregar a planilha inteira, o app percorre o arquivo uma vez
+guardando só o dígito de cada processo (um int8 por linha), mostra a prévia
+em páginas lidas sob demanda e só monta a planilha completa no download.
+O CSV é lido pelo pandas com chunksize; o XLSX pelo openpyxl em modo
+read_only (as linhas saem do XML em streaming, sem montar a planilha na
+memória).
+
+Exemplo:
+    digitos = digitos_planilha(conteudo, "export.csv", "numeroProcesso", delimitador=";",
+                               progresso=lambda fracao: print(f"{fracao:.0%}"))
+    df = pagina_planilha(conteudo, "export.csv", inicio=200, tamanho=100, delimitador=";")
+"""
+import io
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+from openpyxl import load_workbook
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+from comum.cnj import extrair_cnj
+
+# Linhas lidas de cada vez
+TAMANHO_BLOCO = 50_000
+
+# Dígito gravado no array int8 para os números sem dígito verificador (vão para "Desconhecido")
+SEM_DIGITO = -1
+
+
+def eh_xlsx(nome):
+    return nome.lower().endswith(".xlsx")
+
+
+def _abrir_aba(conteudo):
+    """Primeira aba do XLSX em modo read_only (o chamador fecha a pasta de trabalho)."""
+    pasta = load_workbook(io.BytesIO(conteudo), read_only=True, data_only=True)
+    return pasta, pasta.worksheets[0]
+
+
+def _blocos_xlsx(conteudo, colunas=None, tamanho=TAMANHO_BLOCO):
+    """(bloco, fração lida) do XLSX; `colunas` limita as colunas montadas no DataFrame."""
+    pasta, aba = _abrir_aba(conteudo)
+    try:
+        linhas = aba.iter_rows(values_only=True)
+        cabecalho = list(next(linhas, ()))
+        if colunas is None:
+            posicoes = list(range(len(cabecalho)))
+        else:
+            faltando = [coluna for coluna in colunas if coluna not in cabecalho]
+            if faltando:
+                raise ValueError(f"Coluna(s) não encontrada(s) na planilha: {', '.join(faltando)}")
+            posicoes = [cabecalho.index(coluna) for coluna in colunas]
+        nomes = [cabecalho[posicao] for posicao in posicoes]
+        # max_row vem da dimensão gravada no arquivo; sem ela não há como estimar a fração
+        total = (aba.max_row or 0) - 1
+        lidas = 0
+        bloco = []
+        for linha in linhas:
+            bloco.append([linha[posicao] if posicao < len(linha) else None for posicao in posicoes])
+            if len(bloco) == tamanho:
+                lidas += len(bloco)
+                yield pd.DataFrame(bloco, columns=nomes), (min(lidas / total, 1.0) if total > 0 else None)
+                bloco = []
+        if bloco or not lidas:
+            yield pd.DataFrame(bloco, columns=nomes), 1.0
+    finally:
+        pasta.close()
+
+
+def _blocos_csv(conteudo, colunas=None, delimitador=",", tamanho=TAMANHO_BLOCO):
+    """(bloco, fração lida) do CSV; a fração vem da posição no buffer."""
+    buffer = io.BytesIO(conteudo)
+    with pd.read_csv(buffer, delimiter=delimitador, usecols=colunas, chunksize=tamanho) as leitor:
+        for bloco in leitor:
+            yield bloco, min(buffer.tell() / max(len(conteudo), 1), 1.0)
+
+
+def blocos_planilha(conteudo, nome, colunas=None, delimitador=",", tamanho=TAMANHO_BLOCO):
+    """Percorre a planilha enviada em blocos de `tamanho` linhas: gera (DataFrame, fração lida ou None)."""
+    if eh_xlsx(nome):
+        return _blocos_xlsx(conteudo, colunas, tamanho)
+    return _blocos_csv(conteudo, colunas, delimitador, tamanho)
+
+
+def digitos_planilha(conteudo, nome, coluna_processos, delimitador=",", progresso=None):
+    """
+    Dígito verificador de cada linha (int8), lendo só a coluna dos processos.
+
+    Números sem dígito ficam com SEM_DIGITO, fora de 0-99, e vão para "Desconhecido"
+    como no modo normal do app.
+    :param progresso: Função chamada com a fração lida (0 a 1, ou None) após cada bloco.
+    """
+    partes = []
+    for bloco, fracao in blocos_planilha(conteudo, nome, [coluna_processos], delimitador):
+        partes.append(extrair_cnj(bloco[coluna_processos])['dv'].fillna(SEM_DIGITO).to_numpy(dtype=np.int8))
+        if progresso:
+            progresso(fracao)
+    return np.concatenate(partes) if partes else np.empty(0, dtype=np.int8)
+
+
+def coluna_digitos(digitos):
+    """Dígitos de digitos_planilha como coluna Int8, com SEM_DIGITO nulo (como na planilha do modo normal)."""
+    return pd.arrays.IntegerArray(digitos.astype(np.int8), digitos == SEM_DIGITO)
+
+
+def pagina_planilha(conteudo, nome, inicio, tamanho, delimitador=","):
+    """Linhas [inicio, inicio + tamanho) da planilha (a primeira linha de dados é 0)."""
+    if eh_xlsx(nome):
+        pasta, aba = _abrir_aba(conteudo)
+        try:
+            cabecalho = list(next(aba.iter_rows(max_row=1, values_only=True), ()))
+            linhas = aba.iter_rows(min_row=inicio + 2, max_row=inicio + 1 + tamanho, values_only=True)
+            df = pd.DataFrame([list(linha) for linha in linhas], columns=cabecalho)
+        finally:
+            pasta.close()
+    else:
+        df = pd.read_csv(io.BytesIO(conteudo), delimiter=delimitador,
+                         skiprows=range(1, inicio + 1), nrows=tamanho)
+    df.index = pd.RangeIndex(inicio, inicio + len(df))
+    return df
+
+
+def planilha_completa(conteudo, nome, delimitador=","):
+    """Planilha inteira, montada bloco a bloco (usada só na hora do download)."""
+    blocos = [bloco for bloco, _ in blocos_planilha(conteudo, nome, delimitador=delimitador)]
+    return pd.concat(blocos, ignore_index=True) if blocos else pd.DataFrame()
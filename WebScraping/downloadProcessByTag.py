@@ -1,10 +1,10 @@
-import re
 import json
 import time
 from typing import Literal, List
 import os
 from functools import wraps
 from dotenv import load_dotenv
+import sys
 
 from selenium import webdriver
 from selenium.webdriver.common.by import By
@@ -17,6 +17,9 @@ from selenium.common.exceptions import (
     NoSuchElementException,
 )
 
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ScriptForDate')))
+from comum.cnj import normalizar_numero
+
 # Variáveis globais para driver e wait
 driver = None
 wait = None
@@ -312,11 +315,7 @@ def downloadProcessOnTagSearch(typeDocument: DocumentType) -> List[str]:
             print(f"XPath gerado: {process_xpath}")
             process_element = wait.until(EC.element_to_be_clickable((By.XPATH, process_xpath)))
             raw_process_number = process_element.text.strip()
-            process_number = re.sub(r'\D', '', raw_process_number)
-            if len(process_number) >= 17:
-                process_number = f"{process_number[:7]}-{process_number[7:9]}.{process_number[9:13]}.{process_number[13]}.{process_number[14:16]}.{process_number[16:]}"
-            else:
-                process_number = raw_process_number
+            process_number = normalizar_numero(raw_process_number) or raw_process_number
             print(f"Número do processo: {process_number}")
             process_numbers.append(process_number)
             
@@ -8,14 +8,17 @@ from selenium.common.exceptions import (
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
 from selenium.webdriver.support import expected_conditions as EC
-from openpyxl import Workbook
-from openpyxl.styles import Font
 from functools import wraps
 import time
 from dotenv import load_dotenv
 import os
 import logging
-import re
+import sys
+import pandas as pd
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ScriptForDate')))
+from comum.cnj import normalizar_numero
+from comum.exportacao import exportar_excel
 
 # Configuração básica do logging
 logging.basicConfig(
@@ -434,11 +437,8 @@ class PJEAutomation:
 
                 # Extrair o número do processo
                 raw_process_number = process_element.text.strip()
-                process_number = re.sub(r'\D', '', raw_process_number)
-                if len(process_number) >= 17:
-                    process_number = f"{process_number[:7]}-{process_number[7:9]}.{process_number[9:13]}.{process_number[13]}.{process_number[14:16]}.{process_number[16:]}"
-                else:
-                    process_number = raw_process_number  # Fallback caso o formato esperado não seja encontrado
+                # Formato CNJ; mantém o texto original caso o formato esperado não seja encontrado
+                process_number = normalizar_numero(raw_process_number) or raw_process_number
 
                 logging.info(f"Número do Processo: {process_number}")
                 print(process_number)
@@ -495,51 +495,12 @@ def save_data_to_excel(data_list, filename="dados_partes.xlsx"):
     :param filename: Nome do arquivo Excel de saída.
     """
     try:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Dados das Partes"
-
         # Cabeçalhos atualizados em português
         headers = ['Número do Processo', 'Polo', 'Nome da Parte', 'CPF', 'Nome Civil', 'Data de Nascimento', 'Genitor', 'Genitora', 'Classe', 'Assunto', 'Área']
-        ws.append(headers)
-
-        # Estilização dos cabeçalhos
-        bold_font = Font(bold=True)
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num)
-            cell.font = bold_font
-
-        # Adicionar os dados
-        for data in data_list:
-            ws.append([
-                data.get('Número do Processo', ''),
-                data.get('Polo', ''),
-                data.get('Nome da Parte', ''),
-                data.get('CPF', ''),
-                data.get('Nome Civil', ''),
-                data.get('Data de Nascimento', ''),
-                data.get('Genitor', ''),
-                data.get('Genitora', ''),
-                data.get('Classe', ''),
-                data.get('Assunto', ''),
-                data.get('Área', '')
-            ])
-
-        # Ajustar a largura das colunas
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter  # Obtém a letra da coluna
-            for cell in column:
-                try:
-                    if len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except:
-                    pass
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[column_letter].width = adjusted_width
-
-        # Salvar o arquivo
-        wb.save(filename)
+        df = pd.DataFrame(data_list).reindex(columns=headers).fillna('')
+
+        # Salvar o arquivo (cabeçalho em negrito e largura das colunas ajustada pela exportação)
+        exportar_excel(df, filename, nome_aba="Dados das Partes")
         logging.info(f"Dados salvos com sucesso no arquivo '{filename}'.")
 
     except Exception as e:
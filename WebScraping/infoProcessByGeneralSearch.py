@@ -4,6 +4,8 @@ import math
 import re
 import time
 import logging
+import sys
+import pandas as pd
 from dotenv import load_dotenv
 
 from selenium import webdriver
@@ -11,8 +13,8 @@ from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait, Select
 from selenium.webdriver.support import expected_conditions as EC
 
-from openpyxl import Workbook
-from openpyxl.styles import Font
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..', 'ScriptForDate')))
+from comum.exportacao import exportar_excel
 
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
@@ -226,44 +228,12 @@ def save_data_to_excel(data_list, filename="./docs/dados_partes.xlsx"):
     Dados salvos: Número do Processo, Órgão Julgador, Autuado em, Classe Judicial, Polo Ativo, Polo Passivo, Última Movimentação.
     """
     try:
-        wb = Workbook()
-        ws = wb.active
-        ws.title = "Dados dos Processos"
-
         headers = ['Número do Processo', 'Órgão Julgador', 'Autuado em', 'Classe Judicial',
                    'Polo Ativo', 'Polo Passivo', 'Última Movimentação']
-        ws.append(headers)
-
-        bold_font = Font(bold=True)
-        for col_num, header in enumerate(headers, 1):
-            cell = ws.cell(row=1, column=col_num)
-            cell.font = bold_font
-
-        for data in data_list:
-            ws.append([
-                data.get('Número do Processo', ''),
-                data.get('Órgão Julgador', ''),
-                data.get('Autuado em', ''),
-                data.get('Classe Judicial', ''),
-                data.get('Polo Ativo', ''),
-                data.get('Polo Passivo', ''),
-                data.get('Última Movimentação', '')
-            ])
-
-        # Ajusta a largura das colunas automaticamente
-        for column in ws.columns:
-            max_length = 0
-            column_letter = column[0].column_letter
-            for cell in column:
-                try:
-                    if cell.value and len(str(cell.value)) > max_length:
-                        max_length = len(str(cell.value))
-                except Exception:
-                    pass
-            adjusted_width = (max_length + 2)
-            ws.column_dimensions[column_letter].width = adjusted_width
+        df = pd.DataFrame(data_list).reindex(columns=headers).fillna('')
 
-        wb.save(filename)
+        # Cabeçalho em negrito e largura das colunas ajustada pela exportação
+        exportar_excel(df, filename, nome_aba="Dados dos Processos")
         logging.info(f"Dados salvos com sucesso no arquivo '{filename}'.")
     except Exception as e:
         logging.error(f"Ocorreu uma exceção ao salvar os dados no Excel. Erro: {e}")